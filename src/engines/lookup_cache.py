@@ -0,0 +1,201 @@
+﻿from __future__ import annotations
+import csv
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+# Índice de proceso para year_mewa_parkha.csv: año -> (mewa, parkha).
+# Se construye una sola vez por archivo y solo se reconstruye si cambia
+# su firma (mtime_ns, tamaño). Así tibetan_year() no re-parsea el CSV por llamada.
+
+LOOKUP_FILENAME = "year_mewa_parkha.csv"
+DEFAULT_LOOKUPS_DIR = Path(__file__).resolve().parent / "lookups"
+
+LookupRow = Tuple[Optional[int], Optional[str]]
+# dict (CSV parseado) o CompiledLookup (mmap): ambos exponen la interfaz de Mapping
+LookupIndex = Mapping[int, LookupRow]
+Signature = Tuple[int, int]
+
+_EMPTY: LookupIndex = {}
+_LOCK = threading.Lock()
+_CACHE: Dict[str, Tuple[Optional[Signature], LookupIndex]] = {}
+# Claves vigiladas por un LookupWatcher (clave -> nº de vigilantes): su hilo mantiene
+# la entrada al día, así que la ruta caliente ni siquiera hace stat.
+_WATCHED: Dict[str, int] = {}
+
+
+def _signature(path: Path) -> Optional[Signature]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def iter_lookup_rows(
+    path: Path, errors: Optional[List[str]] = None
+) -> Iterator[Tuple[int, Optional[int], Optional[str], str]]:
+    """
+    Recorre el CSV de lookups: (año, mewa, parkha, notes).
+    Filas sin año válido se ignoran. Si un año se repite gana la primera fila
+    (igual que el escaneo lineal anterior), aunque no traiga mewa ni parkha: esa
+    fila no aporta nada y el año lo resuelve el algoritmo. Una fila con mewa
+    inválido también reclama su año; no se produce y su error se agrega a
+    `errors` (si se pasa), sin invalidar el resto del índice.
+    """
+    seen = set()
+    with Path(path).open("r", encoding="utf-8-sig", newline="") as f:
+        r = csv.DictReader(f)
+        for line, row in enumerate(r, start=2):
+            try:
+                y = int((row.get("year") or "").strip())
+            except Exception:
+                continue
+            if y in seen:
+                continue
+            seen.add(y)
+            mewa = (row.get("mewa") or "").strip() or None
+            parkha = (row.get("parkha") or "").strip() or None
+            if mewa is None and parkha is None:
+                continue
+            try:
+                mewa_i = int(mewa) if mewa is not None else None
+            except ValueError:
+                mewa_i = 0
+            if mewa_i is not None and not 1 <= mewa_i <= 9:
+                if errors is not None:
+                    errors.append(f"{path} L{line}: mewa inválido: {mewa!r}")
+                continue
+            yield y, mewa_i, parkha, (row.get("notes") or "").strip()
+
+
+def parse_lookup_csv(path: Path, errors: Optional[List[str]] = None) -> LookupIndex:
+    """Parsea el CSV completo a un dict año -> (mewa, parkha)."""
+    return {y: (mewa, parkha) for y, mewa, parkha, _notes in iter_lookup_rows(path, errors)}
+
+
+def lookup_errors(lookup_csv: Path) -> List[str]:
+    """Errores por fila del CSV de lookups (filas descartadas del índice); vacío si no existe."""
+    errors: List[str] = []
+    if _signature(lookup_csv) is not None:
+        for _row in iter_lookup_rows(lookup_csv, errors):
+            pass
+    return errors
+
+
+def _load_index(lookup_csv: Path):
+    # Si hay una versión compilada (.bin) se usa vía mmap; si quedó vieja
+    # respecto al CSV (hash distinto) se recompila. Si no, se parsea el CSV.
+    from .lookup_compiled import open_compiled_lookup
+
+    compiled = open_compiled_lookup(lookup_csv)
+    if compiled is not None:
+        return compiled
+    return parse_lookup_csv(lookup_csv)
+
+
+def _publish(key: str, sig: Optional[Signature], index: LookupIndex) -> None:
+    # Reemplaza la entrada de `key` (con _LOCK tomado). Un CompiledLookup
+    # reemplazado se cierra (libera su mmap). Si otro hilo lo está leyendo en
+    # este momento, mmap no deja cerrarlo (BufferError) y se libera al soltarlo;
+    # una LayerView (lookup_layers) que lo lea ya cerrado pasa a la versión nueva.
+    old = _CACHE.get(key)
+    _CACHE[key] = (sig, index)
+    if old is not None and old[1] is not index:
+        close = getattr(old[1], "close", None)
+        if close is not None:
+            try:
+                close()
+            except BufferError:
+                pass
+
+
+def get_lookup_index(lookup_csv: Path) -> LookupIndex:
+    """
+    Devuelve el índice (compartido, solo lectura) para `lookup_csv`.
+    Si el archivo no existe devuelve un índice vacío.
+    """
+    key = os.fspath(lookup_csv)
+    if key in _WATCHED:
+        entry = _CACHE.get(key)
+        if entry is not None:
+            return entry[1]
+
+    sig = _signature(lookup_csv)
+    if sig is None:
+        return _EMPTY
+
+    entry = _CACHE.get(key)
+    if entry is not None and entry[0] == sig:
+        return entry[1]
+
+    with _LOCK:
+        entry = _CACHE.get(key)
+        if entry is not None and entry[0] == sig:
+            return entry[1]
+        index = _load_index(Path(lookup_csv))
+        _publish(key, sig, index)
+        return index
+
+
+# -- recarga explícita (LookupWatcher) ------------------------------------------
+
+Stamp = Tuple[Optional[Signature], Optional[Signature]]
+
+
+def lookup_stamp(lookup_csv: Path) -> Stamp:
+    """(firma del CSV, firma de su forma compilada): cambia si cambia cualquiera de los dos."""
+    from .lookup_compiled import compiled_path_for
+
+    return _signature(lookup_csv), _signature(compiled_path_for(Path(lookup_csv)))
+
+
+def reload_lookup(lookup_csv: Path) -> Stamp:
+    """
+    Reconstruye el índice de `lookup_csv` y lo publica de una vez (fuera de la
+    ruta caliente: las llamadas en curso ven el índice viejo o el nuevo completo).
+    Devuelve el stamp con el que quedó publicado; la firma del .bin se toma
+    después de cargar, porque cargar puede haberlo recompilado.
+    """
+    lookup_csv = Path(lookup_csv)
+    sig = _signature(lookup_csv)
+    index = _load_index(lookup_csv) if sig is not None else _EMPTY
+    with _LOCK:
+        _publish(os.fspath(lookup_csv), sig, index)
+    return sig, lookup_stamp(lookup_csv)[1]
+
+
+def watch_lookup(lookup_csv: Path) -> None:
+    """Marca `lookup_csv` como vigilado: get_lookup_index deja de hacer stat y sirve lo publicado."""
+    key = os.fspath(lookup_csv)
+    with _LOCK:
+        _WATCHED[key] = _WATCHED.get(key, 0) + 1
+
+
+def unwatch_lookup(lookup_csv: Path) -> None:
+    """Deshace un watch_lookup; con el último, la ruta caliente vuelve a comprobar la firma."""
+    key = os.fspath(lookup_csv)
+    with _LOCK:
+        n = _WATCHED.get(key, 0) - 1
+        if n > 0:
+            _WATCHED[key] = n
+        else:
+            _WATCHED.pop(key, None)
+
+
+def is_watched(lookup_csv: Path) -> bool:
+    return os.fspath(lookup_csv) in _WATCHED
+
+
+def warm_lookups(lookups_dir: Path) -> int:
+    """Precarga los índices (y su fusión por capas) de `lookups_dir`. Devuelve cuántos años tiene."""
+    from .lookup_layers import default_layers, merged_lookup_index
+
+    return len(merged_lookup_index(default_layers(Path(lookups_dir))))
+
+
+def clear_lookup_cache() -> None:
+    """Olvida todos los índices cargados (la próxima consulta vuelve a leer el CSV)."""
+    with _LOCK:
+        _CACHE.clear()
@@ -0,0 +1,222 @@
+﻿from __future__ import annotations
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .lookup_cache import iter_lookup_rows
+
+# Formato binario de year_mewa_parkha (todo little-endian):
+#   cabecera (80 bytes): magic, versión, tamaño de registro, año mínimo,
+#                        nº de años cubiertos, nº de años con datos,
+#                        sha256 del CSV de origen, offset y nº de strings,
+#                        tamaño y mtime_ns del CSV de origen al compilar
+#   registros: uno por año en [año mínimo, año mínimo + cubiertos), 6 bytes:
+#              mewa u8 (0 = sin dato), relleno, parkha u16, notes u16 (id de string; 0xFFFF = sin dato)
+#   tabla de strings: (n + 1) offsets u32 relativos + blob utf-8
+# Se lee con mmap + struct.unpack_from: sin parseo ni copias al abrir.
+# Al abrir, si el CSV tiene el mismo tamaño y mtime_ns que al compilar no se
+# relee; solo si difieren se compara el sha256 (un touch no obliga a recompilar).
+
+MAGIC = b"TSULKP1\0"
+VERSION = 2
+COMPILED_SUFFIX = ".bin"
+
+_HEADER = struct.Struct("<8sHHiII32sIIQq")
+_RECORD = struct.Struct("<BxHH")
+_NO_STRING = 0xFFFF
+
+
+def compiled_path_for(lookup_csv: Path) -> Path:
+    return Path(lookup_csv).with_suffix(COMPILED_SUFFIX)
+
+
+def _sha256_file(path: Path) -> bytes:
+    h = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+def compile_lookup(lookup_csv: Path, out_path: Path | None = None, errors: Optional[List[str]] = None) -> Path:
+    """Compila el CSV de lookups a formato binario. Devuelve la ruta escrita.
+
+    Las filas descartadas (ver iter_lookup_rows) se agregan a `errors` si se pasa.
+    """
+    lookup_csv = Path(lookup_csv)
+    out_path = Path(out_path) if out_path is not None else compiled_path_for(lookup_csv)
+    # stat antes de leer: si el CSV cambia mientras tanto, la firma guardada
+    # queda vieja y el próximo open vuelve a comprobar el hash
+    st = os.stat(lookup_csv)
+    digest = _sha256_file(lookup_csv)
+
+    strings: List[str] = []
+    string_ids: Dict[str, int] = {}
+
+    def sid(value: Optional[str]) -> int:
+        if not value:
+            return _NO_STRING
+        i = string_ids.get(value)
+        if i is None:
+            i = string_ids[value] = len(strings)
+            strings.append(value)
+            if i >= _NO_STRING:
+                raise ValueError(f"{lookup_csv}: demasiados strings distintos para el formato compilado")
+        return i
+
+    rows = {}
+    for y, mewa, parkha, notes in iter_lookup_rows(lookup_csv, errors):
+        if mewa is not None and not 1 <= mewa <= 255:
+            raise ValueError(f"{lookup_csv}: mewa fuera de rango para el formato compilado: {y} -> {mewa}")
+        rows[y] = (mewa or 0, sid(parkha), sid(notes))
+
+    year_min = min(rows) if rows else 0
+    span = (max(rows) - year_min + 1) if rows else 0
+
+    records = bytearray(_RECORD.pack(0, _NO_STRING, _NO_STRING) * span)
+    for y, rec in rows.items():
+        _RECORD.pack_into(records, (y - year_min) * _RECORD.size, *rec)
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = [0]
+    for b in encoded:
+        offsets.append(offsets[-1] + len(b))
+    strings_offset = _HEADER.size + len(records)
+
+    header = _HEADER.pack(
+        MAGIC, VERSION, _RECORD.size, year_min, span, len(rows), digest, strings_offset, len(strings),
+        st.st_size, st.st_mtime_ns,
+    )
+
+    # Escritura atómica: temporal en el mismo directorio + os.replace
+    fd, tmp = tempfile.mkstemp(prefix=out_path.name, dir=out_path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(records)
+            f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+            f.write(b"".join(encoded))
+        os.replace(tmp, out_path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    return out_path
+
+
+class CompiledLookup(Mapping):
+    """
+    Vista de solo lectura (mmap) sobre un lookup compilado: año -> (mewa, parkha).
+    Misma interfaz que el dict que produce parse_lookup_csv.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < _HEADER.size or self._mm[:len(MAGIC)] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{self.path}: no es un lookup compilado")
+        (
+            magic, version, rec_size, year_min, span, present, digest, str_off, str_count, src_size, src_mtime_ns,
+        ) = _HEADER.unpack_from(self._mm, 0)
+        if version != VERSION or rec_size != _RECORD.size:
+            self._mm.close()
+            raise ValueError(f"{self.path}: no es un lookup compilado compatible")
+        self.source_sha256 = digest
+        self.source_signature = (src_mtime_ns, src_size)  # como lookup_cache.Signature
+        self._year_min = year_min
+        self._span = span
+        self._present = present
+        self._str_offsets = struct.unpack_from(f"<{str_count + 1}I", self._mm, str_off)
+        self._str_base = str_off + 4 * (str_count + 1)
+        self._strings: Dict[int, str] = {}
+        self._keys: Optional[Tuple[int, ...]] = None
+
+    def _string(self, i: int) -> Optional[str]:
+        if i == _NO_STRING:
+            return None
+        s = self._strings.get(i)
+        if s is None:
+            a, b = self._str_offsets[i], self._str_offsets[i + 1]
+            s = self._strings[i] = str(self._mm[self._str_base + a:self._str_base + b], "utf-8")
+        return s
+
+    def _record(self, year: int):
+        i = year - self._year_min
+        if not 0 <= i < self._span:
+            return None
+        mewa, parkha, notes = _RECORD.unpack_from(self._mm, _HEADER.size + i * _RECORD.size)
+        if mewa == 0 and parkha == _NO_STRING:
+            return None
+        return mewa, parkha, notes
+
+    def get(self, year: int, default=None):
+        rec = self._record(year)
+        if rec is None:
+            return default
+        return (rec[0] or None), self._string(rec[1])
+
+    def __getitem__(self, year: int) -> Tuple[Optional[int], Optional[str]]:
+        value = self.get(year)
+        if value is None:
+            raise KeyError(year)
+        return value
+
+    def __contains__(self, year) -> bool:
+        try:
+            return self._record(year) is not None
+        except TypeError:
+            return False
+
+    def __len__(self) -> int:
+        return self._present
+
+    def __iter__(self) -> Iterator[int]:
+        if self._keys is None:
+            self._keys = tuple(
+                y for y in range(self._year_min, self._year_min + self._span) if self._record(y) is not None
+            )
+        return iter(self._keys)
+
+    def notes(self, year: int) -> Optional[str]:
+        rec = self._record(year)
+        return None if rec is None else self._string(rec[2])
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+def open_compiled_lookup(lookup_csv: Path) -> Optional[CompiledLookup]:
+    """
+    Abre la versión compilada de `lookup_csv` si existe. Si el CSV cambió desde
+    la compilación (firma distinta y hash distinto) la recompila; si no se puede
+    (p.ej. sin permisos) devuelve None y el llamador parsea el CSV.
+    """
+    lookup_csv = Path(lookup_csv)
+    bin_path = compiled_path_for(lookup_csv)
+    if not bin_path.exists():
+        return None
+    try:
+        compiled = CompiledLookup(bin_path)
+    except (OSError, ValueError):
+        compiled = None
+    if compiled is not None:
+        st = os.stat(lookup_csv)
+        if compiled.source_signature == (st.st_mtime_ns, st.st_size):
+            return compiled
+        if compiled.source_sha256 == _sha256_file(lookup_csv):
+            return compiled
+        compiled.close()
+    try:
+        compile_lookup(lookup_csv, bin_path)
+        return CompiledLookup(bin_path)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,150 @@
+﻿from __future__ import annotations
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+from .lookup_cache import LOOKUP_FILENAME, get_lookup_index
+
+# Resolución por capas de mewa/parkha: una pila ordenada de tablas (la primera
+# gana) sobre la base algorítmica. Las capas se fusionan en un único índice
+# año -> (mewa, parkha, capa_mewa, capa_parkha), así que resolver un año sigue
+# siendo O(1) y la procedencia de cada campo queda registrada sin otra pasada.
+# La fusión es por fila: la primera capa que tiene el año aporta su fila entera
+# (un mewa y una parkha de filas distintas no se mezclan); el campo que esa
+# fila deja vacío lo completa el algoritmo. Si solo una capa tiene datos (el caso
+# normal: solo la tabla validada) no se fusiona nada: LayerView la sirve tal cual,
+# y un lookup compilado sigue leyéndose del mmap sin decodificarse entero.
+
+ALGORITHM = "algorithm"
+LOCAL_LAYER = "local"
+VALIDATED_LAYER = "validated"
+
+MergedRow = Tuple[Optional[int], Optional[str], Optional[str], Optional[str]]
+
+
+@dataclass(frozen=True)
+class LookupLayer:
+    name: str
+    path: Path
+
+
+@lru_cache(maxsize=64)
+def default_layers(lookups_dir: Path, tradition: str | None = None) -> Tuple[LookupLayer, ...]:
+    """
+    Pila por defecto para un directorio de lookups, de mayor a menor precedencia:
+      local      -> year_mewa_parkha.local.csv (overrides locales)
+      <tradición> -> year_mewa_parkha.<tradición>.csv (si se pide una)
+      validated  -> year_mewa_parkha.csv (tabla validada)
+    Archivos inexistentes cuentan como capas vacías.
+    """
+    lookups_dir = Path(lookups_dir)
+    stem = Path(LOOKUP_FILENAME).stem
+    layers = [LookupLayer(LOCAL_LAYER, lookups_dir / f"{stem}.{LOCAL_LAYER}.csv")]
+    if tradition:
+        layers.append(LookupLayer(tradition, lookups_dir / f"{stem}.{tradition}.csv"))
+    layers.append(LookupLayer(VALIDATED_LAYER, lookups_dir / LOOKUP_FILENAME))
+    return tuple(layers)
+
+
+def merge_layers(indexes: Sequence[Tuple[str, object]]) -> Dict[int, MergedRow]:
+    """Fusiona índices (nombre, año -> (mewa, parkha)) fila a fila; el primero que tiene el año gana."""
+    merged: Dict[int, MergedRow] = {}
+    for name, index in indexes:
+        for year, (mewa, parkha) in index.items():
+            if year not in merged:
+                merged[year] = (
+                    mewa,
+                    parkha,
+                    name if mewa is not None else None,
+                    name if parkha is not None else None,
+                )
+    return merged
+
+
+class LayerView(Mapping):
+    """Una capa servida como índice fusionado, sin copiarla: año -> MergedRow con el nombre de la capa."""
+
+    __slots__ = ("layer", "index")
+
+    def __init__(self, layer: LookupLayer, index) -> None:
+        self.layer = layer
+        self.index = index
+
+    def get(self, year: int, default=None):
+        try:
+            row = self.index.get(year)
+        except ValueError:
+            # Se publicó otra versión de la capa (y se cerró este mmap) durante la
+            # lectura: se lee la vigente, como haría la próxima llamada
+            row = get_lookup_index(self.layer.path).get(year)
+        if row is None:
+            return default
+        mewa, parkha = row
+        name = self.layer.name
+        return mewa, parkha, name if mewa is not None else None, name if parkha is not None else None
+
+    def __getitem__(self, year: int) -> MergedRow:
+        row = self.get(year)
+        if row is None:
+            raise KeyError(year)
+        return row
+
+    def __contains__(self, year) -> bool:
+        try:
+            return self.get(year) is not None
+        except TypeError:
+            return False
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.index)
+
+
+_LOCK = threading.Lock()
+# Pilas recordadas como máximo (sale la usada hace más tiempo): un proceso que recorre muchos directorios
+# de lookups no acumula índices fusionados sin límite.
+MAX_MERGED = 64
+# pila -> (índices por capa usados en la fusión, índice fusionado). Los índices
+# por capa hacen de sello: get_lookup_index devuelve otro objeto cuando cambia
+# la firma del archivo, y entonces la entrada se reemplaza (no se acumula).
+_MERGED: "OrderedDict[Tuple[LookupLayer, ...], Tuple[Tuple[object, ...], Mapping]]" = OrderedDict()
+
+
+def merged_lookup_index(layers: Sequence[LookupLayer]) -> "Mapping[int, MergedRow]":
+    """
+    Índice fusionado (compartido, solo lectura) para `layers`. Se rehace solo si
+    alguna capa cambió (get_lookup_index devuelve otro objeto).
+    """
+    layers = tuple(layers)
+    parts = tuple(get_lookup_index(layer.path) for layer in layers)
+
+    entry = _MERGED.get(layers)
+    if entry is not None and all(a is b for a, b in zip(entry[0], parts)):
+        return entry[1]
+
+    with _LOCK:
+        entry = _MERGED.get(layers)
+        if entry is not None and all(a is b for a, b in zip(entry[0], parts)):
+            _MERGED.move_to_end(layers)
+            return entry[1]
+        filled = [(layer, part) for layer, part in zip(layers, parts) if part]
+        if len(filled) == 1:
+            merged = LayerView(*filled[0])
+        else:
+            merged = merge_layers([(layer.name, part) for layer, part in filled])
+        _MERGED[layers] = (parts, merged)
+        _MERGED.move_to_end(layers)
+        while len(_MERGED) > MAX_MERGED:
+            _MERGED.popitem(last=False)
+        return merged
+
+
+def clear_merged_cache() -> None:
+    with _LOCK:
+        _MERGED.clear()
@@ -0,0 +1,99 @@
+﻿from __future__ import annotations
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Sequence
+
+from . import lookup_cache
+from .lookup_layers import LookupLayer, default_layers, merged_lookup_index
+
+# Recarga en caliente de lookups para procesos de larga vida.
+# Un hilo vigila (stat barato) los CSV de las capas y su forma compilada;
+# si algo cambia, reconstruye el índice fuera de la ruta caliente y lo publica
+# con una sola asignación (atómica): una llamada en curso ve la tabla vieja
+# completa o la nueva completa, nunca una a medio construir
+# (lookup_cache.reload_lookup).
+
+_log = logging.getLogger(__name__)
+
+
+class LookupWatcher:
+    def __init__(
+        self,
+        lookups_dir: Path | None = None,
+        *,
+        layers: Sequence[LookupLayer] | None = None,
+        interval: float = 1.0,
+        on_reload: Callable[[Sequence[str]], None] | None = None,
+    ) -> None:
+        if layers is None:
+            if lookups_dir is None:
+                raise ValueError("LookupWatcher necesita lookups_dir o layers")
+            layers = default_layers(Path(lookups_dir))
+        self.layers = tuple(layers)
+        self.interval = interval
+        self.on_reload = on_reload
+        self._stamps: Dict[str, lookup_cache.Stamp] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def poll_once(self, *, notify: bool = True) -> bool:
+        """Revisa una vez; devuelve True si recargó algo."""
+        changed = []
+        for layer in self.layers:
+            key = os.fspath(layer.path)
+            if self._stamps.get(key) != lookup_cache.lookup_stamp(layer.path):
+                self._stamps[key] = lookup_cache.reload_lookup(layer.path)
+                changed.append(key)
+        if changed:
+            # También el índice fusionado, para que ninguna llamada pague la fusión
+            merged_lookup_index(self.layers)
+            if notify and self.on_reload is not None:
+                # Un on_reload que falla no deshace la recarga: los stamps nuevos
+                # se quedan y no se recarga en cada ciclo
+                try:
+                    self.on_reload(changed)
+                except Exception:
+                    _log.exception("on_reload falló tras recargar %s", ", ".join(changed))
+        return bool(changed)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll_once()
+            except Exception:
+                # Un CSV a medio escribir puede no parsear: se reintenta en el próximo ciclo
+                self._stamps.clear()
+
+    def start(self) -> "LookupWatcher":
+        if self._thread is not None:
+            return self
+        # Carga inicial antes de marcar las claves como vigiladas
+        self.poll_once(notify=False)
+        for layer in self.layers:
+            lookup_cache.watch_lookup(layer.path)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="tsurphu-lookup-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        for layer in self.layers:
+            lookup_cache.unwatch_lookup(layer.path)
+
+    def __enter__(self) -> "LookupWatcher":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def watch_lookups(lookups_dir: Path, *, interval: float = 1.0) -> LookupWatcher:
+    """Arranca un vigilante para las capas por defecto de `lookups_dir`."""
+    return LookupWatcher(lookups_dir, interval=interval).start()
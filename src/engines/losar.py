@@ -0,0 +1,116 @@
+﻿from __future__ import annotations
+import datetime as dt
+import threading
+from array import array
+from bisect import bisect_right
+from fractions import Fraction
+
+# Losar (año nuevo tibetano) según el calendario Phugpa, aritmética de
+# Janson ("Tibetan Calendar Mathematics"), época 806 (M0 = 3).
+# Fechas en calendario gregoriano proléptico (datetime.date).
+
+LOSAR_FIRST_YEAR = 1000
+LOSAR_LAST_YEAR = 2200
+
+_M0 = 2015501 + Fraction(4783, 5656)   # fecha media (JD) de la época
+_M1 = Fraction(167025, 5656)           # mes lunar medio (días)
+_S0 = Fraction(743, 804)               # sol medio en la época (fracción de círculo)
+_S1 = Fraction(65, 804)                # avance del sol medio por mes lunar
+_A0 = Fraction(475, 3528)              # anomalía lunar en la época
+_A1 = Fraction(253, 3528)              # avance de la anomalía por mes lunar
+_A2 = Fraction(1, 28)                  # avance de la anomalía por día lunar
+
+_MOON_TAB = (0, 5, 10, 15, 19, 22, 24, 25)
+_SUN_TAB = (0, 6, 10, 11)
+
+# JDN de 0001-01-01 (gregoriano proléptico) = 1721426
+_JDN_ORDINAL_OFFSET = 1721425
+
+
+def _moon_tab(i: int) -> int:
+    i %= 28
+    if i <= 7:
+        return _MOON_TAB[i]
+    if i <= 14:
+        return _MOON_TAB[14 - i]
+    return -_moon_tab(i - 14)
+
+
+def _sun_tab(i: int) -> int:
+    i %= 12
+    if i <= 3:
+        return _SUN_TAB[i]
+    if i <= 6:
+        return _SUN_TAB[6 - i]
+    return -_sun_tab(i - 6)
+
+
+def _interpolate(tab, x: Fraction) -> Fraction:
+    i = x.numerator // x.denominator
+    return tab(i) + (x - i) * (tab(i + 1) - tab(i))
+
+
+def _month_end_jdn(n: int) -> int:
+    """JDN del último día (día lunar 30) del mes verdadero n."""
+    mean_date = (n + 1) * _M1 + _M0
+    mean_sun = (n + 1) * _S1 + _S0
+    anomaly = n * _A1 + 30 * _A2 + _A0
+    moon_equ = _interpolate(_moon_tab, 28 * anomaly)
+    sun_equ = _interpolate(_sun_tab, 12 * (mean_sun - Fraction(1, 4)))
+    true_date = mean_date + moon_equ / 60 - sun_equ / 60
+    return true_date.numerator // true_date.denominator
+
+
+def _first_month(year: int) -> int:
+    """Número de mes verdadero del primer mes del año (el intercalar, si lo hay)."""
+    x = 67 * (12 * (year - 806) + 1 - 3) + 78
+    n = x // 65
+    # Índice de intercalación 48/49 (Phugpa): el mes 1 va doble y el intercalar va primero
+    if x % 65 < 2:
+        n -= 1
+    return n
+
+
+def compute_losar(year: int) -> dt.date:
+    """Calcula Losar de `year` (sin usar la tabla)."""
+    jdn = _month_end_jdn(_first_month(year) - 1) + 1
+    return dt.date.fromordinal(jdn - _JDN_ORDINAL_OFFSET)
+
+
+_TABLE_LOCK = threading.Lock()
+_TABLE: array | None = None
+
+
+def losar_table() -> array:
+    """
+    Ordinales (date.toordinal) de Losar para LOSAR_FIRST_YEAR..LOSAR_LAST_YEAR + 1,
+    ordenados. Se construye una vez por proceso.
+    """
+    global _TABLE
+    table = _TABLE
+    if table is None:
+        with _TABLE_LOCK:
+            if _TABLE is None:
+                _TABLE = array("l", (compute_losar(y).toordinal() for y in range(LOSAR_FIRST_YEAR, LOSAR_LAST_YEAR + 2)))
+            table = _TABLE
+    return table
+
+
+def losar_date(year: int) -> dt.date:
+    if LOSAR_FIRST_YEAR <= year <= LOSAR_LAST_YEAR + 1:
+        return dt.date.fromordinal(losar_table()[year - LOSAR_FIRST_YEAR])
+    return compute_losar(year)
+
+
+def tibetan_year_number(date: dt.date) -> int:
+    """
+    Año tibetano (numerado como el año gregoriano en que empieza) al que pertenece `date`.
+    Búsqueda binaria en la tabla de Losar: O(log n), sin recalcular el calendario.
+    Fuera de la tabla se calcula Losar del año de `date` (como losar_date).
+    """
+    table = losar_table()
+    ordinal = date.toordinal()
+    i = bisect_right(table, ordinal) - 1
+    if i < 0 or i >= len(table) - 1:
+        return date.year if date >= compute_losar(date.year) else date.year - 1
+    return LOSAR_FIRST_YEAR + i
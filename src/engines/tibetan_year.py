@@ -1,17 +1,30 @@
 ﻿from __future__ import annotations
+import datetime as dt
 from dataclasses import dataclass
 from pathlib import Path
-import csv
-from typing import Optional, Tuple
+from typing import Any, ClassVar, Dict, NamedTuple, Optional, Sequence, Tuple
 
-from .year_mewa_parkha import mewa_for_gregorian_year, parkha_for_mewa, year_polarity_from_stem_index
+from .losar import tibetan_year_number
+from .lookup_cache import get_lookup_index
+from .lookup_layers import ALGORITHM, LookupLayer, default_layers, merged_lookup_index
+from .year_mewa_parkha import (
+    mewa_for_gregorian_year,
+    parkha_for_mewa,
+    parkha_index,
+    year_polarity_from_stem_index,
+)
 
 # Base estándar sexagenaria: 1984 = Wood Rat
 _STEMS = ["Wood","Wood","Fire","Fire","Earth","Earth","Metal","Metal","Water","Water"]
 _ANIMALS = ["Rat","Ox","Tiger","Rabbit","Dragon","Snake","Horse","Sheep","Monkey","Bird","Dog","Pig"]
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TibetanYear:
+    """
+    Atributos de un año tibetano. Dataclass inmutable con __slots__: sin
+    __dict__ por instancia, y element/animal/parkha apuntan a los strings
+    compartidos de las tablas (no se duplican por instancia).
+    """
     gregorian_year: int
     element: str
     animal: str
@@ -20,50 +33,127 @@ class TibetanYear:
     mewa: Optional[int] = None
     parkha: Optional[str] = None
 
+    # Orden de campos para serializers/formats (como un NamedTuple)
+    _fields: ClassVar[Tuple[str, ...]] = (
+        "gregorian_year", "element", "animal", "stem_index", "branch_index", "mewa", "parkha",
+    )
+
+    def _asdict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self._fields}
+
 def sexagenary_from_gregorian(year: int) -> Tuple[str, str, int, int]:
     delta = year - 1984
     stem_i = delta % 10
     branch_i = delta % 12
     return _STEMS[stem_i], _ANIMALS[branch_i], stem_i, branch_i
 
-def lookup_mewa_parkha(year: int, *, lookup_csv: Path) -> Tuple[Optional[int], Optional[str]]:
-    if not lookup_csv.exists():
-        return None, None
-    with lookup_csv.open("r", encoding="utf-8-sig", newline="") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            try:
-                y = int((row.get("year") or "").strip())
-            except Exception:
-                continue
-            if y == year:
-                mewa = (row.get("mewa") or "").strip() or None
-                parkha = (row.get("parkha") or "").strip() or None
-                return (int(mewa) if mewa is not None else None), parkha
-    return None, None
-
-def tibetan_year(year: int, *, lookups_dir: Path | None = None) -> TibetanYear:
-    element, animal, stem_i, branch_i = sexagenary_from_gregorian(year)
-
-    # Preferir lookup (si existe y está poblado)
-    mewa = parkha = None
-    if lookups_dir is not None:
-        csv_path = lookups_dir / "year_mewa_parkha.csv"
-        mewa, parkha = lookup_mewa_parkha(year, lookup_csv=csv_path)
-
-    # Si no hay lookup, usamos algoritmo base (para tests/pipeline)
-    if mewa is None:
+# Ciclo maestro: sexagenario (60) x mewa descendente (9) se repite cada 180 años.
+# Tabla inmutable construida una vez al importar (con las funciones de referencia),
+# compartida en solo lectura entre hilos y procesos (fork la hereda sin recalcular).
+CYCLE_YEARS = 180
+
+class CycleEntry(NamedTuple):
+    element: str
+    animal: str
+    stem_index: int
+    branch_index: int
+    mewa: int
+    parkha: str
+
+def _build_cycle_table() -> Tuple[CycleEntry, ...]:
+    table = []
+    for year in range(1984, 1984 + CYCLE_YEARS):
+        element, animal, stem_i, branch_i = sexagenary_from_gregorian(year)
         mewa = mewa_for_gregorian_year(year)
-    if parkha is None:
         pol = year_polarity_from_stem_index(stem_i)
-        parkha = parkha_for_mewa(mewa, polarity=pol).code
-
-    return TibetanYear(
-        gregorian_year=year,
-        element=element,
-        animal=animal,
-        stem_index=stem_i,
-        branch_index=branch_i,
-        mewa=mewa,
-        parkha=parkha,
-    )
+        table.append(CycleEntry(element, animal, stem_i, branch_i, mewa, parkha_for_mewa(mewa, polarity=pol).code))
+    return tuple(table)
+
+CYCLE_TABLE = _build_cycle_table()
+
+# Columnas del ciclo como bytes (inmutables) para los caminos batch
+CYCLE_STEM = bytes(e.stem_index for e in CYCLE_TABLE)
+CYCLE_BRANCH = bytes(e.branch_index for e in CYCLE_TABLE)
+CYCLE_MEWA = bytes(e.mewa for e in CYCLE_TABLE)
+CYCLE_PARKHA = bytes(parkha_index(e.parkha) for e in CYCLE_TABLE)
+
+def cycle_entry(year: int) -> CycleEntry:
+    return CYCLE_TABLE[(year - 1984) % CYCLE_YEARS]
+
+def lookup_mewa_parkha(year: int, *, lookup_csv: Path) -> Tuple[Optional[int], Optional[str]]:
+    # Índice cargado una vez por proceso (se recarga si cambia el CSV)
+    return get_lookup_index(lookup_csv).get(year, (None, None))
+
+def _lookup_index_for(lookups_dir: Path | None, layers: Sequence[LookupLayer] | None):
+    if layers is None:
+        if lookups_dir is None:
+            return None
+        layers = default_layers(Path(lookups_dir))
+    return merged_lookup_index(layers)
+
+def _override(stem_index: int, row) -> Tuple[Optional[int], Optional[str]]:
+    """
+    (mewa, parkha) que impone una fila de lookups; None = se queda el del algoritmo.
+    Si la fila solo trae mewa, la parkha se deriva de ese mewa (no del algorítmico).
+    Regla única para tibetan_year() y los caminos batch.
+    """
+    o_mewa, o_parkha = row[0], row[1]
+    if o_mewa is not None and o_parkha is None:
+        o_parkha = parkha_for_mewa(o_mewa, polarity=year_polarity_from_stem_index(stem_index)).code
+    return o_mewa, o_parkha
+
+def _tibetan_year_from_index(year: int, index) -> TibetanYear:
+    e = CYCLE_TABLE[(year - 1984) % CYCLE_YEARS]
+    mewa, parkha = e.mewa, e.parkha
+
+    # Preferir lookup (si existe y está poblado); solo se parchean los años presentes
+    row = index.get(year) if index else None
+    if row is not None:
+        o_mewa, o_parkha = _override(e.stem_index, row)
+        if o_mewa is not None:
+            mewa = o_mewa
+        if o_parkha is not None:
+            parkha = o_parkha
+
+    return TibetanYear(year, e.element, e.animal, e.stem_index, e.branch_index, mewa, parkha)
+
+def tibetan_year(
+    year: int,
+    *,
+    lookups_dir: Path | None = None,
+    layers: Sequence[LookupLayer] | None = None,
+) -> TibetanYear:
+    """
+    Atributos del año. Con `lookups_dir` (o una pila explícita `layers`) mewa/parkha
+    se resuelven por capas (ver lookup_layers); lo que ninguna capa da sale del algoritmo.
+    """
+    return _tibetan_year_from_index(year, _lookup_index_for(lookups_dir, layers))
+
+def resolve_tibetan_year(
+    year: int,
+    *,
+    lookups_dir: Path | None = None,
+    layers: Sequence[LookupLayer] | None = None,
+) -> Tuple[TibetanYear, Dict[str, str]]:
+    """Como tibetan_year(), y además la capa que aportó cada campo (procedencia)."""
+    index = _lookup_index_for(lookups_dir, layers)
+    row = index.get(year) if index else None
+    provenance = {
+        "element": ALGORITHM,
+        "animal": ALGORITHM,
+        "mewa": (row[2] if row is not None else None) or ALGORITHM,
+        "parkha": (row[3] if row is not None else None) or ALGORITHM,
+    }
+    return _tibetan_year_from_index(year, index), provenance
+
+def tibetan_year_for_date(
+    date: dt.date,
+    *,
+    lookups_dir: Path | None = None,
+    layers: Sequence[LookupLayer] | None = None,
+) -> TibetanYear:
+    """
+    Como tibetan_year(), pero a partir de una fecha: ajusta por Losar
+    (enero/febrero antes de Losar pertenecen al año tibetano anterior).
+    """
+    return tibetan_year(tibetan_year_number(date), lookups_dir=lookups_dir, layers=layers)
@@ -0,0 +1,200 @@
+﻿from __future__ import annotations
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional, Sequence, Tuple
+
+from .lookup_layers import LookupLayer
+from .tibetan_year import (
+    _ANIMALS,
+    _STEMS,
+    CYCLE_BRANCH,
+    CYCLE_MEWA,
+    CYCLE_PARKHA,
+    CYCLE_STEM,
+    CYCLE_YEARS,
+    TibetanYear,
+    _lookup_index_for,
+    _override,
+    _tibetan_year_from_index,
+)
+from .year_mewa_parkha import parkha_index, parkha_names
+
+try:  # NumPy es opcional: si no está usamos array.array
+    import numpy as _np
+except ImportError:  # pragma: no cover - depende del entorno
+    _np = None
+
+
+@dataclass(frozen=True)
+class TibetanYearColumns:
+    """
+    Resultado columnar (struct-of-arrays) de `tibetan_years`.
+    Cada columna es un ndarray (NumPy) o un array.array (fallback) de la misma longitud:
+      gregorian_year (int32), stem_index, branch_index, mewa, parkha (uint8).
+    `parkha` guarda índices en `parkha_names`.
+    """
+    gregorian_year: Any
+    stem_index: Any
+    branch_index: Any
+    mewa: Any
+    parkha: Any
+    parkha_names: Tuple[str, ...]
+
+    def __len__(self) -> int:
+        return len(self.gregorian_year)
+
+    def element(self, i: int) -> str:
+        return _STEMS[self.stem_index[i]]
+
+    def animal(self, i: int) -> str:
+        return _ANIMALS[self.branch_index[i]]
+
+    def row(self, i: int) -> TibetanYear:
+        """Materializa una fila como TibetanYear (para casos puntuales)."""
+        return TibetanYear(
+            int(self.gregorian_year[i]),
+            self.element(i),
+            self.animal(i),
+            int(self.stem_index[i]),
+            int(self.branch_index[i]),
+            int(self.mewa[i]),
+            self.parkha_names[self.parkha[i]],
+        )
+
+    def rows(self) -> Iterator[TibetanYear]:
+        for i in range(len(self)):
+            yield self.row(i)
+
+
+def _overrides(lookups_dir: Optional[Path], layers: Optional[Sequence[LookupLayer]]):
+    return _lookup_index_for(lookups_dir, layers) or {}
+
+
+def _resolve_override(stem_i: int, mewa: int, parkha: int, row) -> Tuple[int, int]:
+    # Las reglas de tibetan_year() (_override), sobre la parkha como índice de parkha_names
+    o_mewa, o_parkha = _override(stem_i, row)
+    return (mewa if o_mewa is None else o_mewa), (parkha if o_parkha is None else parkha_index(o_parkha))
+
+
+def _tibetan_years_numpy(years: Any, overrides) -> TibetanYearColumns:
+    if isinstance(years, range):
+        gy = _np.arange(years.start, years.stop, years.step, dtype=_np.int64)
+    elif isinstance(years, (_np.ndarray, Sequence)):
+        gy = _np.asarray(years, dtype=_np.int64).ravel()
+    else:
+        # Iterables de una pasada (generadores, etc.): asarray no los acepta
+        gy = _np.fromiter(years, dtype=_np.int64)
+    idx = (gy - 1984) % CYCLE_YEARS
+    stem = _np.frombuffer(CYCLE_STEM, dtype=_np.uint8)[idx]
+    branch = _np.frombuffer(CYCLE_BRANCH, dtype=_np.uint8)[idx]
+    mewa = _np.frombuffer(CYCLE_MEWA, dtype=_np.uint8)[idx]
+    parkha = _np.frombuffer(CYCLE_PARKHA, dtype=_np.uint8)[idx]
+
+    if overrides:
+        hit = _np.isin(gy, _np.fromiter(overrides.keys(), dtype=_np.int64, count=len(overrides)))
+        for i in _np.flatnonzero(hit):
+            y = int(gy[i])
+            mewa[i], parkha[i] = _resolve_override(int(stem[i]), int(mewa[i]), int(parkha[i]), overrides[y])
+
+    return TibetanYearColumns(
+        gregorian_year=gy.astype(_np.int32),
+        stem_index=stem,
+        branch_index=branch,
+        mewa=mewa,
+        parkha=parkha,
+        parkha_names=parkha_names(),
+    )
+
+
+def _tibetan_years_python(years: Iterable[int], overrides) -> TibetanYearColumns:
+    gy = array("i", years)
+    stem = array("B", bytes(len(gy)))
+    branch = array("B", bytes(len(gy)))
+    mewa = array("B", bytes(len(gy)))
+    parkha = array("B", bytes(len(gy)))
+
+    cs, cb, cm, cp = CYCLE_STEM, CYCLE_BRANCH, CYCLE_MEWA, CYCLE_PARKHA
+    for i, y in enumerate(gy):
+        c = (y - 1984) % CYCLE_YEARS
+        stem[i] = cs[c]
+        branch[i] = cb[c]
+        mewa[i] = cm[c]
+        parkha[i] = cp[c]
+
+    # Parchear solo los años presentes en la tabla de overrides
+    if overrides:
+        for i, y in enumerate(gy):
+            row = overrides.get(y)
+            if row is not None:
+                mewa[i], parkha[i] = _resolve_override(stem[i], mewa[i], parkha[i], row)
+
+    return TibetanYearColumns(
+        gregorian_year=gy,
+        stem_index=stem,
+        branch_index=branch,
+        mewa=mewa,
+        parkha=parkha,
+        parkha_names=parkha_names(),
+    )
+
+
+def tibetan_years(
+    years: Iterable[int],
+    *,
+    lookups_dir: Path | None = None,
+    layers: Sequence[LookupLayer] | None = None,
+    backend: str = "auto",
+) -> TibetanYearColumns:
+    """
+    Versión batch de `tibetan_year`: calcula todas las columnas en una pasada.
+    backend: "auto" (NumPy si está instalado), "numpy" o "python".
+    Los overrides de la tabla de lookups se aplican igual que en la versión escalar.
+    """
+    if backend not in ("auto", "numpy", "python"):
+        raise ValueError(f"backend inválido: {backend}")
+    if backend == "numpy" and _np is None:
+        raise RuntimeError("backend 'numpy' pedido pero NumPy no está instalado")
+
+    overrides = _overrides(lookups_dir, layers)
+    if backend == "python" or _np is None:
+        return _tibetan_years_python(years, overrides)
+    return _tibetan_years_numpy(years, overrides)
+
+
+def iter_tibetan_years(
+    start: int,
+    stop: int,
+    step: int = 1,
+    *,
+    lookups_dir: Path | None = None,
+    layers: Sequence[LookupLayer] | None = None,
+) -> Iterator[TibetanYear]:
+    """
+    Genera TibetanYear para range(start, stop, step) de forma perezosa (memoria constante).
+    El índice de lookups se resuelve una sola vez al empezar.
+    """
+    overrides = _overrides(lookups_dir, layers)
+    for year in range(start, stop, step):
+        yield _tibetan_year_from_index(year, overrides)
+
+
+def iter_tibetan_year_chunks(
+    start: int,
+    stop: int,
+    step: int = 1,
+    *,
+    chunk_size: int = 65536,
+    lookups_dir: Path | None = None,
+    layers: Sequence[LookupLayer] | None = None,
+    backend: str = "auto",
+) -> Iterator[TibetanYearColumns]:
+    """
+    Como iter_tibetan_years, pero en bloques columnares de hasta `chunk_size` años
+    (cada bloque es un TibetanYearColumns calculado con tibetan_years).
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size inválido: {chunk_size}")
+    years = range(start, stop, step)
+    for i in range(0, len(years), chunk_size):
+        yield tibetan_years(years[i:i + chunk_size], lookups_dir=lookups_dir, layers=layers, backend=backend)
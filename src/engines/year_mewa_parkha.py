@@ -1,4 +1,5 @@
 ﻿from __future__ import annotations
+import threading
 from dataclasses import dataclass
 
 # Mewa (9 números) ciclo descendente: 1,9,8,7,6,5,4,3,2 (repite)
@@ -14,10 +15,14 @@ def year_polarity_from_stem_index(stem_index: int) -> str:
         return "yang"
     return "yin"
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Parkha:
     code: str
 
+    @property
+    def index(self) -> int:
+        return parkha_index(self.code)
+
 # Mapeo Lo Shu -> trigramas (nombres tibetanos comunes)
 # 1 Kan=Kham, 2 Kun=Khon, 3 Zhen=Zin, 4 Xun=Zon, 6 Qian=Gin, 7 Dui=Dwa, 8 Gen=Khen, 9 Li=Li
 _NUM_TO_PARKHA = {
@@ -31,6 +36,33 @@ _NUM_TO_PARKHA = {
     9: "Li",
 }
 
+# Códigos estables para representaciones columnares: índice -> nombre.
+# Nombres no estándar (p.ej. overrides de una tabla) se registran al final.
+PARKHA_CODES = tuple(_NUM_TO_PARKHA.values())
+_PARKHA_NAMES = list(PARKHA_CODES)
+_PARKHA_INDEX = {name: i for i, name in enumerate(PARKHA_CODES)}
+_PARKHA_LOCK = threading.Lock()
+
+def parkha_index(code: str) -> int:
+    """Índice estable de un código de parkha (registra nombres nuevos)."""
+    i = _PARKHA_INDEX.get(code)
+    if i is None:
+        with _PARKHA_LOCK:
+            i = _PARKHA_INDEX.get(code)
+            if i is None:
+                _PARKHA_NAMES.append(code)
+                i = _PARKHA_INDEX[code] = len(_PARKHA_NAMES) - 1
+    return i
+
+def parkha_names() -> tuple:
+    return tuple(_PARKHA_NAMES)
+
+def parkha_name(index: int) -> str:
+    return _PARKHA_NAMES[index]
+
+# Instancias únicas: parkha_for_mewa no asigna un objeto nuevo por llamada
+_PARKHAS = {code: Parkha(code=code) for code in PARKHA_CODES}
+
 def parkha_for_mewa(mewa: int, *, polarity: str = "yang") -> Parkha:
     """
     Para mewa != 5: mapping directo.
@@ -40,9 +72,9 @@ def parkha_for_mewa(mewa: int, *, polarity: str = "yang") -> Parkha:
     """
     if mewa == 5:
         code = "Gin" if polarity.lower() == "yang" else "Khon"
-        return Parkha(code=code)
+        return _PARKHAS[code]
 
     code = _NUM_TO_PARKHA.get(mewa)
     if not code:
         raise ValueError(f"mewa inválido: {mewa}")
-    return Parkha(code=code)
+    return _PARKHAS[code]
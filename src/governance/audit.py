@@ -0,0 +1,263 @@
+﻿from __future__ import annotations
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+try:  # POSIX only; sin él, un solo escritor encadenado por log
+    import fcntl
+except ImportError:  # pragma: no cover - depende de la plataforma
+    fcntl = None
+
+# Escritor del log de auditoría (JSONL) con group commit.
+# El archivo queda abierto en modo append; los eventos se acumulan en memoria y
+# se escriben juntos cada `batch_size` eventos o cada `flush_ms` milisegundos
+# (lo que ocurra primero). `durability` decide qué garantiza cada grupo:
+#   none  -> solo write() al buffer de Python (llega al SO al cerrar o al llenarse)
+#   flush -> además flush() al SO (sobrevive a un fallo del proceso)
+#   fsync -> además os.fsync() (sobrevive a un fallo del sistema)
+# Al cerrar (o al salir el intérprete, vía atexit) se escribe todo lo pendiente.
+# Con index=True, tras cada grupo se pone al día el índice lateral (audit_index).
+# Con chain=True cada entrada lleva prev_hash y cada `checkpoint_every` entradas
+# se agrega un checkpoint firmado (audit_chain). Las entradas encadenadas se
+# encadenan al escribir el grupo, con un flock exclusivo sobre el log: bajo ese
+# lock se relee la cola (hash, offset, cuenta de checkpoints) si otro escritor
+# la movió, así que varios procesos (o escritores) pueden compartir el log.
+
+DURABILITY = ("none", "flush", "fsync")
+
+_LINE = json.JSONEncoder(ensure_ascii=False).encode  # = json.dumps(entry, ensure_ascii=False)
+
+
+class AuditWriter:
+    def __init__(
+        self,
+        path: Path,
+        *,
+        batch_size: int = 256,
+        flush_ms: float = 50.0,
+        durability: str = "flush",
+        index: bool = False,
+        chain: bool = False,
+        checkpoint_every: int = 1000,
+    ) -> None:
+        if durability not in DURABILITY:
+            raise ValueError(f"durability inválida: {durability} (use {', '.join(DURABILITY)})")
+        self.path = Path(path)
+        self.batch_size = max(1, batch_size)
+        self.flush_ms = flush_ms
+        self.durability = durability
+        self.written = 0
+        self._pending: List[Any] = []  # líneas, o entradas sin encadenar con chain=True
+        self._lock = threading.Lock()
+        self._file = None
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self.chain = chain
+        self.checkpoint_every = max(1, checkpoint_every)
+        # Cola del log tras el último grupo de este escritor (chain); se relee si el
+        # tamaño del archivo ya no es _offset (escribió otro)
+        self._prev: Optional[str] = None  # hash de la última entrada
+        self._offset = 0  # tamaño del log
+        self._last_line = 0  # offset de la línea de la última entrada
+        self._since_checkpoint = 0  # entradas tras el último checkpoint
+        self._index = None
+        if index:
+            from .audit_index import AuditIndex
+
+            self._index = AuditIndex(self.path)
+        atexit.register(self.close)
+
+    # -- escritura ---------------------------------------------------------
+
+    def write(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._append_locked(entry)
+            if len(self._pending) >= self.batch_size:
+                self._commit_locked()
+            elif self._thread is None and self.flush_ms > 0:
+                self._thread = threading.Thread(target=self._run, name="tsurphu-audit-writer", daemon=True)
+                self._thread.start()
+
+    def write_many(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """Escribe `entries` (y lo pendiente) en un solo grupo: un write, un flush/fsync."""
+        with self._lock:
+            for entry in entries:
+                self._append_locked(entry)
+            self._commit_locked()
+
+    def _append_locked(self, entry: Dict[str, Any]) -> None:
+        if self._closed:
+            raise ValueError(f"AuditWriter cerrado: {self.path}")
+        # Con chain, prev_hash se calcula al escribir el grupo (bajo el flock)
+        self._pending.append(dict(entry) if self.chain else _LINE(entry) + "\n")
+
+    def _open(self):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a", encoding="utf-8")
+        return self._file
+
+    def _commit_locked(self) -> None:
+        if not self._pending:
+            return
+        f = self._open()
+        if self.chain:
+            with _exclusive(f):
+                self._write_chained(f)
+        else:
+            f.write("".join(self._pending))
+            if self.durability != "none" or self._index is not None:
+                f.flush()
+                if self.durability == "fsync":
+                    os.fsync(f.fileno())
+        self.written += len(self._pending)
+        self._pending.clear()
+        if self._index is not None:
+            self._index.update()
+
+    def _write_chained(self, f) -> None:
+        # Con el flock del log tomado: encadena lo pendiente tras la cola real del
+        # archivo, lo escribe y lo vuelca antes de soltar el lock (el siguiente
+        # escritor lee esa cola del archivo, no de un buffer de este proceso)
+        from .audit_chain import entries_since_checkpoint, entry_hash, load_key, tail_state, write_checkpoint
+
+        if self._prev is None or os.fstat(f.fileno()).st_size != self._offset:
+            # Primer grupo, o escribió otro: retomar la cadena y la cuenta de
+            # checkpoints del archivo (escritores de vida corta también llegan
+            # a checkpoint_every)
+            self._prev, self._last_line, self._offset = tail_state(self.path)
+            self._since_checkpoint = entries_since_checkpoint(self.path)
+        lines = []
+        for entry in self._pending:
+            entry["prev_hash"] = self._prev
+            self._prev = entry_hash(entry)
+            line = _LINE(entry) + "\n"
+            self._last_line = self._offset
+            self._offset += len(line.encode("utf-8"))
+            lines.append(line)
+        self._since_checkpoint += len(lines)
+        f.write("".join(lines))
+        f.flush()
+        if self.durability == "fsync":
+            os.fsync(f.fileno())
+        if self._since_checkpoint >= self.checkpoint_every:
+            # Solo después de que las entradas que cubre llegaron al archivo
+            write_checkpoint(
+                self.path,
+                offset=self._offset,
+                line_offset=self._last_line,
+                entry_hash=self._prev,
+                key=load_key(self.path, create=True),
+            )
+            self._since_checkpoint = 0
+
+    def flush(self) -> None:
+        """Escribe ya lo pendiente (con la durabilidad configurada)."""
+        with self._lock:
+            self._commit_locked()
+
+    def _run(self) -> None:
+        # Commit por tiempo: lo pendiente nunca espera más de flush_ms
+        while not self._wake.wait(self.flush_ms / 1000.0):
+            self.flush()
+
+    # -- cierre ------------------------------------------------------------
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._commit_locked()
+            if self._file is not None:
+                self._file.flush()
+                if self.durability == "fsync":
+                    os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> "AuditWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+@contextmanager
+def _exclusive(f):
+    # flock exclusivo sobre el log abierto (por descripción de archivo: también
+    # separa dos escritores del mismo proceso)
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+_WRITERS: Dict[str, AuditWriter] = {}
+_WRITERS_LOCK = threading.Lock()
+
+
+def audit_writer(path: Path, **kwargs: Any) -> AuditWriter:
+    """Escritor compartido (uno por proceso y archivo); `kwargs` solo cuentan al crearlo."""
+    key = os.fspath(path)
+    with _WRITERS_LOCK:
+        w = _WRITERS.get(key)
+        if w is None or w._closed:
+            w = _WRITERS[key] = AuditWriter(Path(path), **kwargs)
+        return w
+
+
+# --- Benchmark ----------------------------------------------------------------
+
+def _legacy_write(path: Path, entry: Dict[str, Any]) -> None:
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def bench_audit(events: int, *, batch_size: int = 256, flush_ms: float = 50.0) -> Dict[str, Any]:
+    """Eventos/s: append con open/close por evento vs. AuditWriter con cada durabilidad."""
+    entry = {"timestamp_utc": "2026-01-01T00:00:00Z", "event": "bench", "report_file": "/reports/x.json"}
+    runs: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory(prefix="tsurphu-audit-") as tmp:
+        path = Path(tmp) / "legacy.jsonl"
+        t0 = time.perf_counter()
+        for i in range(events):
+            _legacy_write(path, dict(entry, seq=i))
+        runs["open-per-event"] = time.perf_counter() - t0
+
+        for durability in DURABILITY:
+            path = Path(tmp) / f"{durability}.jsonl"
+            t0 = time.perf_counter()
+            with AuditWriter(path, batch_size=batch_size, flush_ms=flush_ms, durability=durability) as w:
+                for i in range(events):
+                    w.write(dict(entry, seq=i))
+            runs[f"group-{durability}"] = time.perf_counter() - t0
+            with path.open("rb") as f:
+                assert sum(1 for _ in f) == events
+
+    return {
+        "events": events,
+        "batch_size": batch_size,
+        "flush_ms": flush_ms,
+        "runs": {
+            name: {"seconds": round(s, 4), "events_per_s": round(events / s, 1) if s else None}
+            for name, s in runs.items()
+        },
+    }
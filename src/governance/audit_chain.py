@@ -0,0 +1,245 @@
+﻿from __future__ import annotations
+import datetime as dt
+import hashlib
+import hmac
+import json
+import os
+import secrets
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .packets import _ENCODE, canon
+
+# Encadenado por hash del log de auditoría.
+# Cada entrada lleva prev_hash = sha256(canon(entrada anterior)) (la anterior
+# incluye a su vez su prev_hash), con el mismo canon() que los changesets; la
+# primera del log encadena con GENESIS. Las entradas sin prev_hash solo se
+# admiten antes de la primera encadenada (logs anteriores a este formato).
+#
+# Cada N entradas el escritor agrega un checkpoint firmado (HMAC-SHA256) en
+# <log>.checkpoints.jsonl: offset del final de la entrada, offset de su línea y
+# su hash. validate parte del último checkpoint con firma válida: comprueba que
+# esa entrada no cambió y verifica solo la cola escrita después; --full
+# recorre el log entero y contrasta todos los checkpoints.
+#
+# Clave: TSURPHU_AUDIT_KEY si está definida; si no, <log>.key (se crea al
+# escribir el primer checkpoint). Para que la firma proteja algo, la clave
+# debe estar fuera del alcance de quien puede escribir el log.
+
+GENESIS = "sha256:" + "0" * 64
+KEY_ENV = "TSURPHU_AUDIT_KEY"
+_TAIL_CHUNK = 1 << 16
+
+
+def entry_hash(entry: Dict[str, Any]) -> str:
+    # = canon(entry), con el codificador ya construido (se llama una vez por entrada)
+    return "sha256:" + hashlib.sha256(_ENCODE(entry).encode("utf-8")).hexdigest()
+
+
+def _line_hash(line: bytes) -> str:
+    try:
+        return entry_hash(json.loads(line))
+    except ValueError:
+        return "sha256:" + hashlib.sha256(line.strip()).hexdigest()
+
+
+def checkpoint_path_for(log_path: Path) -> Path:
+    log_path = Path(log_path)
+    return log_path.with_name(log_path.name + ".checkpoints.jsonl")
+
+
+def key_path_for(log_path: Path) -> Path:
+    log_path = Path(log_path)
+    return log_path.with_name(log_path.name + ".key")
+
+
+def load_key(log_path: Path, *, create: bool = False) -> Optional[bytes]:
+    env = os.environ.get(KEY_ENV)
+    if env:
+        return env.encode("utf-8")
+    path = key_path_for(log_path)
+    try:
+        return bytes.fromhex(path.read_text(encoding="ascii").strip())
+    except FileNotFoundError:
+        if not create:
+            return None
+    key = secrets.token_bytes(32)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="ascii") as f:
+        f.write(key.hex() + "\n")
+    return key
+
+
+def _signature(key: bytes, record: Dict[str, Any]) -> str:
+    body = {k: v for k, v in record.items() if k != "signature"}
+    return "hmac-sha256:" + hmac.new(key, canon(body), hashlib.sha256).hexdigest()
+
+
+def tail_state(log_path: Path) -> Tuple[str, int, int]:
+    """(hash de la última entrada o GENESIS, offset de su línea, tamaño del log)."""
+    try:
+        f = Path(log_path).open("rb")
+    except FileNotFoundError:
+        return GENESIS, 0, 0
+    with f:
+        size = os.fstat(f.fileno()).st_size
+        end, buf = size, b""  # buf = bytes [end, size)
+        # Hacia atrás por bloques hasta tener la última línea no vacía completa
+        while True:
+            body = buf.rstrip(b"\r\n\t ")
+            cut = body.rfind(b"\n")
+            if cut >= 0:
+                return _line_hash(body[cut + 1 :]), end + cut + 1, size
+            if end == 0:
+                return (_line_hash(body), 0, size) if body else (GENESIS, 0, size)
+            start = max(0, end - _TAIL_CHUNK)
+            f.seek(start)
+            buf = f.read(end - start) + buf
+            end = start
+
+
+def entries_since_checkpoint(log_path: Path) -> int:
+    """Entradas del log escritas después del último checkpoint (todas si no hay).
+
+    Lo usa el escritor al retomar la cadena, para que la cuenta hasta el próximo
+    checkpoint siga entre procesos. No verifica la firma: solo decide cuándo
+    escribir el siguiente.
+    """
+    offset = 0
+    path = checkpoint_path_for(log_path)
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    offset = int(json.loads(line)["offset"])
+                except (ValueError, KeyError, TypeError):
+                    continue
+    except FileNotFoundError:
+        pass
+    try:
+        f = Path(log_path).open("rb")
+    except FileNotFoundError:
+        return 0
+    with f:
+        if offset > os.fstat(f.fileno()).st_size:
+            offset = 0  # log más corto que el checkpoint: se cuenta entero
+        f.seek(offset)
+        return sum(1 for line in f if line.strip())
+
+
+def write_checkpoint(log_path: Path, *, offset: int, line_offset: int, entry_hash: str, key: bytes) -> Dict[str, Any]:
+    record = {
+        "offset": offset,
+        "line_offset": line_offset,
+        "entry_hash": entry_hash,
+        "timestamp_utc": dt.datetime.now(dt.timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z"),
+    }
+    record["signature"] = _signature(key, record)
+    with checkpoint_path_for(log_path).open("a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        f.flush()
+    return record
+
+
+def read_checkpoints(log_path: Path, key: Optional[bytes]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """(checkpoints con firma válida en orden, errores de los demás)."""
+    path = checkpoint_path_for(log_path)
+    if not path.exists():
+        return [], []
+    valid, errors = [], []
+    with path.open("r", encoding="utf-8") as f:
+        for lineno, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            where = f"{path.name}:{lineno}"
+            try:
+                record = json.loads(line)
+            except ValueError:
+                errors.append(f"Auditoría: checkpoint ilegible ({where})")
+                continue
+            if key is None:
+                errors.append(f"Auditoría: checkpoint sin clave para verificarlo ({where}; defina {KEY_ENV})")
+                continue
+            if not isinstance(record, dict) or not hmac.compare_digest(
+                str(record.get("signature", "")), _signature(key, record)
+            ):
+                errors.append(f"Auditoría: firma de checkpoint inválida ({where})")
+                continue
+            valid.append(record)
+    return valid, errors
+
+
+def _walk(f, start: int, prev: str, chained: bool, name: str, errors: List[str], marks: Dict[int, str]) -> int:
+    # Verifica el encadenado desde `start`; devuelve cuántas entradas recorrió
+    f.seek(start)
+    offset = start
+    n = 0
+    for line in f:
+        here = offset
+        offset += len(line)
+        if not line.endswith(b"\n"):
+            errors.append(f"Auditoría: línea incompleta al final de {name} (byte {here})")
+            break
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            errors.append(f"Auditoría: entrada ilegible en {name} (byte {here})")
+            break
+        if not isinstance(entry, dict):
+            errors.append(f"Auditoría: entrada no es un objeto en {name} (byte {here})")
+            break
+        n += 1
+        got = entry.get("prev_hash")
+        if got is None:
+            if chained:
+                errors.append(f"Auditoría: entrada sin prev_hash en {name} (byte {here})")
+        else:
+            chained = True
+            if got != prev:
+                errors.append(f"Auditoría: cadena rota en {name} (byte {here})")
+        prev = entry_hash(entry)
+        if here in marks and marks[here] != prev:
+            errors.append(f"Auditoría: la entrada del checkpoint cambió en {name} (byte {here})")
+    return n
+
+
+def verify_log(log_path: Path, *, full: bool = False, key: Optional[bytes] = None) -> Dict[str, Any]:
+    """Verifica el encadenado: desde el último checkpoint válido, o todo con full=True.
+
+    Devuelve {"errors", "entries" (recorridas), "start" (byte inicial), "checkpoint" (el usado o None)}.
+    """
+    log_path = Path(log_path)
+    if key is None:
+        key = load_key(log_path)
+    checkpoints, errors = read_checkpoints(log_path, key)
+    result: Dict[str, Any] = {"errors": errors, "entries": 0, "start": 0, "checkpoint": None}
+    if not log_path.exists():
+        return result
+
+    with log_path.open("rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        name = log_path.name
+        if full or not checkpoints:
+            marks = {cp["line_offset"]: cp["entry_hash"] for cp in checkpoints}
+            for cp in checkpoints:
+                if cp["offset"] > size:
+                    errors.append(f"Auditoría: {name} es más corto que un checkpoint (byte {cp['offset']})")
+            result["entries"] = _walk(f, 0, GENESIS, False, name, errors, marks)
+            return result
+
+        cp = checkpoints[-1]
+        result["checkpoint"] = cp
+        result["start"] = cp["offset"]
+        if cp["offset"] > size:
+            errors.append(f"Auditoría: {name} es más corto que el último checkpoint (byte {cp['offset']})")
+            return result
+        f.seek(cp["line_offset"])
+        anchor = f.read(cp["offset"] - cp["line_offset"])
+        if _line_hash(anchor) != cp["entry_hash"]:
+            errors.append(f"Auditoría: la entrada del checkpoint cambió en {name} (byte {cp['line_offset']})")
+            return result
+        result["entries"] = _walk(f, cp["offset"], cp["entry_hash"], True, name, errors, {})
+    return result
@@ -0,0 +1,193 @@
+﻿from __future__ import annotations
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Índice lateral (SQLite) del log de auditoría JSONL.
+# Por cada línea guarda su offset en bytes y las claves de búsqueda (event,
+# change_id, report_file, día UTC), con un índice B-tree por clave: una consulta
+# cuesta O(log n) y luego solo se leen (seek) las líneas que coinciden.
+# Se mantiene incrementalmente: update() indexa solo los bytes nuevos desde el
+# último offset. Si el log se truncó o reescribió (cambia su cabecera) se reconstruye.
+
+SCHEMA_VERSION = "1"
+_HEAD_BYTES = 4096
+_BATCH = 10000
+
+KEYS = ("event", "change_id", "report_file", "day")
+
+
+def index_path_for(log_path: Path) -> Path:
+    log_path = Path(log_path)
+    return log_path.with_name(log_path.name + ".idx.sqlite")
+
+
+def _keys_of(line: bytes) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return None, None, None, None
+    if not isinstance(entry, dict):
+        return None, None, None, None
+    ts = entry.get("timestamp_utc")
+    day = ts[:10] if isinstance(ts, str) and len(ts) >= 10 else None
+
+    def text(v):
+        return v if isinstance(v, str) else None
+
+    return text(entry.get("event")), text(entry.get("change_id")), text(entry.get("report_file")), day
+
+
+class AuditIndex:
+    def __init__(self, log_path: Path, index_path: Optional[Path] = None) -> None:
+        self.log_path = Path(log_path)
+        self.index_path = Path(index_path) if index_path else index_path_for(self.log_path)
+        self._lock = threading.Lock()
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(os.fspath(self.index_path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        db = self._db
+        db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = db.execute("SELECT value FROM meta WHERE key='schema'").fetchone()
+        if row is not None and row[0] != SCHEMA_VERSION:
+            db.execute("DROP TABLE IF EXISTS entries")
+            db.execute("DELETE FROM meta")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "offset INTEGER PRIMARY KEY, length INTEGER NOT NULL, "
+            "event TEXT, change_id TEXT, report_file TEXT, day TEXT)"
+        )
+        for key in KEYS:
+            db.execute(f"CREATE INDEX IF NOT EXISTS entries_{key} ON entries ({key}, offset)")
+        db.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (SCHEMA_VERSION,))
+        db.commit()
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _head_hash(self, f, indexed: int) -> str:
+        # Solo los bytes ya indexados (hasta _HEAD_BYTES): crecer no cambia la cabecera
+        f.seek(0)
+        return hashlib.sha256(f.read(min(indexed, _HEAD_BYTES))).hexdigest()
+
+    # -- mantenimiento -----------------------------------------------------
+
+    def update(self) -> int:
+        """Indexa las líneas completas agregadas desde la última vez; devuelve cuántas."""
+        with self._lock:
+            try:
+                f = self.log_path.open("rb")
+            except FileNotFoundError:
+                return 0
+            with f:
+                size = os.fstat(f.fileno()).st_size
+                indexed = int(self._meta("indexed_size") or 0)
+                head = self._meta("head_sha256")
+                # Cabecera distinta o archivo más corto: truncado/reescrito -> reconstruir
+                if size < indexed or (indexed and head != self._head_hash(f, indexed)):
+                    self._db.execute("DELETE FROM entries")
+                    indexed = 0
+                if size == indexed:
+                    return 0
+
+                f.seek(indexed)
+                offset = indexed
+                added = 0
+                batch: List[Tuple[Any, ...]] = []
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # línea a medio escribir: se indexa en la próxima
+                    if line.strip():
+                        batch.append((offset, len(line), *_keys_of(line)))
+                    offset += len(line)
+                    if len(batch) >= _BATCH:
+                        self._db.executemany("INSERT OR REPLACE INTO entries VALUES (?,?,?,?,?,?)", batch)
+                        added += len(batch)
+                        batch.clear()
+                if batch:
+                    self._db.executemany("INSERT OR REPLACE INTO entries VALUES (?,?,?,?,?,?)", batch)
+                    added += len(batch)
+
+                head_hash = self._head_hash(f, offset)
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                    [("indexed_size", str(offset)), ("head_sha256", head_hash)],
+                )
+                self._db.commit()
+                return added
+
+    def rebuild(self) -> int:
+        with self._lock:
+            self._db.execute("DELETE FROM entries")
+            self._db.execute("DELETE FROM meta WHERE key IN ('indexed_size', 'head_sha256')")
+            self._db.commit()
+        return self.update()
+
+    # -- consultas -----------------------------------------------------------
+
+    def offsets(
+        self,
+        *,
+        event: Optional[str] = None,
+        change_id: Optional[str] = None,
+        report_file: Optional[str] = None,
+        day: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Tuple[int, int]]:
+        """(offset, longitud) de las líneas que cumplen todos los filtros, en orden del log."""
+        where, params = [], []
+        for key, value in (("event", event), ("change_id", change_id), ("report_file", report_file), ("day", day)):
+            if value is not None:
+                where.append(f"{key} = ?")
+                params.append(value)
+        if since is not None:
+            where.append("day >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("day <= ?")
+            params.append(until)
+        sql = "SELECT offset, length FROM entries"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY offset"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def query(self, **filters: Any) -> Iterator[Dict[str, Any]]:
+        """Entradas que cumplen los filtros (ver offsets), leídas por seek directo."""
+        self.update()
+        hits = self.offsets(**filters)
+        if not hits:
+            return
+        with self.log_path.open("rb") as f:
+            for offset, length in hits:
+                f.seek(offset)
+                yield json.loads(f.read(length))
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "AuditIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
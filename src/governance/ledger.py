@@ -0,0 +1,184 @@
+﻿from __future__ import annotations
+import csv
+import hashlib
+import io
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Ledger de objetos (docs/object-ledger.csv) indexado en SQLite.
+# El CSV sigue siendo la fuente; la base se reconstruye cuando cambia su firma
+# (tamaño + mtime, o sha256 si solo cambió el mtime). Índices B-tree por
+# ObjectID, ruta y dueño: cada búsqueda cuesta O(log n). Los errores del CSV
+# (columnas, ObjectID vacío o duplicado) se calculan al reconstruir y quedan
+# guardados, así que un ledger sin cambios no se vuelve a leer.
+#
+# check_refs() contrasta en una sola pasada (tabla temporal + joins) las
+# referencias de los changesets (objects_affected[].object_id / path).
+# Las rutas se comparan normalizadas: siempre con "/" inicial.
+
+SCHEMA_VERSION = "1"
+COLUMNS = ("ObjectID", "Nombre", "Estrato_7x", "Dueño", "MetaAgent", "Sensibilidad", "Evidencia", "Ruta")
+
+# (source, object_id, path): de dónde viene la referencia (p. ej. el archivo del changeset)
+Ref = Tuple[str, str, str]
+
+
+def norm_path(path: str) -> str:
+    path = (path or "").strip()
+    return "/" + path.lstrip("/") if path else ""
+
+
+def _row(r: Tuple[Any, ...]) -> Dict[str, Any]:
+    return {"line": r[0], **dict(zip(COLUMNS, r[1:]))}
+
+
+class LedgerStore:
+    def __init__(self, csv_path: Path, db_path: Path) -> None:
+        self.csv_path = Path(csv_path)
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(os.fspath(self.db_path))
+        db = self._db
+        db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = db.execute("SELECT value FROM meta WHERE key='schema'").fetchone()
+        if row is not None and row[0] != SCHEMA_VERSION:
+            db.execute("DROP TABLE IF EXISTS objects")
+            db.execute("DELETE FROM meta")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS objects ("
+            "line INTEGER PRIMARY KEY, object_id TEXT, nombre TEXT, estrato TEXT, owner TEXT, "
+            "meta_agent TEXT, sensitivity TEXT, evidence TEXT, path TEXT)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS objects_id ON objects (object_id)")
+        db.execute("CREATE INDEX IF NOT EXISTS objects_path ON objects (path)")
+        db.execute("CREATE INDEX IF NOT EXISTS objects_owner ON objects (owner)")
+        db.execute("INSERT OR REPLACE INTO meta VALUES ('schema', ?)", (SCHEMA_VERSION,))
+        db.commit()
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    # -- mantenimiento -----------------------------------------------------
+
+    def sync(self) -> bool:
+        """Reconstruye desde el CSV si cambió; devuelve True si lo leyó."""
+        # Un stat y a lo sumo una lectura: rebuild reutiliza los bytes del sha256
+        st = self.csv_path.stat()
+        sig = json.loads(self._meta("signature") or "{}")
+        if sig.get("size") == st.st_size and sig.get("mtime_ns") == st.st_mtime_ns:
+            return False
+        data = self.csv_path.read_bytes()
+        sha = hashlib.sha256(data).hexdigest()
+        if sig.get("size") == st.st_size and sig.get("sha256") == sha:
+            self._set_signature(dict(sig, mtime_ns=st.st_mtime_ns))
+            self._db.commit()
+            return False
+        self._rebuild(st, data, sha)
+        return True
+
+    def _set_signature(self, sig: Dict[str, Any]) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('signature', ?)", (json.dumps(sig),))
+
+    def rebuild(self) -> None:
+        st = self.csv_path.stat()
+        data = self.csv_path.read_bytes()
+        self._rebuild(st, data, hashlib.sha256(data).hexdigest())
+
+    def _rebuild(self, st: os.stat_result, data: bytes, sha: str) -> None:
+        # st es de antes de leer `data`: si el CSV cambia entre medias, la firma
+        # guardada no coincide con la siguiente y se vuelve a leer
+        text = data.decode("utf-8-sig")
+        reader = csv.DictReader(io.StringIO(text, newline=""))
+        errors: List[str] = []
+        if set(reader.fieldnames or []) != set(COLUMNS):
+            errors.append("Ledger: columnas incorrectas")
+        rows = []
+        seen = set()
+        for line, fields in enumerate(reader, start=2):
+            values = [(fields.get(c) or "").strip() for c in COLUMNS]
+            values[-1] = norm_path(values[-1])
+            rows.append((line, *values))
+            oid = values[0]
+            if not oid:
+                errors.append(f"Ledger L{line}: ObjectID vacío")
+                continue
+            if oid in seen:
+                errors.append(f"Ledger L{line}: duplicado {oid}")
+            seen.add(oid)
+
+        db = self._db
+        db.execute("DELETE FROM objects")
+        db.executemany("INSERT INTO objects VALUES (?,?,?,?,?,?,?,?,?)", rows)
+
+        self._set_signature({"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha})
+        db.execute("INSERT OR REPLACE INTO meta VALUES ('errors', ?)", (json.dumps(errors, ensure_ascii=False),))
+        db.commit()
+
+    def errors(self) -> List[str]:
+        """Errores del CSV hallados en la última reconstrucción."""
+        return json.loads(self._meta("errors") or "[]")
+
+    # -- búsquedas -----------------------------------------------------------
+
+    _SELECT = (
+        "SELECT line, object_id, nombre, estrato, owner, meta_agent, sensitivity, evidence, path FROM objects"
+    )
+
+    def get(self, object_id: str) -> Optional[Dict[str, Any]]:
+        row = self._db.execute(self._SELECT + " WHERE object_id = ? ORDER BY line LIMIT 1", (object_id,)).fetchone()
+        return _row(row) if row else None
+
+    def by_path(self, path: str) -> List[Dict[str, Any]]:
+        return [_row(r) for r in self._db.execute(self._SELECT + " WHERE path = ? ORDER BY line", (norm_path(path),))]
+
+    def by_owner(self, owner: str) -> List[Dict[str, Any]]:
+        return [_row(r) for r in self._db.execute(self._SELECT + " WHERE owner = ? ORDER BY line", (owner,))]
+
+    # -- integridad referencial ----------------------------------------------
+
+    def check_refs(self, refs: Iterable[Ref]) -> Tuple[List[str], List[str]]:
+        """(errores, avisos) de las referencias de changesets contra el ledger.
+
+        Errores: ObjectID conocido con otra ruta, o ruta registrada con otro ObjectID.
+        Avisos: ObjectID que no está en el ledger (validate --strict los vuelve errores).
+        """
+        db = self._db
+        db.execute("CREATE TEMP TABLE IF NOT EXISTS refs (seq INTEGER PRIMARY KEY, source TEXT, object_id TEXT, path TEXT)")
+        db.execute("DELETE FROM refs")
+        db.executemany(
+            "INSERT INTO refs (source, object_id, path) VALUES (?,?,?)",
+            ((src, (oid or "").strip(), norm_path(path)) for src, oid, path in refs),
+        )
+        errors, warnings = [], []
+        # Una fila por referencia: ruta registrada para su ObjectID y ObjectID registrado para su ruta
+        rows = db.execute(
+            "SELECT r.source, r.object_id, r.path, "
+            "(SELECT o.path FROM objects o WHERE o.object_id = r.object_id ORDER BY o.line LIMIT 1), "
+            "EXISTS (SELECT 1 FROM objects o WHERE o.object_id = r.object_id AND o.path = r.path), "
+            "(SELECT o.object_id FROM objects o WHERE o.path = r.path AND r.path != '' ORDER BY o.line LIMIT 1) "
+            "FROM refs r ORDER BY r.seq"
+        )
+        for source, oid, path, known_path, same, path_owner in rows:
+            if known_path is None:
+                if path_owner is not None:
+                    errors.append(f"{source}: {oid} usa la ruta {path}, registrada en el ledger como {path_owner}")
+                else:
+                    warnings.append(f"{source}: {oid} no está en el ledger")
+            elif path and not same:
+                errors.append(f"{source}: {oid} tiene ruta {path}, el ledger dice {known_path}")
+        db.execute("DELETE FROM refs")
+        db.commit()
+        return errors, warnings
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "LedgerStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
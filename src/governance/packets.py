@@ -0,0 +1,211 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Verificación de paquetes de cambio (changesets).
+# El hash de un paquete es sha256(canon(paquete con integrity.packet_hash = "")),
+# con canon = JSON de claves ordenadas, UTF-8, separadores compactos. No se copia
+# el paquete: se reemplaza solo el dict `integrity` en un dict de primer nivel
+# nuevo, y se codifica con un JSONEncoder construido una vez (json.dumps con
+# argumentos crea uno por llamada).
+#
+# Se probó codificar por separado los valores grandes para no construir los
+# bytes canónicos completos: con el mismo trabajo (bench validate) fue más lento
+# que una sola llamada al codificador en C, así que no se usa.
+
+_ENCODE = json.JSONEncoder(sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode
+
+Entry = Dict[str, Any]
+
+
+def canon(obj) -> bytes:
+    return _ENCODE(obj).encode("utf-8")
+
+
+def packet_hash(pkt: dict) -> str:
+    """'sha256:<hex>' canónico de `pkt`, como si integrity.packet_hash estuviera vacío."""
+    integrity = dict(pkt.get("integrity", {}))
+    integrity["packet_hash"] = ""
+    return "sha256:" + hashlib.sha256(canon({**pkt, "integrity": integrity})).hexdigest()
+
+
+def legacy_packet_hash(pkt: dict) -> str:
+    """La forma anterior (copia + json.dumps); referencia para tests y benchmark."""
+    tmp = dict(pkt)
+    tmp["integrity"] = dict(tmp.get("integrity", {}))
+    tmp["integrity"]["packet_hash"] = ""
+    data = json.dumps(tmp, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return "sha256:" + hashlib.sha256(data).hexdigest()
+
+
+def packet_refs(pkt: dict) -> List[List[str]]:
+    """[[object_id, path], ...] de objects_affected (para cruzar con el ledger)."""
+    objects = pkt.get("objects_affected")
+    if not isinstance(objects, list):
+        return []
+    return [
+        [str(o.get("object_id") or ""), str(o.get("path") or "")]
+        for o in objects
+        if isinstance(o, dict)
+    ]
+
+
+def _check_packet(name: str, data: bytes, hash_fn=packet_hash) -> Tuple[List[str], List[List[str]]]:
+    try:
+        pkt = json.loads(data.decode("utf-8"))
+        recorded = pkt.get("integrity", {}).get("packet_hash") or ""
+        if recorded != hash_fn(pkt):
+            return [f"{name}: hash no coincide"], packet_refs(pkt)
+        return [], packet_refs(pkt)
+    except Exception as e:
+        return [f"{name}: inválido ({e})"], []
+
+
+def check_packet_bytes(name: str, data: bytes) -> List[str]:
+    """Errores de un paquete (vacío si el hash registrado coincide)."""
+    return _check_packet(name, data)[0]
+
+
+def check_packet_files(paths: Iterable[Path]) -> List[Tuple[Path, Entry]]:
+    """
+    Verifica archivos de paquetes: [(ruta, {size, mtime_ns, sha256, errors, refs})].
+    Los bytes se leen una vez (sha256 del archivo para la caché + verificación);
+    refs son los [object_id, path] que el paquete declara.
+    Función de módulo: se puede repartir entre procesos (orchestration.parallel).
+    """
+    return _check_files(paths, packet_hash)
+
+
+def packet_entry(p: Path, st: os.stat_result, data: bytes, hash_fn=packet_hash) -> Entry:
+    """Entrada de caché de `p` a partir de su stat y de los bytes leídos después de él."""
+    errors, refs = _check_packet(p.name, data, hash_fn)
+    return {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "errors": errors,
+        "refs": refs,
+    }
+
+
+def _check_files(paths: Iterable[Path], hash_fn) -> List[Tuple[Path, Entry]]:
+    out = []
+    for p in paths:
+        p = Path(p)
+        st = p.stat()
+        out.append((p, packet_entry(p, st, p.read_bytes(), hash_fn)))
+    return out
+
+
+def verify_packet_files(
+    paths: List[Path],
+    *,
+    workers: int = 1,
+    chunk_size: Optional[int] = None,
+) -> Iterator[Tuple[Path, Entry]]:
+    """check_packet_files repartido en `workers` procesos; resultados en el orden de `paths`."""
+    from orchestration.parallel import chunked, run_chunks
+
+    if chunk_size is None:
+        # Unos 4 lotes por worker: equilibra carga sin pagar un envío por archivo
+        chunk_size = max(1, min(2048, len(paths) // (max(1, workers) * 4))) if workers > 1 else max(1, len(paths))
+    for chunk in run_chunks(check_packet_files, chunked(paths, chunk_size), workers=workers, initializer=None):
+        yield from chunk
+
+
+# --- Benchmark ----------------------------------------------------------------
+# random, tempfile y time se importan aquí dentro: validate y la CLI cargan este
+# módulo en cada arranque y no los necesitan.
+
+def synthetic_packet(i: int, rng) -> dict:
+    # rng: un random.Random (random se importa solo en write_synthetic_corpus)
+    objects = [
+        {
+            "object_id": f"TSU-OBJ-{rng.randrange(10000):04d}",
+            "operation": rng.choice(["add", "update", "deprecate", "remove"]),
+            "path": f"/src/engines/módulo_{rng.randrange(100)}.py",
+            "sensitivity": rng.choice(["P0", "P1", "P2"]),
+        }
+        for _ in range(rng.randrange(1, 12))
+    ]
+    pkt = {
+        "packet_version": "1.0",
+        "change_id": f"TSU-CHG-{i:06d}-sintético",
+        "timestamp_utc": "2026-01-01T00:00:00Z",
+        "actor": {"role": "Engineer", "id": ""},
+        "change_type": rng.choice(["add", "update", "deprecate", "remove"]),
+        "scope": {"layers_7x": ["7x-L7"], "modules": ["misc"]},
+        "objects_affected": objects,
+        "rationale": "Cambio sintético para el benchmark de validate. " * rng.randrange(1, 6),
+        "evidence": [],
+        "impact": {"expected_behavior_change": "", "risk_level": "low", "compatibility": "backward"},
+        "rollback": {"needed": False, "plan": ""},
+        "approval": {"required": True, "approver_role": "Zakik", "status": "pending", "notes": ""},
+        "integrity": {"canonicalization": "json-keys-sorted-utf8", "hash_alg": "sha256", "packet_hash": ""},
+    }
+    pkt["integrity"]["packet_hash"] = packet_hash(pkt)
+    return pkt
+
+
+def write_synthetic_corpus(directory: Path, n: int, *, seed: int = 0) -> List[Path]:
+    import random
+
+    rng = random.Random(seed)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(n):
+        p = directory / f"TSU-CHG-{i:06d}.json"
+        p.write_bytes(canon(synthetic_packet(i, rng)))
+        paths.append(p)
+    return paths
+
+
+def _legacy_check_files(paths: List[Path]) -> int:
+    # El mismo trabajo que check_packet_files, con el hash anterior
+    return sum(1 for _p, entry in _check_files(paths, legacy_packet_hash) if entry["errors"])
+
+
+def _run_validate(paths: List[Path], workers: int) -> Tuple[int, Dict[str, float]]:
+    import time
+
+    total_bytes = sum(os.path.getsize(p) for p in paths)
+    runs: Dict[str, float] = {}
+    t0 = time.perf_counter()
+    bad = _legacy_check_files(paths)
+    runs["legacy"] = time.perf_counter() - t0
+    if bad:
+        raise RuntimeError(f"bench validate: {bad} paquetes sintéticos no verifican (método anterior)")
+
+    modes = [("current", 1)] + ([(f"current x{workers}", workers)] if workers > 1 else [])
+    for name, w in modes:
+        t0 = time.perf_counter()
+        bad = sum(1 for _p, entry in verify_packet_files(paths, workers=w) if entry["errors"])
+        runs[name] = time.perf_counter() - t0
+        if bad:
+            raise RuntimeError(f"bench validate: {bad} paquetes sintéticos no verifican ({name})")
+    return total_bytes, runs
+
+
+def bench_validate(n: int, *, workers: int = 1, directory: Optional[Path] = None, seed: int = 0) -> Dict[str, Any]:
+    """Paquetes/s verificando archivos: método anterior y actual (1 núcleo) y actual en `workers` procesos."""
+    if directory is not None:
+        total_bytes, runs = _run_validate(write_synthetic_corpus(Path(directory), n, seed=seed), workers)
+    else:
+        import tempfile
+
+        with tempfile.TemporaryDirectory(prefix="tsurphu-bench-") as tmp:
+            total_bytes, runs = _run_validate(write_synthetic_corpus(Path(tmp), n, seed=seed), workers)
+
+    return {
+        "packets": n,
+        "bytes": total_bytes,
+        "workers": workers,
+        "runs": {
+            name: {"seconds": round(s, 3), "packets_per_s": round(n / s, 1) if s else None}
+            for name, s in runs.items()
+        },
+    }
@@ -0,0 +1,139 @@
+"""
+Performance benchmarks for the CLI (``tsurphu bench ...``).
+
+``startup`` times interpreter start-to-exit of a CLI invocation in fresh
+subprocesses:
+
+* cold: every run gets an empty ``PYTHONPYCACHEPREFIX``, so each module is
+  compiled from source (the OS page cache is still warm; this measures what
+  a first run after install/upgrade pays, not a cold disk);
+* warm: runs reuse the bytecode cache, after one untimed priming run;
+* imports: one ``-X importtime`` run, reduced to the slowest modules.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+# Same entry point as the `tsurphu` console script
+_ENTRY = "import sys; from orchestration.cli import main; sys.exit(main(sys.argv[1:]))"
+
+
+def _env(pycache_prefix: Optional[str] = None) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+    env.pop("PYTHONPYCACHEPREFIX", None)
+    if pycache_prefix is not None:
+        env["PYTHONPYCACHEPREFIX"] = pycache_prefix
+    return env
+
+
+def _run_once(argv: Sequence[str], env: Dict[str, str], *, importtime: bool = False) -> "subprocess.CompletedProcess[str]":
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", _ENTRY, *argv]
+    return subprocess.run(cmd, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+
+def _timed(argv: Sequence[str], env: Dict[str, str]) -> float:
+    t0 = time.perf_counter()
+    proc = _run_once(argv, env)
+    elapsed = (time.perf_counter() - t0) * 1000.0
+    if proc.returncode != 0:
+        raise RuntimeError(f"tsurphu {' '.join(argv)} exited with {proc.returncode}: {proc.stderr.strip()}")
+    return elapsed
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parse ``-X importtime`` output into [{"module", "self_us", "cumulative_us"}]."""
+    out = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # header line
+        out.append({"module": parts[2].strip(), "self_us": self_us, "cumulative_us": cumulative_us})
+    return out
+
+
+def _stats(samples: List[float]) -> Dict[str, float]:
+    return {
+        "runs": len(samples),
+        "min_ms": round(min(samples), 2),
+        "median_ms": round(statistics.median(samples), 2),
+        "max_ms": round(max(samples), 2),
+    }
+
+
+def bench_startup(argv: Sequence[str] = ("--help",), *, runs: int = 10, top: int = 15) -> Dict[str, Any]:
+    runs = max(1, runs)
+    cold = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory(prefix="tsurphu-pycache-") as prefix:
+            cold.append(_timed(argv, _env(prefix)))
+
+    env = _env()
+    _timed(argv, env)  # priming: writes the bytecode cache
+    warm = [_timed(argv, env) for _ in range(runs)]
+
+    imports = parse_importtime(_run_once(argv, env, importtime=True).stderr)
+    imports.sort(key=lambda r: r["self_us"], reverse=True)
+
+    return {
+        "argv": list(argv),
+        "python": sys.version.split()[0],
+        "cold": _stats(cold),
+        "warm": _stats(warm),
+        "imports": {
+            "modules": len(imports),
+            "total_self_us": sum(r["self_us"] for r in imports),
+            "top": imports[:top],
+        },
+    }
+
+
+def _print_report(result: Dict[str, Any]) -> None:
+    print(f"tsurphu {' '.join(result['argv'])}  (python {result['python']})")
+    for mode in ("cold", "warm"):
+        s = result[mode]
+        print(f"  {mode:<5} median {s['median_ms']:8.2f} ms  min {s['min_ms']:8.2f}  max {s['max_ms']:8.2f}  ({s['runs']} runs)")
+    imports = result["imports"]
+    print(f"  imports: {imports['modules']} modules, {imports['total_self_us'] / 1000:.2f} ms self time")
+    print(f"  {'self us':>9} {'cumul us':>9}  module")
+    for r in imports["top"]:
+        print(f"  {r['self_us']:>9} {r['cumulative_us']:>9}  {r['module']}")
+
+
+def cmd_bench(args: argparse.Namespace) -> int:
+    # Only one benchmark so far; `args.bench` selects among them
+    argv = list(args.argv or ["--help"])
+    if argv[:1] == ["--"]:
+        argv = argv[1:]
+    result = bench_startup(argv, runs=args.runs, top=args.top)
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2, sort_keys=True))
+    else:
+        _print_report(result)
+
+    if args.max_warm_ms is not None and result["warm"]["median_ms"] > args.max_warm_ms:
+        print(
+            f"[bench] warm median {result['warm']['median_ms']:.2f} ms exceeds --max-warm-ms {args.max_warm_ms:g}",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
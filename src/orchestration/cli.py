@@ -1,83 +1,498 @@
 ﻿import argparse
-import json
-from typing import Any, Dict
+import importlib
+import itertools
+import sys
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, Union
 
-from engines.tibetan_year import tibetan_year
 
-
-def _tibetan_year_to_dict(obj: Any) -> Dict[str, Any]:
+def _year_token(text: str):
     """
-    Convert the TibetanYear return value into a JSON-serializable dict.
-    Works for NamedTuple, dataclass, or plain objects.
+    Parse one ``tibetan-year`` positional: a year, an inclusive range
+    ``A..B`` or ``-`` (newline-delimited years on stdin).
     """
-    # NamedTuple
-    if hasattr(obj, "_asdict"):
-        return obj._asdict()  # type: ignore[attr-defined]
+    if text == "-":
+        return ("stdin",)
+    if ".." in text:
+        lo, _, hi = text.partition("..")
+        try:
+            return ("range", int(lo), int(hi))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid year range: {text!r}") from None
+    try:
+        return ("year", int(text))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid year: {text!r}") from None
+
 
-    # dataclass
+def positive_int(text: str) -> int:
+    """argparse type for ``--workers``/``--chunk-size``-style counts (at least 1)."""
     try:
-        import dataclasses
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {text!r}") from None
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {value}")
+    return value
 
-        if dataclasses.is_dataclass(obj):
-            return dataclasses.asdict(obj)
-    except Exception:
-        pass
 
-    # plain object
-    if hasattr(obj, "__dict__"):
-        return dict(obj.__dict__)
+def _iter_stdin_years(stdin, errors):
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield int(line)
+        except ValueError:
+            errors.append(line)
+            print(f"[tibetan-year] invalid year: {line!r}", file=sys.stderr)
 
-    # last resort
-    return {"value": str(obj)}
 
+def _iter_tibetan_years_for(tokens, *, lookups_dir, stdin, errors):
+    from engines.tibetan_year import tibetan_year
+    from engines.tibetan_year_batch import iter_tibetan_years
 
-def _normalize_tibetan_year_json(data: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Canonicalize JSON output for stability in tests and downstream tools.
-    """
-    element = data.get("element")
-    if isinstance(element, str):
-        data["element"] = element.lower()
+    for token in tokens:
+        if token[0] == "year":
+            yield tibetan_year(token[1], lookups_dir=lookups_dir)
+        elif token[0] == "range":
+            lo, hi = token[1], token[2]
+            step = 1 if hi >= lo else -1
+            yield from iter_tibetan_years(lo, hi + step, step, lookups_dir=lookups_dir)
+        else:
+            for year in _iter_stdin_years(stdin, errors):
+                yield tibetan_year(year, lookups_dir=lookups_dir)
+
+
+def _years_for(tokens, *, stdin, errors):
+    """All requested years, as a range when possible (the batch engine uses arange)."""
+    def _one(token):
+        if token[0] == "year":
+            return (token[1],)
+        if token[0] == "range":
+            lo, hi = token[1], token[2]
+            step = 1 if hi >= lo else -1
+            return range(lo, hi + step, step)
+        return _iter_stdin_years(stdin, errors)
+
+    if len(tokens) == 1 and tokens[0][0] == "range":
+        return _one(tokens[0])
+    return list(itertools.chain.from_iterable(_one(t) for t in tokens))
+
+
+def _write_tibetan_year_binary(args: argparse.Namespace, lookups_dir) -> int:
+    from engines.tibetan_year_batch import tibetan_years
+    from orchestration import formats
+
+    errors: list = []
+    columns = tibetan_years(_years_for(args.years, stdin=sys.stdin, errors=errors), lookups_dir=lookups_dir)
+    write = formats.write_npy if args.format == "npy" else formats.write_columnar
+    try:
+        if args.output:
+            with open(args.output, "wb") as f:
+                write(columns, f)
+            if args.format == "npy":
+                formats.write_parkha_names(columns, formats.parkha_names_path(args.output))
+        else:
+            write(columns, sys.stdout.buffer)
+            sys.stdout.buffer.flush()
+    except ValueError as e:
+        if args.output:
+            Path(args.output).unlink(missing_ok=True)
+        print(f"[tibetan-year] {e}", file=sys.stderr)
+        return 2
+    return 1 if errors else 0
+
+
+def _line_formatter(fmt: str, encoder: Optional[str]):
+    """TibetanYear -> one output line (with its newline) for a text ``fmt``."""
+    from orchestration import formats, serializers
+
+    to_json_dict = serializers.to_json_dict
+    if fmt == "csv":
+        import csv
+        import io
+
+        fields = formats.csv_header()
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+
+        def line(ty) -> str:
+            data = to_json_dict(ty)
+            writer.writerow(["" if data[k] is None else data[k] for k in fields])
+            text = buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            return text
+
+        return line
+
+    if fmt in ("json", "jsonl"):
+        encode = serializers.get_encoder(encoder) if encoder else serializers.line
+        return lambda ty: encode(to_json_dict(ty)) + "\n"
+
+    return lambda ty: repr(ty) + "\n"
 
-    parkha = data.get("parkha")
-    if isinstance(parkha, str):
-        data["parkha"] = parkha.lower()
 
-    return data
+def _format_tibetan_year_chunk(job) -> str:
+    """Worker side of ``tibetan-year --workers``: one chunk of years -> its text."""
+    from engines.tibetan_year_batch import tibetan_years
 
+    years, fmt, encoder, lookups_dir = job
+    line = _line_formatter(fmt, encoder)
+    return "".join(line(ty) for ty in tibetan_years(years, lookups_dir=lookups_dir).rows())
+
+
+def _year_chunks(tokens, *, stdin, errors, chunk_size):
+    from orchestration.parallel import chunked, split_range
+
+    pending: list = []
+    for token in tokens:
+        if token[0] == "range":
+            if pending:
+                yield pending
+                pending = []
+            lo, hi = token[1], token[2]
+            step = 1 if hi >= lo else -1
+            yield from split_range(range(lo, hi + step, step), chunk_size)
+            continue
+        years = (token[1],) if token[0] == "year" else _iter_stdin_years(stdin, errors)
+        for chunk in chunked(itertools.chain(pending, years), chunk_size):
+            if len(chunk) < chunk_size:
+                pending = chunk
+                break
+            pending = []
+            yield chunk
+    if pending:
+        yield pending
 
 
 def cmd_tibetan_year(args: argparse.Namespace) -> int:
-    ty = tibetan_year(args.year)
+    from orchestration import formats, serializers
+
+    lookups_dir = Path(args.lookups_dir) if args.lookups_dir else None
+    fmt = args.format or ("json" if args.json or args.compact else "repr")
+    for flag, used in (("--json", args.json), ("--compact", args.compact)):
+        if used and fmt not in ("json", "jsonl"):
+            print(f"[tibetan-year] {flag} conflicts with --format {fmt}", file=sys.stderr)
+            return 2
+    if fmt in formats.BINARY_FORMATS:
+        if not args.output and sys.stdout.isatty():
+            print(f"[tibetan-year] refusing to write {fmt} to a terminal; use --output", file=sys.stderr)
+            return 2
+        if fmt == "npy" and not args.output:
+            # The parkha names go to a sidecar next to the output file
+            print("[tibetan-year] npy needs --output (parkha names are written beside it)", file=sys.stderr)
+            return 2
+        return _write_tibetan_year_binary(args, lookups_dir)
+
+    try:
+        if args.compact:
+            serializers.get_encoder(args.encoder)
+    except RuntimeError as e:
+        print(f"[tibetan-year] {e}", file=sys.stderr)
+        return 2
+
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        return _write_tibetan_year_text(args, fmt, out, lookups_dir)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def _write_tibetan_year_text(args: argparse.Namespace, fmt: str, out, lookups_dir) -> int:
+    from engines.tibetan_year import tibetan_year
+    from orchestration import formats, serializers
 
-    if args.json:
-        data = _normalize_tibetan_year_json(_tibetan_year_to_dict(ty))
-        print(json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True))
-    else:
-        print(ty)
+    tokens = args.years
+    encoder = args.encoder if args.compact else None
 
+    # One plain year: unchanged output (pretty JSON or the repr)
+    if len(tokens) == 1 and tokens[0][0] == "year" and fmt in ("repr", "json"):
+        ty = tibetan_year(tokens[0][1], lookups_dir=lookups_dir)
+        if fmt == "json":
+            data = serializers.to_json_dict(ty)
+            print(serializers.get_encoder(encoder)(data) if encoder else serializers.pretty(data), file=out)
+        else:
+            print(ty, file=out)
+        return 0
+
+    # Batch: stream one record per line (JSON Lines for json/jsonl)
+    uses_stdin = any(t[0] == "stdin" for t in tokens)
+    flush_every = args.flush_every if args.flush_every is not None else (1 if uses_stdin else 0)
+    errors: list = []
+    if fmt == "csv":
+        out.write(",".join(formats.csv_header()) + "\n")
+
+    if args.workers > 1:
+        from orchestration.parallel import run_chunks, warm_engines
+
+        jobs = (
+            (chunk, fmt, encoder, lookups_dir)
+            for chunk in _year_chunks(tokens, stdin=sys.stdin, errors=errors, chunk_size=args.chunk_size)
+        )
+        for text in run_chunks(
+            _format_tibetan_year_chunk,
+            jobs,
+            workers=args.workers,
+            ordered=not args.unordered,
+            initializer=warm_engines,
+            initargs=(lookups_dir,),
+        ):
+            out.write(text)
+            if flush_every:
+                out.flush()
+        out.flush()
+        return 1 if errors else 0
+
+    line = _line_formatter(fmt, encoder)
+    n = 0
+    for ty in _iter_tibetan_years_for(tokens, lookups_dir=lookups_dir, stdin=sys.stdin, errors=errors):
+        out.write(line(ty))
+        n += 1
+        if flush_every and n % flush_every == 0:
+            out.flush()
+    out.flush()
+
+    return 1 if errors else 0
+
+
+def cmd_compile_lookups(args: argparse.Namespace) -> int:
+    from engines.lookup_cache import DEFAULT_LOOKUPS_DIR, LOOKUP_FILENAME
+    from engines.lookup_compiled import compile_lookup
+
+    lookups_dir = Path(args.lookups_dir) if args.lookups_dir else DEFAULT_LOOKUPS_DIR
+    errors: list = []
+    out = compile_lookup(lookups_dir / LOOKUP_FILENAME, errors=errors)
+    for e in errors:
+        print(f"[compile-lookups] skipped: {e}", file=sys.stderr)
+    print(f"[compile-lookups] OK: {out}")
     return 0
 
 
-def build_parser() -> argparse.ArgumentParser:
-    parser = argparse.ArgumentParser(prog="tsurphu")
-    sub = parser.add_subparsers(dest="cmd", required=True)
+# Subcommand registry: name -> (help, configure(parser), handler).
+# A handler given as "module:function" is imported only when its subcommand
+# runs, so `tsurphu --help` (or any other subcommand) never pays for engines
+# it does not use. Handlers defined here import their engines inside the call.
+# Other front ends (tools/tsurphu.py) keep their own registry dict and build it
+# with ``add_commands``.
+Registry = Dict[str, Tuple[str, Callable[[argparse.ArgumentParser], None], Union[str, Callable]]]
+_COMMANDS: Registry = {}
+
+
+def register_command(name: str, *, help: str, handler: Union[str, Callable], registry: Optional[Registry] = None):
+    def deco(configure: Callable[[argparse.ArgumentParser], None]):
+        (_COMMANDS if registry is None else registry)[name] = (help, configure, handler)
+        return configure
 
-    p_ty = sub.add_parser(
-        "tibetan-year",
-        help="Compute Tibetan year attributes for a Gregorian year",
+    return deco
+
+
+class _LazyHandler:
+    def __init__(self, target: Union[str, Callable]) -> None:
+        self.target = target
+
+    def __call__(self, args: argparse.Namespace) -> int:
+        if isinstance(self.target, str):
+            module, _, func = self.target.partition(":")
+            self.target = getattr(importlib.import_module(module), func)
+        return self.target(args)
+
+
+@register_command(
+    "tibetan-year",
+    help="Compute Tibetan year attributes for a Gregorian year",
+    handler=cmd_tibetan_year,
+)
+def _configure_tibetan_year(p: argparse.ArgumentParser) -> None:
+    from orchestration.formats import FORMATS
+
+    p.add_argument(
+        "years",
+        nargs="+",
+        type=_year_token,
+        metavar="year",
+        help="Gregorian year (e.g. 2025), inclusive range (1900..2100) or - to read years from stdin",
     )
-    p_ty.add_argument("year", type=int, help="Gregorian year (e.g. 2025)")
-    p_ty.add_argument(
+    p.add_argument(
         "--json",
         action="store_true",
-        help="Output JSON instead of the Python repr",
+        help="Output JSON instead of the Python repr (one object per line for batches)",
+    )
+    p.add_argument(
+        "--format",
+        choices=FORMATS,
+        default=None,
+        help="Output format (default: repr, or json with --json/--compact); "
+        "npy and columnar-bin write typed binary columns (see orchestration.formats)",
+    )
+    p.add_argument("--output", "-o", default=None, metavar="PATH", help="Write to PATH instead of stdout")
+    p.add_argument(
+        "--compact",
+        action="store_true",
+        help="Single-line JSON without spaces (implies --json); uses the --encoder backend",
+    )
+    p.add_argument(
+        "--encoder",
+        choices=["auto", "orjson", "msgspec", "json"],
+        default="auto",
+        help="Encoder for --compact (default: auto = orjson, then msgspec, then the stdlib)",
+    )
+    p.add_argument(
+        "--flush-every",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Flush output every N records in batch mode (0 = only at the end; "
+        "default: every record when reading stdin, else at the end)",
+    )
+    p.add_argument("--lookups-dir", default=None, help="Resolve mewa/parkha with these lookup tables")
+    p.add_argument("--workers", type=positive_int, default=1, help="Format batches in N processes (text formats)")
+    p.add_argument(
+        "--chunk-size",
+        type=positive_int,
+        default=65536,
+        help="Years per work unit with --workers (default: 65536)",
+    )
+    p.add_argument(
+        "--unordered",
+        action="store_true",
+        help="With --workers, write chunks as they finish instead of in input order",
+    )
+
+
+@register_command(
+    "compile-lookups",
+    help="Compile the year_mewa_parkha.csv lookup into its binary (mmap) form",
+    handler=cmd_compile_lookups,
+)
+def _configure_compile_lookups(p: argparse.ArgumentParser) -> None:
+    p.add_argument(
+        "--lookups-dir",
+        default=None,
+        help="Directory holding year_mewa_parkha.csv (default: the engines lookups dir)",
+    )
+
+
+_COHORT_FIELDS = ("animal", "element", "mewa", "parkha", "polarity")
+
+
+@register_command(
+    "cohort",
+    help="Stream a CSV/JSONL of birth dates and aggregate Tibetan year attributes",
+    handler="orchestration.cohort:cmd_cohort",
+)
+def _configure_cohort(p: argparse.ArgumentParser) -> None:
+    p.add_argument("input", help="CSV (with header) or JSONL file")
+    p.add_argument("--field", default="birth_date", help="Column/key holding the date or year")
+    p.add_argument(
+        "--input-format",
+        choices=["csv", "jsonl"],
+        default=None,
+        help="Input format (default: from the file extension)",
+    )
+    p.add_argument("--workers", type=positive_int, default=1, help="Shard the file across N processes")
+    p.add_argument("--lookups-dir", default=None, help="Resolve mewa/parkha with these lookup tables")
+    p.add_argument(
+        "--crosstab",
+        action="append",
+        choices=[f"{a}:{b}" for a in _COHORT_FIELDS for b in _COHORT_FIELDS if a != b],
+        metavar="A:B",
+        help="Extra cross-tab between two of animal/element/mewa/parkha/polarity",
+    )
+
+
+@register_command(
+    "slice-a",
+    help="Print a Slice-A report (tools/tsurphu.py slice-a also persists and audits it)",
+    handler="orchestration.slice_a:cmd_slice_a",
+)
+def _configure_slice_a(p: argparse.ArgumentParser) -> None:
+    from orchestration.slice_a import add_slice_a_arguments
+
+    add_slice_a_arguments(p)
+    p.add_argument("--lookups-dir", default=None, help="Resolve mewa/parkha with these lookup tables")
+
+
+@register_command(
+    "serve",
+    help="Serve the subcommands as a JSON API over HTTP or a Unix socket",
+    handler="orchestration.serve:cmd_serve",
+)
+def _configure_serve(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    p.add_argument("--port", type=int, default=8765, help="TCP port (default: 8765; 0 = any free port)")
+    p.add_argument("--unix", default=None, metavar="PATH", help="Listen on a Unix socket instead of TCP")
+    p.add_argument("--lookups-dir", default=None, help="Lookup tables to keep warm (and watch) for requests")
+    p.add_argument(
+        "--data-dir",
+        default=None,
+        help="Directory that cohort requests may read their input from (default: cohort is not served)",
+    )
+    p.add_argument(
+        "--batch-window-ms",
+        type=float,
+        default=2.0,
+        help="How long to wait for concurrent tibetan-year requests to coalesce (default: 2)",
     )
-    p_ty.set_defaults(func=cmd_tibetan_year)
+    p.add_argument(
+        "--max-batch",
+        type=int,
+        default=65536,
+        help="Flush a coalesced batch early once it holds this many years (default: 65536)",
+    )
+    p.add_argument("--no-watch", action="store_true", help="Do not hot-reload lookup tables")
+
+
+@register_command(
+    "shell",
+    help="Interactive session with warm engines (same subcommands, per-command latency)",
+    handler="orchestration.shell:cmd_shell",
+)
+def _configure_shell(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--lookups-dir", default=None, help="Also warm these lookup tables at startup")
+    p.add_argument("--no-timing", action="store_true", help="Do not print the latency after each command")
+
+
+@register_command(
+    "bench",
+    help="Performance benchmarks (e.g. interpreter start-to-first-output)",
+    handler="orchestration.bench:cmd_bench",
+)
+def _configure_bench(p: argparse.ArgumentParser) -> None:
+    bench = p.add_subparsers(dest="bench", required=True)
+    st = bench.add_parser("startup", help="Cold/warm wall-clock of a CLI invocation plus -X importtime breakdown")
+    st.add_argument("--runs", type=int, default=10, help="Timed runs per mode (default: 10)")
+    st.add_argument("--top", type=int, default=15, help="Slowest imports to list (default: 15)")
+    st.add_argument(
+        "--max-warm-ms",
+        type=float,
+        default=None,
+        help="Exit with status 1 if the warm median exceeds this many milliseconds",
+    )
+    st.add_argument("--json", action="store_true", help="Output the measurements as JSON")
+    st.add_argument(
+        "argv",
+        nargs=argparse.REMAINDER,
+        help="CLI arguments to time (default: --help)",
+    )
+
 
+def build_parser(parser_class: type = argparse.ArgumentParser) -> argparse.ArgumentParser:
+    parser = parser_class(prog="tsurphu")
+    add_commands(parser.add_subparsers(dest="cmd", required=True))
     return parser
 
 
+def add_commands(sub, registry: Optional[Registry] = None) -> None:
+    """One subparser per registered command, dispatching through ``_LazyHandler``."""
+    for name, (help_text, configure, handler) in (_COMMANDS if registry is None else registry).items():
+        p = sub.add_parser(name, help=help_text)
+        configure(p)
+        p.set_defaults(func=_LazyHandler(handler))
+
+
 def main(argv=None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
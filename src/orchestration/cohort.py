@@ -0,0 +1,229 @@
+"""
+Streaming cohort aggregation over birth-date datasets (CSV or JSONL).
+
+Rows are reduced in a single pass to a count per Tibetan year (Losar-aware),
+so memory stays bounded by the number of distinct years, not the number of
+rows. Histograms and cross-tabs are expanded from those counts at the end,
+computing each Tibetan year once.
+
+With ``workers > 1`` the input is sharded by byte ranges aligned to line
+boundaries, so it assumes one record per line (no embedded newlines).
+"""
+
+import argparse
+import csv
+import datetime as dt
+import json
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from engines.losar import tibetan_year_number
+from engines.tibetan_year import tibetan_year
+from engines.year_mewa_parkha import year_polarity_from_stem_index
+from orchestration.parallel import run_chunks
+
+FIELDS = ("animal", "element", "mewa", "parkha", "polarity")
+DEFAULT_CROSSTABS: Tuple[Tuple[str, str], ...] = (
+    ("animal", "element"),
+    ("element", "polarity"),
+    ("mewa", "parkha"),
+)
+_MEMO_MAX = 1 << 16
+
+
+def detect_format(path: Path) -> str:
+    return "jsonl" if Path(path).suffix.lower() in (".jsonl", ".ndjson") else "csv"
+
+
+def _tibetan_year_of(value: Any) -> int:
+    """Tibetan year number for an ISO date (Losar-adjusted) or a bare year."""
+    if isinstance(value, int):
+        return value
+    text = str(value).strip()
+    if len(text) <= 5 and text.lstrip("-").isdigit():
+        return int(text)
+    return tibetan_year_number(dt.date.fromisoformat(text[:10]))
+
+
+def _iter_lines(path: Path, start: int, end: int) -> Iterable[bytes]:
+    """Lines that *start* inside [start, end)."""
+    with Path(path).open("rb") as f:
+        if start > 0:
+            f.seek(start - 1)
+            pos = start - 1 + len(f.readline())
+        else:
+            pos = 0
+        while pos < end:
+            line = f.readline()
+            if not line:
+                break
+            pos += len(line)
+            yield line
+
+
+def _count_range(
+    path: Path,
+    fmt: str,
+    field: str,
+    column: Optional[int],
+    start: int,
+    end: int,
+) -> Tuple[Counter, int, int]:
+    years: Counter = Counter()
+    rows = invalid = 0
+
+    if fmt == "csv":
+        lines = (line.decode("utf-8") for line in _iter_lines(path, start, end))
+        values = (rec[column] if column is not None and len(rec) > column else None for rec in csv.reader(lines))
+    else:
+        def _jsonl_values():
+            for line in _iter_lines(path, start, end):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line).get(field)
+                except (ValueError, AttributeError):
+                    yield None
+        values = _jsonl_values()
+
+    # Birth dates repeat a lot: memoize value -> year (bounded, cleared when full)
+    memo: Dict[Any, int] = {}
+    for value in values:
+        rows += 1
+        if not isinstance(value, (str, int)) or value == "":
+            invalid += 1
+            continue
+        year = memo.get(value)
+        if year is None:
+            try:
+                year = _tibetan_year_of(value)
+            except (ValueError, TypeError):
+                invalid += 1
+                continue
+            if len(memo) >= _MEMO_MAX:
+                memo.clear()
+            memo[value] = year
+        years[year] += 1
+
+    return years, rows, invalid
+
+
+def _count_shard(shard: Tuple[Path, str, str, Optional[int], int, int]) -> Tuple[Counter, int, int]:
+    return _count_range(*shard)
+
+
+def _read_header(path: Path, field: str) -> Tuple[int, Optional[int]]:
+    """(byte offset where data starts, column index of ``field``) for a CSV file."""
+    with Path(path).open("rb") as f:
+        first = f.readline()
+    header = next(csv.reader([first.decode("utf-8-sig")]), [])
+    column = header.index(field) if field in header else None
+    return len(first), column
+
+
+def shard_ranges(start: int, end: int, shards: int) -> List[Tuple[int, int]]:
+    shards = max(1, min(shards, end - start or 1))
+    step = (end - start) // shards or 1
+    bounds = [start + i * step for i in range(shards)] + [end]
+    return [(bounds[i], bounds[i + 1]) for i in range(shards)]
+
+
+def count_tibetan_years(
+    path: Path,
+    *,
+    field: str = "birth_date",
+    fmt: Optional[str] = None,
+    workers: int = 1,
+) -> Tuple[Counter, int, int]:
+    """Single pass over ``path``: (Counter of Tibetan years, rows, invalid rows)."""
+    path = Path(path)
+    fmt = fmt or detect_format(path)
+    size = os.path.getsize(path)
+    data_start, column = _read_header(path, field) if fmt == "csv" else (0, None)
+    if fmt == "csv" and column is None:
+        raise ValueError(f"{path}: column {field!r} not found in header")
+
+    ranges = shard_ranges(data_start, size, workers)
+    if len(ranges) == 1:
+        return _count_range(path, fmt, field, column, *ranges[0])
+
+    # Counts merge commutatively: take shards in completion order
+    total: Counter = Counter()
+    rows = invalid = 0
+    shards = [(path, fmt, field, column, s, e) for s, e in ranges]
+    for years, r, bad in run_chunks(_count_shard, shards, workers=len(ranges), ordered=False):
+        total.update(years)
+        rows += r
+        invalid += bad
+    return total, rows, invalid
+
+
+def summarize(
+    years: Counter,
+    *,
+    lookups_dir: Optional[Path] = None,
+    crosstabs: Sequence[Tuple[str, str]] = DEFAULT_CROSSTABS,
+) -> Dict[str, Any]:
+    """Expand per-year counts into histograms and cross-tabs."""
+    histograms: Dict[str, Counter] = {name: Counter() for name in FIELDS}
+    tabs: Dict[Tuple[str, str], Dict[str, Counter]] = {pair: {} for pair in crosstabs}
+
+    for year, n in years.items():
+        ty = tibetan_year(year, lookups_dir=lookups_dir)
+        attrs = {
+            "animal": ty.animal,
+            "element": ty.element,
+            "mewa": str(ty.mewa),
+            "parkha": ty.parkha,
+            "polarity": year_polarity_from_stem_index(ty.stem_index),
+        }
+        for name in FIELDS:
+            histograms[name][attrs[name]] += n
+        for a, b in crosstabs:
+            tabs[(a, b)].setdefault(attrs[a], Counter())[attrs[b]] += n
+
+    return {
+        "histograms": {name: dict(c) for name, c in histograms.items()},
+        "crosstabs": {f"{a}/{b}": {k: dict(v) for k, v in t.items()} for (a, b), t in tabs.items()},
+    }
+
+
+def aggregate_cohort(
+    path: Path,
+    *,
+    field: str = "birth_date",
+    fmt: Optional[str] = None,
+    workers: int = 1,
+    lookups_dir: Optional[Path] = None,
+    crosstabs: Sequence[Tuple[str, str]] = DEFAULT_CROSSTABS,
+) -> Dict[str, Any]:
+    years, rows, invalid = count_tibetan_years(path, field=field, fmt=fmt, workers=workers)
+    out = {"rows": rows, "invalid": invalid}
+    out.update(summarize(years, lookups_dir=lookups_dir, crosstabs=crosstabs))
+    return out
+
+
+def crosstabs_from_specs(specs: Optional[Sequence[str]]) -> List[Tuple[str, str]]:
+    """DEFAULT_CROSSTABS plus each extra "a:b" spec, without duplicates."""
+    crosstabs = list(DEFAULT_CROSSTABS)
+    for spec in specs or []:
+        a, _, b = spec.partition(":")
+        if (a, b) not in crosstabs:
+            crosstabs.append((a, b))
+    return crosstabs
+
+
+def cmd_cohort(args: argparse.Namespace) -> int:
+    crosstabs = crosstabs_from_specs(args.crosstab)
+    result = aggregate_cohort(
+        Path(args.input),
+        field=args.field,
+        fmt=args.input_format,
+        workers=args.workers,
+        lookups_dir=Path(args.lookups_dir) if args.lookups_dir else None,
+        crosstabs=crosstabs,
+    )
+    print(json.dumps(result, ensure_ascii=False, indent=2, sort_keys=True))
+    return 0
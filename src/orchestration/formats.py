@@ -0,0 +1,194 @@
+"""
+Output formats for engine results (``tibetan-year --format ...``).
+
+Text formats stream one record at a time:
+
+* ``repr`` / ``json``: the historical outputs (``json`` is pretty for a single
+  year and JSON Lines for batches);
+* ``jsonl``: always one JSON object per line;
+* ``csv``: header plus one row per year, same values as the JSON output.
+
+Binary formats write typed columns computed in one ``tibetan_years`` pass, with
+no per-row objects, so analytics can map them without parsing:
+
+* ``npy``: a NumPy ``.npy`` (v1.0) file holding one structured array with
+  fields gregorian_year ``<i2`` and stem_index, branch_index, mewa, parkha
+  ``u1``; ``numpy.load(path, mmap_mode="r")`` reads it. Written without
+  NumPy. Parkha codes index the names in the sidecar ``<stem>.parkha.txt``
+  (UTF-8, one name per line; ``parkha_names_path`` / ``read_parkha_names``):
+  the table can grow with names from lookup files, so it travels with the data.
+* ``columnar-bin``: column-major file; each column is contiguous and 8-byte
+  aligned, so ``numpy.frombuffer(buf, dtype, count=rows, offset=offset)`` or
+  ``read_columnar`` maps it. Layout (little-endian)::
+
+      header   <8sHHQI   magic b"TSUCOL1\\0", version, ncols, nrows, names_len
+      columns  <16s4sQ   name, numpy dtype str, byte offset   (ncols times)
+      names    names_len bytes: parkha names, UTF-8, "\\n"-separated
+      data     columns at their offsets
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, BinaryIO, List, Tuple
+
+TEXT_FORMATS = ("repr", "json", "jsonl", "csv")
+BINARY_FORMATS = ("npy", "columnar-bin")
+FORMATS = TEXT_FORMATS + BINARY_FORMATS
+
+COLUMNAR_MAGIC = b"TSUCOL1\0"
+COLUMNAR_VERSION = 1
+_HEADER = struct.Struct("<8sHHQI")
+_COLUMN = struct.Struct("<16s4sQ")
+
+# (column, numpy dtype, array typecode)
+COLUMNS: Tuple[Tuple[str, str, str], ...] = (
+    ("gregorian_year", "<i2", "h"),
+    ("stem_index", "|u1", "B"),
+    ("branch_index", "|u1", "B"),
+    ("mewa", "|u1", "B"),
+    ("parkha", "|u1", "B"),
+)
+_RECORD_SIZE = 6
+
+
+def _align(n: int, to: int) -> int:
+    return (n + to - 1) // to * to
+
+
+def _int16_le(col: Any) -> bytes:
+    if hasattr(col, "astype"):
+        if len(col) and (int(col.min()) < -32768 or int(col.max()) > 32767):
+            raise ValueError("gregorian_year out of int16 range for binary output")
+        return col.astype("<i2").tobytes()
+    try:
+        a = array("h", col)
+    except OverflowError:
+        raise ValueError("gregorian_year out of int16 range for binary output") from None
+    if sys.byteorder == "big":
+        a.byteswap()
+    return a.tobytes()
+
+
+def _column_bytes(columns: Any, name: str) -> bytes:
+    col = getattr(columns, name)
+    if name == "gregorian_year":
+        return _int16_le(col)
+    return bytes(col)
+
+
+def npy_header(descr: Any, shape: Tuple[int, ...]) -> bytes:
+    """Magic, version 1.0 and a header padded so the data starts 64-byte aligned."""
+    text = f"{{'descr': {descr!r}, 'fortran_order': False, 'shape': {shape!r}, }}"
+    size = _align(10 + len(text) + 1, 64) - 10
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", size) + (text.ljust(size - 1) + "\n").encode("latin-1")
+
+
+def write_npy(columns: Any, f: BinaryIO) -> int:
+    """Structured .npy of ``columns`` (a TibetanYearColumns); returns bytes written."""
+    n = len(columns)
+    descr = [(name, dtype) for name, dtype, _ in COLUMNS]
+    header = npy_header(descr, (n,))
+
+    # Interleave the columns into packed 6-byte records
+    records = bytearray(_RECORD_SIZE * n)
+    year = _int16_le(columns.gregorian_year)
+    records[0::_RECORD_SIZE] = year[0::2]
+    records[1::_RECORD_SIZE] = year[1::2]
+    for pos, (name, _, _) in enumerate(COLUMNS[1:], start=2):
+        records[pos::_RECORD_SIZE] = _column_bytes(columns, name)
+
+    f.write(header)
+    f.write(records)
+    return len(header) + len(records)
+
+
+def parkha_names_path(npy_path: Path) -> Path:
+    """Sidecar with the parkha names of an ``npy`` output: ``years.npy`` -> ``years.parkha.txt``."""
+    return Path(npy_path).with_suffix(".parkha.txt")
+
+
+def write_parkha_names(columns: Any, path: Path) -> None:
+    Path(path).write_bytes("\n".join(columns.parkha_names).encode("utf-8") + b"\n")
+
+
+def read_parkha_names(npy_path: Path) -> Tuple[str, ...]:
+    """Parkha names for the codes of an ``npy`` output (code = position)."""
+    return tuple(parkha_names_path(npy_path).read_text(encoding="utf-8").splitlines())
+
+
+def write_columnar(columns: Any, f: BinaryIO) -> int:
+    """Column-major binary of ``columns`` (a TibetanYearColumns); returns bytes written."""
+    n = len(columns)
+    names = "\n".join(columns.parkha_names).encode("utf-8")
+    offset = _align(_HEADER.size + _COLUMN.size * len(COLUMNS) + len(names), 64)
+
+    descriptors, data = [], []
+    for name, dtype, _ in COLUMNS:
+        raw = _column_bytes(columns, name)
+        descriptors.append(_COLUMN.pack(name.encode("ascii"), dtype.encode("ascii"), offset))
+        data.append((offset, raw))
+        offset = _align(offset + len(raw), 8)
+
+    written = 0
+    for chunk in [_HEADER.pack(COLUMNAR_MAGIC, COLUMNAR_VERSION, len(COLUMNS), n, len(names)), *descriptors, names]:
+        f.write(chunk)
+        written += len(chunk)
+    for start, raw in data:
+        f.write(b"\0" * (start - written))
+        f.write(raw)
+        written = start + len(raw)
+    return written
+
+
+def read_columnar(path: Path):
+    """Map a columnar-bin file as a TibetanYearColumns backed by memoryviews (no copy)."""
+    from engines.tibetan_year_batch import TibetanYearColumns
+
+    with Path(path).open("rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, ncols, nrows, names_len = _HEADER.unpack_from(mm, 0)
+    if magic != COLUMNAR_MAGIC or version != COLUMNAR_VERSION:
+        raise ValueError(f"{path}: not a columnar-bin file (version {COLUMNAR_VERSION})")
+
+    typecodes = {dtype: code for _, dtype, code in COLUMNS}
+    view = memoryview(mm)
+    cols = {}
+    pos = _HEADER.size
+    for _ in range(ncols):
+        raw_name, raw_dtype, offset = _COLUMN.unpack_from(mm, pos)
+        pos += _COLUMN.size
+        dtype = raw_dtype.rstrip(b"\0").decode("ascii")
+        code = typecodes[dtype]
+        size = struct.calcsize(code)
+        cols[raw_name.rstrip(b"\0").decode("ascii")] = view[offset : offset + size * nrows].cast(code)
+    names = bytes(mm[pos : pos + names_len]).decode("utf-8")
+
+    return TibetanYearColumns(
+        gregorian_year=cols["gregorian_year"],
+        stem_index=cols["stem_index"],
+        branch_index=cols["branch_index"],
+        mewa=cols["mewa"],
+        parkha=cols["parkha"],
+        parkha_names=tuple(names.split("\n")) if names else (),
+    )
+
+
+def read_npy_header(f: BinaryIO) -> Tuple[Any, Tuple[int, ...], int]:
+    """(descr, shape, data offset) of a .npy v1.0 file written by ``write_npy``."""
+    import ast
+
+    prefix = f.read(10)
+    if prefix[:8] != b"\x93NUMPY\x01\x00":
+        raise ValueError("not a .npy v1.0 file")
+    (size,) = struct.unpack("<H", prefix[8:10])
+    header = ast.literal_eval(f.read(size).decode("latin-1"))
+    return header["descr"], tuple(header["shape"]), 10 + size
+
+
+def csv_header() -> List[str]:
+    from engines.tibetan_year import TibetanYear
+
+    return list(TibetanYear._fields)
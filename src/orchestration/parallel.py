@@ -0,0 +1,100 @@
+"""
+Shared work partitioning for batch subcommands.
+
+Inputs are split into chunks (``chunked`` / ``split_range``) and each chunk is
+handed to ``fn`` in a ``ProcessPoolExecutor`` (``run_chunks``). At most
+``workers * prefetch`` chunks are in flight, so streaming inputs (stdin, large
+files) stay bounded in memory. Results come back in input order (``ordered``)
+or as soon as each chunk finishes.
+
+Workers warm engine state once through the pool initializer
+(``warm_engines`` by default: Losar table and lookup indexes), instead of
+paying it on the first chunk each of them receives.
+
+``fn`` and the chunks must be picklable (module-level functions, lists,
+ranges, paths). With ``workers <= 1`` everything runs inline, with no pool.
+"""
+
+import itertools
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+DEFAULT_CHUNK_SIZE = 65536
+
+
+def chunked(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    if size < 1:
+        raise ValueError(f"chunk size must be at least 1: {size}")
+    it = iter(items)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def split_range(r: range, size: int) -> Iterator[range]:
+    if size < 1:
+        raise ValueError(f"chunk size must be at least 1: {size}")
+    for i in range(0, len(r), size):
+        yield r[i : i + size]
+
+
+def warm_engines(lookups_dir: Optional[Path] = None) -> None:
+    """Pool initializer: load the Losar table and lookup indexes in this process."""
+    from engines.lookup_cache import DEFAULT_LOOKUPS_DIR, warm_lookups
+    from engines.losar import losar_table
+
+    losar_table()
+    warm_lookups(DEFAULT_LOOKUPS_DIR)
+    if lookups_dir is not None:
+        warm_lookups(Path(lookups_dir))
+
+
+def run_chunks(
+    fn: Callable[[Any], R],
+    chunks: Iterable[Any],
+    *,
+    workers: int = 1,
+    ordered: bool = True,
+    initializer: Optional[Callable[..., None]] = warm_engines,
+    initargs: Sequence[Any] = (),
+    prefetch: int = 2,
+) -> Iterator[R]:
+    """Yield ``fn(chunk)`` for every chunk, fanned out to ``workers`` processes."""
+    if workers <= 1:
+        for chunk in chunks:
+            yield fn(chunk)
+        return
+
+    limit = max(1, workers * prefetch)
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=tuple(initargs))
+    try:
+        if ordered:
+            pending: deque = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(fn, chunk))
+                if len(pending) >= limit:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        else:
+            in_flight = set()
+            for chunk in chunks:
+                in_flight.add(pool.submit(fn, chunk))
+                if len(in_flight) >= limit:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        yield fut.result()
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    yield fut.result()
+    finally:
+        # Also reached when the consumer stops early or a chunk fails
+        pool.shutdown(wait=True, cancel_futures=True)
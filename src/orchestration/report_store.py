@@ -0,0 +1,294 @@
+"""
+Content-addressed, compressed store for Slice-A reports.
+
+A report's key is the SHA-256 of the canonical JSON (sorted keys, UTF-8,
+compact) of ``{"input": report["input"], "engine_version": ...}``: the same
+request under the same engine maps to the same key, so it is stored once and
+later runs only look it up (the first report, with its timestamp, is kept).
+
+Reports are zlib-compressed one by one and appended to segment files
+(``segments/seg-NNNNNN.z``, rotated at ``segment_bytes``); each record is
+``key (32 bytes) | length (<I) | codec (B) | data``, so the index can be
+rebuilt from the segments alone (``reindex``). Reports are small and alike,
+so codec 1 primes zlib with a fixed dictionary (``_ZDICT_V1``, a typical
+report): about 70 bytes per report instead of about 320 with plain zlib.
+Dictionaries are part of the format and never change; a new one gets a new
+codec number. The index is SQLite (``index.sqlite``):
+key -> segment, offset, length, plus name, engine version and creation time
+for listing. Reading a report is one B-tree lookup, one seek and one
+decompression; listing never touches the segments.
+
+Segments are append-only. Bytes are written before the index rows are
+committed, so a crash can only leave unindexed records (``reindex`` recovers
+them) or a torn last record, which is cut off before the next append.
+
+Several processes may write the same store: each batch takes an exclusive
+``flock`` on ``lock`` for the whole check-append-index step, and record
+offsets come from ``fstat`` of the segment under that lock, never from a
+cached file position. Readers take no lock.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:  # POSIX only; without it the store is single-writer
+    import fcntl
+except ImportError:  # pragma: no cover - depends on the platform
+    fcntl = None
+
+_CANON = json.JSONEncoder(sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode
+_RECORD = struct.Struct("<32sIB")
+DEFAULT_SEGMENT_BYTES = 64 << 20
+ZLIB_LEVEL = 6
+
+CODEC_ZLIB = 0
+CODEC_ZLIB_DICT_V1 = 1
+_ZDICT_V1 = (
+    '{"engine":{"tibetan_year_engine":"tibetan_year.py","version":"sliceA-0.3"},'
+    '"input":{"birth_date":"1990-11-02","birth_time":"20:30","name":"Demo","place":"Medellín"},'
+    '"interpretation":"Pipeline demo + año (animal/elemento) calculado. Mewa/Parkha aún por tabla validada.",'
+    '"sources_ref":[{"field":"element","layer":"algorithm"},{"field":"animal","layer":"algorithm"},'
+    '{"field":"mewa","layer":"algorithm"},{"field":"parkha","layer":"algorithm"}],'
+    '"tibetan":{"element":"Metal","mewa":3,"parkha":"Zin","year_animal":"Horse"},'
+    '"timestamp_utc":"2026-01-01T00:00:00Z"}'
+).encode("utf-8")
+
+
+def _compress(data: bytes) -> bytes:
+    c = zlib.compressobj(ZLIB_LEVEL, zdict=_ZDICT_V1)
+    return c.compress(data) + c.flush()
+
+
+def _decompress(codec: int, data: bytes) -> bytes:
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data)
+    if codec == CODEC_ZLIB_DICT_V1:
+        d = zlib.decompressobj(zdict=_ZDICT_V1)
+        return d.decompress(data) + d.flush()
+    raise ValueError(f"unknown report codec {codec}")
+
+
+def report_key(report: Dict[str, Any], engine_version: Optional[str] = None) -> str:
+    """Hex SHA-256 of (input, engine version); the version defaults to the report's own."""
+    if engine_version is None:
+        engine_version = report.get("engine", {}).get("version")
+    payload = {"input": report.get("input"), "engine_version": engine_version}
+    return hashlib.sha256(_CANON(payload).encode("utf-8")).hexdigest()
+
+
+class ReportStore:
+    def __init__(self, root: Path, *, segment_bytes: int = DEFAULT_SEGMENT_BYTES) -> None:
+        self.root = Path(root)
+        self.segments = self.root / "segments"
+        self.segments.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self._db = sqlite3.connect(os.fspath(self.root / "index.sqlite"))
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS reports ("
+            "key TEXT PRIMARY KEY, segment INTEGER NOT NULL, offset INTEGER NOT NULL, "
+            "length INTEGER NOT NULL, codec INTEGER NOT NULL, name TEXT, engine_version TEXT, created_utc TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS reports_name ON reports (name)")
+        self._db.commit()
+        self._lock_path = self.root / "lock"
+        # (segment, end) of the last tail this process checked: records up to
+        # ``end`` are complete, so the next batch only scans what came after
+        self._tail: Optional[Tuple[int, int]] = None
+
+    def _segment_path(self, n: int) -> Path:
+        return self.segments / f"seg-{n:06d}.z"
+
+    def _segment_numbers(self) -> List[int]:
+        return sorted(int(p.stem[4:]) for p in self.segments.glob("seg-*.z"))
+
+    def _scan_segment(self, n: int, start: int = 0) -> Iterator[Tuple[str, int, int, int]]:
+        # (key, offset, length, codec) of each complete record from ``start``; stops at a torn tail
+        path = self._segment_path(n)
+        size = path.stat().st_size
+        with path.open("rb") as f:
+            pos = start
+            f.seek(pos)
+            while pos + _RECORD.size <= size:
+                raw_key, length, codec = _RECORD.unpack(f.read(_RECORD.size))
+                if pos + _RECORD.size + length > size:
+                    return
+                yield raw_key.hex(), pos + _RECORD.size, length, codec
+                pos += _RECORD.size + length
+                f.seek(pos)
+
+    @contextmanager
+    def _locked(self):
+        with self._lock_path.open("a+b") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _open_tail(self):
+        # Last segment, opened for appending; call with the store lock held.
+        # A torn record left by a crash is cut off so appends stay parseable.
+        numbers = self._segment_numbers()
+        segment = numbers[-1] if numbers else 1
+        f = self._segment_path(segment).open("ab")
+        size = os.fstat(f.fileno()).st_size
+        start = 0
+        if self._tail is not None and self._tail[0] == segment and self._tail[1] <= size:
+            start = self._tail[1]
+        end = start
+        if size > start:
+            for _key, offset, length, _codec in self._scan_segment(segment, start):
+                end = offset + length
+        if size > end:
+            f.truncate(end)
+        return segment, f
+
+    # -- writing -----------------------------------------------------------
+
+    def put_many(self, reports: Iterable[Dict[str, Any]]) -> List[Tuple[str, bool]]:
+        """Store reports not already present; ``[(key, created)]`` in input order.
+
+        One lock, one index transaction and one flush for the whole batch.
+        """
+        pending = [(report_key(report), report) for report in reports]
+        out: List[Tuple[str, bool]] = []
+        rows = []
+        seen = set()
+        db = self._db
+        with self._locked():
+            segment, f = self._open_tail()
+            try:
+                size = os.fstat(f.fileno()).st_size
+                for key, report in pending:
+                    if key in seen or db.execute("SELECT 1 FROM reports WHERE key = ?", (key,)).fetchone():
+                        out.append((key, False))
+                        continue
+                    data = _compress(_CANON(report).encode("utf-8"))
+                    record = _RECORD.size + len(data)
+                    if size and size + record > self.segment_bytes:
+                        # Rotate: the next record would not fit in this segment
+                        f.close()
+                        segment += 1
+                        f = self._segment_path(segment).open("ab")
+                        size = os.fstat(f.fileno()).st_size
+                    f.write(_RECORD.pack(bytes.fromhex(key), len(data), CODEC_ZLIB_DICT_V1))
+                    f.write(data)
+                    seen.add(key)
+                    rows.append((
+                        key, segment, size + _RECORD.size, len(data), CODEC_ZLIB_DICT_V1,
+                        (report.get("input") or {}).get("name"),
+                        (report.get("engine") or {}).get("version"),
+                        report.get("timestamp_utc"),
+                    ))
+                    size += record
+                    out.append((key, True))
+                f.flush()
+            finally:
+                f.close()
+            self._tail = (segment, size)
+            if rows:
+                db.executemany("INSERT OR IGNORE INTO reports VALUES (?,?,?,?,?,?,?,?)", rows)
+                db.commit()
+        return out
+
+    def put(self, report: Dict[str, Any]) -> Tuple[str, bool]:
+        """Store ``report`` unless its key is present; ``(key, created)``."""
+        return self.put_many([report])[0]
+
+    # -- reading -----------------------------------------------------------
+
+    def resolve(self, prefix: str) -> Optional[str]:
+        """Full key for a unique key prefix (at least 4 hex digits), else None."""
+        prefix = prefix.lower()
+        if len(prefix) < 4:
+            return None
+        rows = self._db.execute(
+            "SELECT key FROM reports WHERE key >= ? AND key < ? LIMIT 2", (prefix, prefix + "g")
+        ).fetchall()
+        return rows[0][0] if len(rows) == 1 else None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._db.execute("SELECT segment, offset, length, codec FROM reports WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        segment, offset, length, codec = row
+        with self._segment_path(segment).open("rb") as f:
+            f.seek(offset)
+            return json.loads(_decompress(codec, f.read(length)))
+
+    def entries(self, *, limit: Optional[int] = None, name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Index rows, oldest first (no segment reads)."""
+        sql = "SELECT key, name, engine_version, created_utc, segment, length FROM reports"
+        params: List[Any] = []
+        if name is not None:
+            sql += " WHERE name = ?"
+            params.append(name)
+        sql += " ORDER BY rowid"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        cols = ("key", "name", "engine_version", "created_utc", "segment", "compressed_bytes")
+        return [dict(zip(cols, r)) for r in self._db.execute(sql, params)]
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        return self._db.execute("SELECT 1 FROM reports WHERE key = ?", (key,)).fetchone() is not None
+
+    # -- maintenance -------------------------------------------------------
+
+    def scan(self) -> Iterator[Tuple[str, int, int, int, int]]:
+        """(key, segment, offset, length, codec) of every complete record in the segments."""
+        for n in self._segment_numbers():
+            for key, offset, length, codec in self._scan_segment(n):
+                yield key, n, offset, length, codec
+
+    def reindex(self) -> int:
+        """Rebuild the index from the segments; returns the number of reports."""
+        with self._locked():
+            return self._reindex()
+
+    def _reindex(self) -> int:
+        rows = []
+        handles: Dict[int, Any] = {}
+        try:
+            for key, segment, offset, length, codec in self.scan():
+                f = handles.get(segment)
+                if f is None:
+                    f = handles[segment] = self._segment_path(segment).open("rb")
+                f.seek(offset)
+                report = json.loads(_decompress(codec, f.read(length)))
+                rows.append((
+                    key, segment, offset, length, codec,
+                    (report.get("input") or {}).get("name"),
+                    (report.get("engine") or {}).get("version"),
+                    report.get("timestamp_utc"),
+                ))
+        finally:
+            for f in handles.values():
+                f.close()
+        db = self._db
+        db.execute("DELETE FROM reports")
+        db.executemany("INSERT OR IGNORE INTO reports VALUES (?,?,?,?,?,?,?,?)", rows)
+        db.commit()
+        return len(self)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "ReportStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,166 @@
+"""
+JSON serialization of engine results for the CLI and the server.
+
+``serializer_for(cls)`` builds, once per result class, a function that turns an
+instance straight into its canonical JSON dict (keys sorted, ``element`` and
+``parkha`` lowercased), instead of probing every object for ``_asdict`` /
+dataclass / ``__dict__`` and normalizing the dict afterwards.
+
+Encoders:
+
+* ``pretty`` / ``line``: the established formats (``indent=2`` and one object
+  per line with the default separators). Always the stdlib encoder, so the
+  bytes never depend on which optional packages are installed.
+* ``get_encoder(name)``: compact single-line JSON (``,``/``:`` separators).
+  ``orjson`` or ``msgspec`` when available (``auto`` picks the first one
+  installed), otherwise the stdlib; all of them emit the same bytes for our
+  results (ints, strings, None).
+"""
+
+import json
+import sys
+import threading
+from typing import Any, Callable, Dict
+
+ENCODERS = ("auto", "orjson", "msgspec", "json")
+
+# Fields whose string values are lowercased in JSON output
+_LOWERCASE = frozenset(("element", "parkha"))
+_SCALARS = (str, int, float, bool, type(None))
+
+Serializer = Callable[[Any], Dict[str, Any]]
+
+_LOCK = threading.Lock()
+_SERIALIZERS: Dict[type, Serializer] = {}
+
+
+def _lower(value: Any) -> Any:
+    return value.lower() if isinstance(value, str) else value
+
+
+def _plain(value: Any) -> Any:
+    """Dataclass field values: scalars pass through, the rest as dataclasses.asdict would."""
+    if isinstance(value, _SCALARS):
+        return value
+    import copy
+    import dataclasses
+
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if isinstance(value, tuple) and hasattr(value, "_fields"):
+        return type(value)(*[_plain(v) for v in value])
+    if isinstance(value, (list, tuple)):
+        return type(value)(_plain(v) for v in value)
+    if isinstance(value, dict):
+        return type(value)((_plain(k), _plain(v)) for k, v in value.items())
+    return copy.deepcopy(value)
+
+
+def _compile(cls: type, fields, wrap: str) -> Serializer:
+    items = []
+    for name in sorted(fields):
+        expr = f"o.{name}"
+        if wrap:
+            expr = f"{wrap}({expr})"
+        if name in _LOWERCASE:
+            expr = f"_lower({expr})"
+        items.append(f"{name!r}: {expr}")
+    src = f"def to_json_dict(o):\n    return {{{', '.join(items)}}}\n"
+    namespace: Dict[str, Any] = {"_lower": _lower, "_plain": _plain}
+    exec(src, namespace)
+    fn = namespace["to_json_dict"]
+    fn.__qualname__ = f"to_json_dict[{cls.__qualname__}]"
+    return fn
+
+
+def _generic(obj: Any) -> Dict[str, Any]:
+    # Per-instance attributes cannot be precompiled
+    if hasattr(obj, "__dict__"):
+        data = dict(obj.__dict__)
+    else:
+        data = {"value": str(obj)}
+    for name in _LOWERCASE & data.keys():
+        data[name] = _lower(data[name])
+    return data
+
+
+def _build(cls: type) -> Serializer:
+    fields = getattr(cls, "_fields", None)
+    if isinstance(fields, tuple) and all(isinstance(f, str) and f.isidentifier() for f in fields):
+        return _compile(cls, fields, "")
+
+    # Only look at dataclasses if the module is loaded (otherwise cls cannot be one)
+    dataclasses = sys.modules.get("dataclasses")
+    if dataclasses is not None and dataclasses.is_dataclass(cls):
+        return _compile(cls, [f.name for f in dataclasses.fields(cls)], "_plain")
+
+    return _generic
+
+
+def serializer_for(cls: type) -> Serializer:
+    fn = _SERIALIZERS.get(cls)
+    if fn is None:
+        with _LOCK:
+            fn = _SERIALIZERS.get(cls)
+            if fn is None:
+                fn = _SERIALIZERS[cls] = _build(cls)
+    return fn
+
+
+def to_json_dict(obj: Any) -> Dict[str, Any]:
+    return serializer_for(type(obj))(obj)
+
+
+def pretty(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def line(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, sort_keys=True)
+
+
+def _stdlib_compact() -> Callable[[Any], str]:
+    encode = json.JSONEncoder(ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode
+    return encode
+
+
+def _orjson_compact() -> Callable[[Any], str]:
+    import orjson
+
+    dumps, opt = orjson.dumps, orjson.OPT_SORT_KEYS
+
+    def encode(data: Any) -> str:
+        return dumps(data, option=opt).decode("utf-8")
+
+    return encode
+
+
+def _msgspec_compact() -> Callable[[Any], str]:
+    import msgspec
+
+    raw = msgspec.json.Encoder(order="sorted").encode
+
+    def encode(data: Any) -> str:
+        return raw(data).decode("utf-8")
+
+    return encode
+
+
+_FACTORIES = {"orjson": _orjson_compact, "msgspec": _msgspec_compact, "json": _stdlib_compact}
+
+
+def get_encoder(name: str = "auto") -> Callable[[Any], str]:
+    """Compact single-line encoder. ``auto``: orjson, then msgspec, then stdlib."""
+    if name not in ENCODERS:
+        raise ValueError(f"unknown encoder: {name!r} (expected one of {', '.join(ENCODERS)})")
+    if name != "auto":
+        try:
+            return _FACTORIES[name]()
+        except ImportError:
+            raise RuntimeError(f"encoder {name!r} requested but it is not installed") from None
+    for candidate in ("orjson", "msgspec"):
+        try:
+            return _FACTORIES[candidate]()
+        except (ImportError, TypeError):
+            continue
+    return _stdlib_compact()
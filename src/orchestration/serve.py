@@ -0,0 +1,441 @@
+"""
+``tsurphu serve``: a long-lived JSON API over HTTP (TCP or Unix socket).
+
+Requests are parsed with the CLI's own ``build_parser``, so a subcommand and
+its flags mean the same thing in both places::
+
+    POST /v1/tibetan-year   {"argv": ["1900..1910", "2025"]}
+    POST /v1/slice-a        {"argv": ["--birth-date", "1990-11-02"]}
+    GET  /health
+
+``cohort`` reads its input only from inside ``--data-dir`` (without it the
+endpoint answers 403) and always runs in the server process: ``--workers``
+is rejected, so a request cannot start a process pool. Requests use the
+server's own ``--lookups-dir``; a request cannot name another directory (the
+server would read it, may recompile a stale ``.bin`` into it, and would cache
+one index per directory). Flags an endpoint does not honour (``--output``,
+``--format``, ...) are a 400 rather than silently ignored.
+
+Lookups (and the Losar table) are loaded once at startup and, unless
+``--no-watch``, kept current by a LookupWatcher. Concurrent ``tibetan-year``
+requests are coalesced: they are queued for ``--batch-window-ms`` and resolved
+with one ``tibetan_years`` call per lookups directory.
+
+Only asyncio and the standard library are used; the HTTP support is the
+minimum a local client needs (Content-Length bodies, keep-alive).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from orchestration.cli import build_parser
+from orchestration.serializers import to_json_dict
+
+MAX_BODY_BYTES = 1 << 20
+MAX_LINE_BYTES = 1 << 16  # request line or one header (the StreamReader limit)
+MAX_HEADERS = 100
+MAX_YEARS_PER_REQUEST = 1_000_000
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+}
+
+
+# Flags each endpoint does not honour, with the value it always uses: a request
+# that sets one to anything else is a 400 (see TsurphuServer.dispatch)
+_FIXED_FLAGS: Dict[str, Dict[str, Any]] = {
+    "tibetan-year": {
+        "lookups_dir": None,
+        "output": None,
+        "format": None,
+        "compact": False,
+        "encoder": "auto",
+        "workers": 1,
+        "flush_every": None,
+        "chunk_size": 65536,
+        "unordered": False,
+    },
+    "slice-a": {"lookups_dir": None},
+    "cohort": {"lookups_dir": None, "workers": 1},
+}
+
+
+class RequestError(Exception):
+    def __init__(self, status: int, payload: Dict[str, Any]) -> None:
+        super().__init__(payload)
+        self.status = status
+        self.payload = payload
+
+
+class _RequestParser(argparse.ArgumentParser):
+    """ArgumentParser that reports to the client instead of printing and exiting."""
+
+    def print_help(self, file=None) -> None:
+        raise RequestError(200, {"help": self.format_help()})
+
+    def error(self, message: str) -> None:
+        raise RequestError(400, {"error": f"{self.prog}: {message}"})
+
+
+def _expand_years(tokens: List[tuple]) -> List[int]:
+    years: List[int] = []
+    for token in tokens:
+        if token[0] == "year":
+            years.append(token[1])
+        elif token[0] == "range":
+            lo, hi = token[1], token[2]
+            step = 1 if hi >= lo else -1
+            if abs(hi - lo) + 1 + len(years) > MAX_YEARS_PER_REQUEST:
+                raise RequestError(413, {"error": f"more than {MAX_YEARS_PER_REQUEST} years in one request"})
+            years.extend(range(lo, hi + step, step))
+        else:
+            raise RequestError(400, {"error": "'-' (stdin) is not available over the API"})
+    return years
+
+
+class _Batcher:
+    """Coalesces concurrent tibetan-year requests into batched engine calls."""
+
+    def __init__(self, *, window: float, max_batch: int, stats: Dict[str, int]) -> None:
+        self.window = window
+        self.max_batch = max_batch
+        self.stats = stats
+        self._pending: List[Tuple[Optional[Path], List[int], asyncio.Future]] = []
+        self._pending_years = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def submit(self, lookups_dir: Optional[Path], years: List[int]) -> List[Any]:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((lookups_dir, years, fut))
+        self._pending_years += len(years)
+        if self._pending_years >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending, self._pending_years = self._pending, [], 0
+        groups: Dict[Optional[Path], List[Tuple[List[int], asyncio.Future]]] = {}
+        for lookups_dir, years, fut in pending:
+            groups.setdefault(lookups_dir, []).append((years, fut))
+        for lookups_dir, items in groups.items():
+            task = asyncio.ensure_future(self._run(lookups_dir, items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, lookups_dir: Optional[Path], items: List[Tuple[List[int], asyncio.Future]]) -> None:
+        from engines.tibetan_year_batch import tibetan_years
+
+        years = [y for batch, _ in items for y in batch]
+        self.stats["batches"] += 1
+        self.stats["batched_requests"] += len(items)
+        self.stats["batched_years"] += len(years)
+        loop = asyncio.get_running_loop()
+        try:
+            cols = await loop.run_in_executor(None, lambda: tibetan_years(years, lookups_dir=lookups_dir))
+        except Exception as e:
+            for _, fut in items:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        start = 0
+        for batch, fut in items:
+            end = start + len(batch)
+            if not fut.done():
+                fut.set_result([cols.row(i) for i in range(start, end)])
+            start = end
+
+
+class TsurphuServer:
+    def __init__(
+        self,
+        *,
+        lookups_dir: Optional[Path] = None,
+        data_dir: Optional[Path] = None,
+        batch_window: float = 0.002,
+        max_batch: int = 65536,
+        watch: bool = True,
+    ) -> None:
+        self.lookups_dir = Path(lookups_dir) if lookups_dir else None
+        self.data_dir = Path(data_dir).resolve() if data_dir else None
+        self.watch = watch
+        self.parser = build_parser(_RequestParser)
+        self.stats = {"requests": 0, "errors": 0, "batches": 0, "batched_requests": 0, "batched_years": 0}
+        self.batcher = _Batcher(window=batch_window, max_batch=max_batch, stats=self.stats)
+        self._watcher = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        # subcommand -> coroutine(args) -> JSON payload; the rest of the CLI is not served
+        self.handlers: Dict[str, Callable[[argparse.Namespace], Any]] = {
+            "tibetan-year": self._tibetan_year,
+            "slice-a": self._slice_a,
+            "cohort": self._cohort,
+        }
+
+    # -- lifecycle -------------------------------------------------------
+
+    def warm(self) -> None:
+        from engines.lookup_cache import DEFAULT_LOOKUPS_DIR, warm_lookups
+        from engines.losar import losar_table
+
+        losar_table()
+        warm_lookups(DEFAULT_LOOKUPS_DIR)
+        if self.lookups_dir is not None:
+            warm_lookups(self.lookups_dir)
+            if self.watch:
+                from engines.lookup_watch import watch_lookups
+
+                self._watcher = watch_lookups(self.lookups_dir)
+
+    async def start(self, *, host: str = "127.0.0.1", port: int = 8765, unix: Optional[str] = None) -> None:
+        self.warm()
+        if unix is not None:
+            if os.path.exists(unix):
+                os.unlink(unix)
+            self._server = await asyncio.start_unix_server(self._handle, path=unix, limit=MAX_LINE_BYTES)
+        else:
+            self._server = await asyncio.start_server(self._handle, host=host, port=port, limit=MAX_LINE_BYTES)
+
+    @property
+    def address(self) -> str:
+        sock = self._server.sockets[0]
+        name = sock.getsockname()
+        if isinstance(name, str):
+            return f"unix:{name}"
+        return f"http://{name[0]}:{name[1]}"
+
+    async def serve_forever(self) -> None:
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    # -- handlers --------------------------------------------------------
+
+    async def _tibetan_year(self, args: argparse.Namespace) -> Dict[str, Any]:
+        years = _expand_years(args.years)
+        rows = await self.batcher.submit(self.lookups_dir, years)
+        return {"results": [to_json_dict(ty) for ty in rows]}
+
+    async def _slice_a(self, args: argparse.Namespace) -> Dict[str, Any]:
+        from orchestration.slice_a import report_from_args
+
+        lookups_dir = self.lookups_dir
+        loop = asyncio.get_running_loop()
+        try:
+            report = await loop.run_in_executor(None, lambda: report_from_args(args, lookups_dir=lookups_dir))
+        except ValueError as e:
+            raise RequestError(400, {"error": str(e)}) from None
+        return {"report": report}
+
+    def _data_path(self, name: str) -> Path:
+        if self.data_dir is None:
+            raise RequestError(403, {"error": "cohort is only served with serve --data-dir"})
+        path = (self.data_dir / name).resolve()
+        if not path.is_relative_to(self.data_dir):
+            raise RequestError(403, {"error": f"input must be inside the data directory: {name}"})
+        return path
+
+    async def _cohort(self, args: argparse.Namespace) -> Dict[str, Any]:
+        from orchestration.cohort import aggregate_cohort, crosstabs_from_specs
+
+        path = self._data_path(args.input)
+        crosstabs = crosstabs_from_specs(args.crosstab)
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(
+                None,
+                lambda: aggregate_cohort(
+                    path,
+                    field=args.field,
+                    fmt=args.input_format,
+                    workers=1,
+                    lookups_dir=self.lookups_dir,
+                    crosstabs=crosstabs,
+                ),
+            )
+        except (OSError, ValueError) as e:
+            raise RequestError(400, {"error": str(e)}) from None
+        return {"result": result}
+
+    # -- HTTP ------------------------------------------------------------
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        path = target.split("?", 1)[0].rstrip("/")
+        if path == "/health":
+            return 200, {"status": "ok", "stats": dict(self.stats)}
+        if not path.startswith("/v1/"):
+            raise RequestError(404, {"error": f"unknown path: {path}"})
+
+        cmd = path[len("/v1/"):]
+        if cmd not in self.handlers:
+            raise RequestError(404, {"error": f"not served: {cmd}", "served": sorted(self.handlers)})
+        if method != "POST":
+            raise RequestError(405, {"error": "use POST"})
+
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            raise RequestError(400, {"error": "body is not valid JSON"}) from None
+        argv = request.get("argv", []) if isinstance(request, dict) else None
+        if not isinstance(argv, list) or not all(isinstance(a, str) for a in argv):
+            raise RequestError(400, {"error": "'argv' must be a list of strings"})
+
+        args = self.parser.parse_args([cmd, *argv])
+        for dest, value in _FIXED_FLAGS.get(cmd, {}).items():
+            if getattr(args, dest) != value:
+                flag = "--" + dest.replace("_", "-")
+                raise RequestError(400, {"error": f"{flag} is not available over the API"})
+        return 200, await self.handlers[cmd](args)
+
+    async def _read_head(self, reader: asyncio.StreamReader) -> Optional[Tuple[List[str], Dict[str, str]]]:
+        # (request line parts, headers), or None at end of stream
+        try:
+            line = await reader.readline()
+            if not line:
+                return None
+            headers: Dict[str, str] = {}
+            while True:
+                h = await reader.readline()
+                if h in (b"\r\n", b"\n", b""):
+                    break
+                if len(headers) >= MAX_HEADERS:
+                    raise RequestError(431, {"error": f"more than {MAX_HEADERS} headers"})
+                k, _, v = h.decode("latin-1").partition(":")
+                headers[k.strip().lower()] = v.strip()
+        except ValueError:  # readline() re-raises asyncio.LimitOverrunError as ValueError
+            raise RequestError(431, {"error": f"request line or header longer than {MAX_LINE_BYTES} bytes"}) from None
+        return line.decode("latin-1").split(), headers
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any], keep_alive: bool) -> None:
+        if status >= 400:
+            self.stats["errors"] += 1
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            (
+                f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                "Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            ).encode("latin-1")
+            + data
+        )
+        await writer.drain()
+
+    async def _linger(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # After an error answer on a connection with unread input: half-close and
+        # discard what the client already sent, so closing does not reset the
+        # connection and drop the response before the client reads it
+        if writer.can_write_eof():
+            writer.write_eof()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + 1.0
+        discarded = 0
+        try:
+            while discarded <= MAX_BODY_BYTES:
+                chunk = await asyncio.wait_for(reader.read(1 << 16), max(0.0, deadline - loop.time()))
+                if not chunk:
+                    break
+                discarded += len(chunk)
+        except (asyncio.TimeoutError, ValueError, ConnectionError):
+            pass
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await self._read_head(reader)
+                except RequestError as e:
+                    # The rest of the oversized line is still unread: answer and close
+                    await self._respond(writer, e.status, e.payload, False)
+                    await self._linger(reader, writer)
+                    break
+                if head is None:
+                    break
+                parts, headers = head
+                keep_alive = len(parts) == 3 and parts[2] == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                try:
+                    if len(parts) != 3:
+                        raise RequestError(400, {"error": "malformed request line"})
+                    raw_length = headers.get("content-length") or "0"
+                    if not (raw_length.isascii() and raw_length.isdigit()):
+                        keep_alive = False
+                        raise RequestError(400, {"error": f"invalid Content-Length: {raw_length!r}"})
+                    length = int(raw_length)
+                    if length > MAX_BODY_BYTES:
+                        keep_alive = False
+                        raise RequestError(413, {"error": f"body larger than {MAX_BODY_BYTES} bytes"})
+                    body = await reader.readexactly(length) if length else b""
+                    self.stats["requests"] += 1
+                    status, payload = await self.dispatch(parts[0], parts[1], body)
+                except RequestError as e:
+                    status, payload = e.status, e.payload
+                except Exception as e:  # keep serving; report the failure to this client
+                    status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    if status >= 400:
+                        await self._linger(reader, writer)
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    server = TsurphuServer(
+        lookups_dir=Path(args.lookups_dir) if args.lookups_dir else None,
+        data_dir=Path(args.data_dir) if args.data_dir else None,
+        batch_window=args.batch_window_ms / 1000.0,
+        max_batch=args.max_batch,
+        watch=not args.no_watch,
+    )
+    await server.start(host=args.host, port=args.port, unix=args.unix)
+    print(f"[serve] listening on {server.address}", file=sys.stderr, flush=True)
+    # SIGTERM shuts down like Ctrl-C (closing the server and removing the socket)
+    task = asyncio.ensure_future(server.serve_forever())
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+    except (NotImplementedError, RuntimeError):
+        pass
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await server.close()
+        if args.unix is not None and os.path.exists(args.unix):
+            os.unlink(args.unix)
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
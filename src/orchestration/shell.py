@@ -0,0 +1,164 @@
+"""
+``tsurphu shell``: an interactive session over the CLI subcommands.
+
+Every line is split with ``shlex`` and parsed by the CLI's ``build_parser``,
+so the grammar is exactly the command line's (``tibetan-year 1990..2000
+--json``). Engines and caches are warmed once at startup and stay loaded
+between commands; each command reports its wall-clock latency on stderr and
+``stats`` summarizes them.
+"""
+
+import argparse
+import cmd
+import shlex
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+from orchestration.cli import _COMMANDS, build_parser
+
+# Subcommands that take over the process do not nest inside the shell
+_NOT_IN_SHELL = ("shell", "serve")
+
+
+class _ParseExit(Exception):
+    pass
+
+
+class _ShellParser(argparse.ArgumentParser):
+    """Parse errors and -h print as usual but return to the prompt instead of exiting."""
+
+    def exit(self, status: int = 0, message: Optional[str] = None) -> None:
+        if message:
+            sys.stderr.write(message)
+        raise _ParseExit(status)
+
+
+class TsurphuShell(cmd.Cmd):
+    intro = "tsurphu shell: same subcommands as the CLI; 'help', 'stats', 'timing on|off', 'exit'."
+    prompt = "tsurphu> "
+
+    def __init__(self, *, timing: bool = True, stdin=None, stdout=None) -> None:
+        super().__init__(stdin=stdin, stdout=stdout)
+        if stdin is not None:
+            self.use_rawinput = False
+        self.timing = timing
+        self.parser = build_parser(_ShellParser)
+        self.latencies: Dict[str, List[float]] = {}
+        self.last_status = 0
+
+    # -- subcommands -----------------------------------------------------
+
+    def default(self, line: str) -> bool:
+        try:
+            argv = shlex.split(line)
+        except ValueError as e:
+            print(f"[shell] {e}", file=sys.stderr)
+            self.last_status = 2
+            return False
+        if argv and argv[0] in _NOT_IN_SHELL:
+            print(f"[shell] '{argv[0]}' is not available inside the shell", file=sys.stderr)
+            self.last_status = 2
+            return False
+
+        try:
+            args = self.parser.parse_args(argv)
+        except _ParseExit as e:
+            self.last_status = e.args[0] if e.args else 2
+            return False
+
+        t0 = time.perf_counter()
+        try:
+            self.last_status = int(args.func(args) or 0)
+        except KeyboardInterrupt:
+            print("[shell] interrupted", file=sys.stderr)
+            self.last_status = 130
+        except Exception as e:  # keep the session (and its warm caches) alive
+            print(f"[shell] {args.cmd}: {type(e).__name__}: {e}", file=sys.stderr)
+            self.last_status = 1
+        elapsed = (time.perf_counter() - t0) * 1000.0
+        sys.stdout.flush()
+
+        self.latencies.setdefault(args.cmd, []).append(elapsed)
+        if self.timing:
+            print(f"[{args.cmd} {elapsed:.2f} ms, status {self.last_status}]", file=sys.stderr)
+        return False
+
+    def completenames(self, text: str, *ignored) -> List[str]:
+        names = [n for n in _COMMANDS if n not in _NOT_IN_SHELL] + ["exit", "help", "stats", "timing"]
+        return [n for n in names if n.startswith(text)]
+
+    def emptyline(self) -> bool:
+        return False  # cmd.Cmd would repeat the previous command
+
+    # -- shell builtins --------------------------------------------------
+
+    def do_help(self, arg: str) -> None:
+        """help [subcommand]: the CLI help, or one subcommand's."""
+        try:
+            self.parser.parse_args([arg.strip(), "-h"] if arg.strip() else ["-h"])
+        except _ParseExit:
+            pass
+
+    def do_stats(self, arg: str) -> None:
+        """stats: count and latency (median / max, ms) per subcommand this session."""
+        for name, samples in sorted(self.latencies.items()):
+            print(
+                f"{name:<16} n={len(samples):<5} median {statistics.median(samples):8.2f} ms"
+                f"  max {max(samples):8.2f} ms",
+                file=self.stdout,
+            )
+
+    def do_timing(self, arg: str) -> None:
+        """timing on|off: show the latency after each command."""
+        self.timing = arg.strip().lower() not in ("off", "0", "no")
+
+    def do_exit(self, arg: str) -> bool:
+        """exit: leave the shell."""
+        return True
+
+    do_quit = do_exit
+
+    def do_EOF(self, arg: str) -> bool:
+        if self.use_rawinput:
+            print(file=self.stdout)
+        return True
+
+
+def warm_shell(lookups_dir=None) -> None:
+    """Import every subcommand's modules and load engine caches up front."""
+    import importlib
+
+    from orchestration.parallel import warm_engines
+
+    for name, (_help, _configure, handler) in _COMMANDS.items():
+        if name not in _NOT_IN_SHELL and isinstance(handler, str):
+            importlib.import_module(handler.partition(":")[0])
+    for module in ("engines.tibetan_year_batch", "orchestration.formats", "orchestration.serializers"):
+        importlib.import_module(module)
+    warm_engines(lookups_dir)
+
+
+def cmd_shell(args: argparse.Namespace) -> int:
+    from pathlib import Path
+
+    t0 = time.perf_counter()
+    warm_shell(Path(args.lookups_dir) if args.lookups_dir else None)
+    interactive = sys.stdin.isatty()
+    shell = TsurphuShell(timing=not args.no_timing)
+    if interactive:
+        try:
+            import readline  # noqa: F401  (line editing and history for input())
+        except ImportError:
+            pass
+        print(f"[shell] engines warm in {(time.perf_counter() - t0) * 1000.0:.1f} ms", file=sys.stderr)
+    else:
+        shell.intro = None
+        shell.prompt = ""
+
+    try:
+        shell.cmdloop()
+    except KeyboardInterrupt:
+        print(file=sys.stderr)
+    return shell.last_status
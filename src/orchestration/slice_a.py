@@ -0,0 +1,164 @@
+"""
+Slice-A report construction, shared by the governance tool
+(``tools/tsurphu.py slice-a``, which persists the report and audits it), the
+``tsurphu slice-a`` subcommand and ``tsurphu serve`` (which only return it).
+
+Batches (``tools/tsurphu.py slice-a --input people.csv|jsonl``) stream people
+through ``iter_people`` and ``slice_a_batch``, which builds reports in chunks
+across worker processes (``orchestration.parallel``), in input order.
+"""
+
+import argparse
+import csv
+import datetime as dt
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+ENGINE_VERSION = "sliceA-0.3"
+
+
+def add_slice_a_arguments(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--name", default="Demo")
+    p.add_argument("--birth-date", default="1990-11-02")
+    p.add_argument("--birth-time", default="20:30")
+    p.add_argument("--place", default="Medellín")
+
+
+def add_slice_a_batch_arguments(p: argparse.ArgumentParser) -> None:
+    from orchestration.cli import positive_int
+
+    p.add_argument("--input", default=None, help="People file (CSV with a header, or JSONL): name, birth_date, birth_time, place")
+    p.add_argument("--workers", type=positive_int, default=1, help="Build reports in N processes")
+    p.add_argument("--chunk-size", type=positive_int, default=1024, help="People per work unit")
+    p.add_argument("--output", default=None, help="Output: a .jsonl file (one report per line) or a directory (one file per report)")
+
+
+PEOPLE_FIELDS = ("name", "birth_date", "birth_time", "place")
+
+
+def now_utc() -> str:
+    return dt.datetime.now(dt.timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+def build_slice_a_report(
+    name: str,
+    birth_date: str,
+    birth_time: str,
+    place: str,
+    *,
+    lookups_dir: Optional[Path] = None,
+    timestamp_utc: Optional[str] = None,
+) -> Dict[str, Any]:
+    from engines.lookup_cache import DEFAULT_LOOKUPS_DIR
+    from engines.losar import tibetan_year_number
+    from engines.tibetan_year import resolve_tibetan_year
+
+    # Tibetan year of birth_date (Losar-adjusted), with the layer behind each field
+    year = tibetan_year_number(dt.date.fromisoformat(birth_date))
+    ty, provenance = resolve_tibetan_year(year, lookups_dir=lookups_dir or DEFAULT_LOOKUPS_DIR)
+
+    return {
+        "timestamp_utc": timestamp_utc or now_utc(),
+        "input": {"name": name, "birth_date": birth_date, "birth_time": birth_time, "place": place},
+        "engine": {"version": ENGINE_VERSION, "tibetan_year_engine": "tibetan_year.py"},
+        "tibetan": {
+            "year_animal": ty.animal,
+            "element": ty.element,
+            "mewa": ty.mewa if ty.mewa is not None else "TBD",
+            "parkha": ty.parkha if ty.parkha is not None else "TBD",
+        },
+        "interpretation": "Pipeline demo + año (animal/elemento) calculado. Mewa/Parkha aún por tabla validada.",
+        "sources_ref": [{"field": field, "layer": layer} for field, layer in provenance.items()],
+    }
+
+
+def report_from_args(args: argparse.Namespace, *, lookups_dir: Optional[Path] = None) -> Dict[str, Any]:
+    return build_slice_a_report(
+        args.name,
+        args.birth_date,
+        args.birth_time,
+        args.place,
+        lookups_dir=lookups_dir,
+    )
+
+
+def cmd_slice_a(args: argparse.Namespace) -> int:
+    lookups_dir = Path(args.lookups_dir) if args.lookups_dir else None
+    print(json.dumps(report_from_args(args, lookups_dir=lookups_dir), ensure_ascii=False, indent=2))
+    return 0
+
+
+# Key of a people record that could not be read; slice_a_batch reports it as that row's error
+PERSON_ERROR = "_error"
+
+
+def iter_people(path: Path) -> Iterator[Dict[str, str]]:
+    """Stream people from a CSV (with header) or, for .jsonl/.ndjson, a JSON Lines file.
+
+    A JSONL line that is not valid JSON, or not an object, yields
+    ``{PERSON_ERROR: message}`` instead of stopping the batch.
+    """
+    path = Path(path)
+    with path.open("r", encoding="utf-8-sig", newline="") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            for lineno, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield {PERSON_ERROR: f"line {lineno}: invalid JSON: {e}"}
+                    continue
+                if not isinstance(row, dict):
+                    yield {PERSON_ERROR: f"line {lineno}: expected a JSON object, got {type(row).__name__}"}
+                    continue
+                yield {k: str(row.get(k) or "") for k in PEOPLE_FIELDS}
+        else:
+            for row in csv.DictReader(f):
+                yield {k: (row.get(k) or "").strip() for k in PEOPLE_FIELDS}
+
+
+# (record number, report or None, error or None)
+BatchResult = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+def _build_reports(job: Tuple[int, List[Dict[str, str]], Optional[Path]]) -> List[BatchResult]:
+    # Worker: one chunk of people -> reports (a bad row does not stop the chunk)
+    first, people, lookups_dir = job
+    out: List[BatchResult] = []
+    for n, person in enumerate(people, start=first):
+        if PERSON_ERROR in person:
+            out.append((n, None, person[PERSON_ERROR]))
+            continue
+        try:
+            report = build_slice_a_report(
+                person["name"], person["birth_date"], person["birth_time"], person["place"], lookups_dir=lookups_dir
+            )
+        except (KeyError, ValueError) as e:
+            out.append((n, None, f"{type(e).__name__}: {e}"))
+        else:
+            out.append((n, report, None))
+    return out
+
+
+def slice_a_batch(
+    people: Iterable[Dict[str, str]],
+    *,
+    workers: int = 1,
+    chunk_size: int = 1024,
+    lookups_dir: Optional[Path] = None,
+) -> Iterator[BatchResult]:
+    """Reports for ``people`` (numbered from 1), in input order."""
+    from orchestration.parallel import chunked, run_chunks, warm_engines
+
+    def jobs():
+        first = 1
+        for chunk in chunked(people, max(1, chunk_size)):
+            yield first, chunk, lookups_dir
+            first += len(chunk)
+
+    for results in run_chunks(
+        _build_reports, jobs(), workers=workers, initializer=warm_engines, initargs=(lookups_dir,)
+    ):
+        yield from results
@@ -0,0 +1,155 @@
+import json
+
+import pytest
+
+from governance.audit import AuditWriter
+from governance.audit_chain import (
+    GENESIS,
+    checkpoint_path_for,
+    entry_hash,
+    key_path_for,
+    tail_state,
+    verify_log,
+)
+
+
+@pytest.fixture(autouse=True)
+def _no_env_key(monkeypatch):
+    monkeypatch.delenv("TSURPHU_AUDIT_KEY", raising=False)
+
+
+def _write(log, n, start=0, **kwargs):
+    with AuditWriter(log, batch_size=7, flush_ms=0, chain=True, **kwargs) as w:
+        for i in range(start, start + n):
+            w.write({"timestamp_utc": "2026-01-01T00:00:00Z", "event": "e", "seq": i})
+
+
+def _entries(log):
+    return [json.loads(line) for line in log.read_text(encoding="utf-8").splitlines()]
+
+
+def test_entries_link_to_the_previous_hash(tmp_path):
+    log = tmp_path / "audit.jsonl"
+    _write(log, 5)
+    _write(log, 3, start=5)  # a new writer resumes the chain from the file tail
+    entries = _entries(log)
+    assert entries[0]["prev_hash"] == GENESIS
+    for prev, entry in zip(entries, entries[1:]):
+        assert entry["prev_hash"] == entry_hash(prev)
+    assert tail_state(log)[0] == entry_hash(entries[-1])
+    assert verify_log(log)["errors"] == []
+
+
+def test_legacy_prefix_then_chain(tmp_path):
+    log = tmp_path / "audit.jsonl"
+    log.write_text('{"event": "old"}\n{"event": "older"}\n', encoding="utf-8")
+    _write(log, 2)
+    entries = _entries(log)
+    assert entries[2]["prev_hash"] == entry_hash(entries[1])
+    assert verify_log(log)["errors"] == []
+
+    with log.open("a", encoding="utf-8") as f:
+        f.write('{"event": "unchained"}\n')
+    assert any("sin prev_hash" in e for e in verify_log(log)["errors"])
+
+
+def test_checkpoints_limit_verification_to_the_tail(tmp_path):
+    log = tmp_path / "audit.jsonl"
+    _write(log, 23, checkpoint_every=10)
+    checkpoints = checkpoint_path_for(log).read_text(encoding="utf-8").splitlines()
+    assert len(checkpoints) == 1  # commits at 7, 14 (checkpoint), 21, 23 entries
+    assert key_path_for(log).exists()
+
+    result = verify_log(log)
+    assert result["errors"] == []
+    assert result["checkpoint"]["offset"] == result["start"]
+    assert result["entries"] == 23 - 14
+    full = verify_log(log, full=True)
+    assert full["errors"] == [] and full["entries"] == 23
+
+
+def test_short_lived_writers_still_checkpoint(tmp_path):
+    log = tmp_path / "audit.jsonl"
+    for i in range(25):  # one writer per CLI command
+        _write(log, 1, start=i, checkpoint_every=10)
+    checkpoints = [json.loads(line) for line in checkpoint_path_for(log).read_text(encoding="utf-8").splitlines()]
+    assert len(checkpoints) == 2
+    result = verify_log(log)
+    assert result["errors"] == []
+    assert result["entries"] == 5
+
+
+
+def test_interleaved_writers_keep_one_chain(tmp_path):
+    log = tmp_path / "audit.jsonl"
+    a = AuditWriter(log, flush_ms=0, chain=True, checkpoint_every=3)
+    b = AuditWriter(log, flush_ms=0, chain=True, checkpoint_every=3)
+    with a, b:
+        for i in range(5):
+            a.write_many([{"event": "a", "seq": i}])
+            b.write_many([{"event": "b", "seq": i}, {"event": "b", "seq": i}])
+    assert [e["event"] for e in _entries(log)] == ["a", "b", "b"] * 5
+    full = verify_log(log, full=True)
+    assert full["errors"] == [] and full["entries"] == 15
+    result = verify_log(log)
+    assert result["errors"] == [] and result["checkpoint"] is not None
+
+
+def _write_in_process(log, start):
+    _write(log, 40, start=start, checkpoint_every=10)
+
+
+def test_concurrent_processes_keep_one_chain(tmp_path):
+    import multiprocessing
+
+    log = tmp_path / "audit.jsonl"
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_write_in_process, args=(log, start)) for start in (0, 100, 200, 300)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    assert [p.exitcode for p in procs] == [0] * 4
+    assert sorted(e["seq"] for e in _entries(log)) == [s + i for s in (0, 100, 200, 300) for i in range(40)]
+    full = verify_log(log, full=True)
+    assert full["errors"] == [] and full["entries"] == 160
+    assert verify_log(log)["errors"] == []
+
+
+def test_tampering_is_detected(tmp_path):
+    log = tmp_path / "audit.jsonl"
+    _write(log, 23, checkpoint_every=10)
+    lines = log.read_text(encoding="utf-8").splitlines(keepends=True)
+
+    # Tail edit: caught by the incremental check
+    tampered = lines[:-2] + [lines[-2].replace('"seq": 21', '"seq": 99'), lines[-1]]
+    log.write_text("".join(tampered), encoding="utf-8")
+    assert any("cadena rota" in e for e in verify_log(log)["errors"])
+
+    # Edit of the checkpointed entry itself (same length)
+    tampered = list(lines)
+    tampered[13] = lines[13].replace('"seq": 13', '"seq": 98')
+    log.write_text("".join(tampered), encoding="utf-8")
+    assert any("checkpoint cambió" in e for e in verify_log(log)["errors"])
+
+    # Edit before the last checkpoint: only --full rehashes it
+    tampered = list(lines)
+    tampered[3] = lines[3].replace('"seq": 3', '"seq": 7')
+    log.write_text("".join(tampered), encoding="utf-8")
+    assert verify_log(log)["errors"] == []
+    assert verify_log(log, full=True)["errors"]
+
+    # Forged checkpoint signature
+    log.write_text("".join(lines), encoding="utf-8")
+    cps = checkpoint_path_for(log)
+    cps.write_text(cps.read_text(encoding="utf-8").replace('"offset": ', '"offset": 1'), encoding="utf-8")
+    assert any("firma de checkpoint inválida" in e for e in verify_log(log)["errors"])
+
+
+def test_env_key_is_used(tmp_path, monkeypatch):
+    monkeypatch.setenv("TSURPHU_AUDIT_KEY", "secret")
+    log = tmp_path / "audit.jsonl"
+    _write(log, 10, checkpoint_every=5)
+    assert not key_path_for(log).exists()
+    assert verify_log(log)["errors"] == []
+    assert verify_log(log, key=b"other")["errors"]
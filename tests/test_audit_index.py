@@ -0,0 +1,84 @@
+import json
+
+from governance.audit import AuditWriter
+from governance.audit_index import AuditIndex, index_path_for
+
+
+def _entry(i, day="2026-01-01"):
+    return {
+        "timestamp_utc": f"{day}T00:00:{i % 60:02d}Z",
+        "event": "changeset_created" if i % 3 == 0 else "sliceA_report_created",
+        "change_id": f"CS-{i}",
+        "report_file": f"/reports/r{i % 5}.json",
+        "seq": i,
+    }
+
+
+def _append(path, entries):
+    with path.open("a", encoding="utf-8") as f:
+        for e in entries:
+            f.write(json.dumps(e, ensure_ascii=False) + "\n")
+
+
+def test_query_filters_match_a_full_scan(tmp_path):
+    log = tmp_path / "audit.jsonl"
+    entries = [_entry(i, day="2026-01-0%d" % (1 + i % 4)) for i in range(200)]
+    _append(log, entries)
+    with AuditIndex(log) as idx:
+        assert idx.update() == 200
+        assert [e["seq"] for e in idx.query(event="changeset_created")] == [
+            e["seq"] for e in entries if e["event"] == "changeset_created"
+        ]
+        assert [e["seq"] for e in idx.query(change_id="CS-42")] == [42]
+        hits = list(idx.query(report_file="/reports/r1.json", since="2026-01-02", until="2026-01-03"))
+        assert [e["seq"] for e in hits] == [
+            e["seq"] for e in entries
+            if e["report_file"] == "/reports/r1.json" and "2026-01-02" <= e["timestamp_utc"][:10] <= "2026-01-03"
+        ]
+        assert len(list(idx.query(day="2026-01-04", limit=3))) == 3
+
+
+def test_incremental_update_skips_partial_line(tmp_path):
+    log = tmp_path / "audit.jsonl"
+    _append(log, [_entry(0), _entry(1)])
+    with AuditIndex(log) as idx:
+        assert idx.update() == 2
+        assert idx.update() == 0
+        with log.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(_entry(2)) + "\n" + '{"event": "half')
+        assert idx.update() == 1
+        with log.open("a", encoding="utf-8") as f:
+            f.write('way"}\n')
+        assert idx.update() == 1
+        assert [e["event"] for e in idx.query(event="halfway")] == ["halfway"]
+        assert idx.count() == 4
+
+
+def test_rewritten_log_is_reindexed(tmp_path):
+    log = tmp_path / "audit.jsonl"
+    _append(log, [_entry(i) for i in range(10)])
+    with AuditIndex(log) as idx:
+        idx.update()
+    log.write_text("", encoding="utf-8")
+    _append(log, [_entry(100)])
+    with AuditIndex(log) as idx:
+        assert [e["seq"] for e in idx.query()] == [100]
+    # Same size, different content
+    log.write_text(json.dumps(_entry(200)) + "\n", encoding="utf-8")
+    with AuditIndex(log) as idx:
+        assert [e["seq"] for e in idx.query()] == [200]
+        _append(log, [_entry(i) for i in range(300, 400)])
+        assert idx.update() == 100
+        assert idx.rebuild() == 101
+
+
+def test_writer_keeps_index_current(tmp_path):
+    log = tmp_path / "audit.jsonl"
+    with AuditWriter(log, batch_size=4, flush_ms=0, index=True) as w:
+        for i in range(10):
+            w.write(_entry(i))
+    assert index_path_for(log).exists()
+    with AuditIndex(log) as idx:
+        assert idx.count() == 10
+        assert idx.update() == 0
+        assert [e["seq"] for e in idx.query(change_id="CS-7")] == [7]
@@ -0,0 +1,78 @@
+import json
+import subprocess
+import sys
+import time
+
+import pytest
+
+from governance.audit import AuditWriter, bench_audit
+
+
+def _lines(path):
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_group_commit_every_n_events(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    with AuditWriter(path, batch_size=3, flush_ms=0) as w:
+        w.write({"seq": 0})
+        w.write({"seq": 1})
+        assert _lines(path) == []
+        w.write({"seq": 2})
+        assert [e["seq"] for e in _lines(path)] == [0, 1, 2]
+        w.write({"seq": 3})
+    assert [e["seq"] for e in _lines(path)] == [0, 1, 2, 3]
+
+
+def test_group_commit_after_interval(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    w = AuditWriter(path, batch_size=1000, flush_ms=10)
+    try:
+        w.write({"seq": 0})
+        deadline = time.monotonic() + 2
+        while not _lines(path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert _lines(path) == [{"seq": 0}]
+    finally:
+        w.close()
+
+
+def test_close_is_final_and_durability_is_checked(tmp_path):
+    with pytest.raises(ValueError):
+        AuditWriter(tmp_path / "x.jsonl", durability="sometimes")
+
+    w = AuditWriter(tmp_path / "x.jsonl", durability="fsync")
+    w.write({"a": 1})
+    w.close()
+    w.close()
+    with pytest.raises(ValueError):
+        w.write({"a": 2})
+
+
+def test_pending_entries_written_at_exit(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    code = (
+        "import sys\n"
+        "from governance.audit import audit_writer\n"
+        f"w = audit_writer({str(path)!r}, batch_size=1000, flush_ms=60000, durability='none')\n"
+        "for i in range(5):\n"
+        "    w.write({'seq': i})\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+    assert [e["seq"] for e in _lines(path)] == list(range(5))
+
+
+def test_bench_audit_runs():
+    result = bench_audit(200, batch_size=16)
+    assert set(result["runs"]) == {"open-per-event", "group-none", "group-flush", "group-fsync"}
+
+
+def test_write_many_is_one_group(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    with AuditWriter(path, batch_size=2, flush_ms=0) as w:
+        w.write({"seq": 0})
+        w.write_many({"seq": i} for i in range(1, 6))
+        assert [e["seq"] for e in _lines(path)] == list(range(6))
+        assert w.written == 6
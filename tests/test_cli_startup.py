@@ -0,0 +1,58 @@
+import json
+import subprocess
+import sys
+
+from orchestration import bench, cli
+
+
+def test_cli_help_does_not_import_engines():
+    code = (
+        "import sys\n"
+        "from orchestration import cli\n"
+        "try:\n"
+        "    cli.main(['--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(sorted(m for m in sys.modules if m.split('.')[0] in ('engines', 'dataclasses')))\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert proc.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_lazy_handler_imports_on_first_call(tmp_path, capsys):
+    csv_path = tmp_path / "people.csv"
+    csv_path.write_text("birth_date\n2025-06-01\n", encoding="utf-8")
+
+    rc = cli.main(["cohort", str(csv_path)])
+    assert rc == 0
+    assert json.loads(capsys.readouterr().out)["rows"] == 1
+
+
+def test_parse_importtime():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   _io\n"
+        "import time:      2500 |       3100 | orchestration.cli\n"
+        "unrelated line\n"
+    )
+    rows = bench.parse_importtime(stderr)
+    assert rows == [
+        {"module": "_io", "self_us": 120, "cumulative_us": 120},
+        {"module": "orchestration.cli", "self_us": 2500, "cumulative_us": 3100},
+    ]
+
+
+def test_bench_startup_json(capsys):
+    rc = cli.main(["bench", "startup", "--runs", "1", "--top", "3", "--json"])
+    assert rc == 0
+
+    result = json.loads(capsys.readouterr().out)
+    assert result["argv"] == ["--help"]
+    assert result["cold"]["runs"] == result["warm"]["runs"] == 1
+    assert len(result["imports"]["top"]) == 3
+
+
+def test_bench_startup_threshold(capsys):
+    rc = cli.main(["bench", "startup", "--runs", "1", "--max-warm-ms", "0"])
+    assert rc == 1
+    assert "exceeds --max-warm-ms" in capsys.readouterr().err
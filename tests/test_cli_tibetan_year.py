@@ -26,3 +26,36 @@ def test_cli_tibetan_year_json_output(capsys):
     assert data["branch_index"] == 5
     assert data["mewa"] == 5
     assert data["parkha"] == "khon"
+
+
+def test_cli_tibetan_year_batch_jsonl(capsys):
+    rc = cli.main(["tibetan-year", "2024..2026", "1984", "--json"])
+    assert rc == 0
+
+    lines = capsys.readouterr().out.splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [r["gregorian_year"] for r in records] == [2024, 2025, 2026, 1984]
+    assert records[1] == {
+        "gregorian_year": 2025,
+        "element": "wood",
+        "animal": "Snake",
+        "stem_index": 1,
+        "branch_index": 5,
+        "mewa": 5,
+        "parkha": "khon",
+    }
+
+
+def test_cli_tibetan_year_stdin(monkeypatch, capsys):
+    import io
+
+    monkeypatch.setattr("sys.stdin", io.StringIO("2025\n\nnope\n1984\n"))
+    rc = cli.main(["tibetan-year", "-"])
+    assert rc == 1
+
+    captured = capsys.readouterr()
+    out = captured.out.splitlines()
+    assert len(out) == 2
+    assert "gregorian_year=2025" in out[0]
+    assert "gregorian_year=1984" in out[1]
+    assert "nope" in captured.err
@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from orchestration import cli
+from orchestration.cohort import aggregate_cohort
+
+
+def _people_csv(path, n=300):
+    lines = ["name,birth_date"]
+    for i in range(n):
+        lines.append(f"p{i},{1950 + i % 70}-{1 + i % 12:02d}-15")
+    lines += ["bad,not-a-date", "empty,"]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def test_histograms_are_losar_aware(tmp_path):
+    src = tmp_path / "people.jsonl"
+    src.write_text(
+        json.dumps({"birth_date": "2024-02-09"}) + "\n" + json.dumps({"birth_date": "2024-02-10"}) + "\n",
+        encoding="utf-8",
+    )
+    result = aggregate_cohort(src)
+
+    assert result["rows"] == 2
+    assert result["histograms"]["animal"] == {"Rabbit": 1, "Dragon": 1}
+    assert result["crosstabs"]["animal/element"]["Dragon"] == {"Wood": 1}
+
+
+@pytest.mark.parametrize("workers", [2, 5])
+def test_sharded_run_matches_single_pass(tmp_path, workers):
+    src = tmp_path / "people.csv"
+    _people_csv(src)
+
+    single = aggregate_cohort(src)
+    sharded = aggregate_cohort(src, workers=workers)
+
+    assert single == sharded
+    assert single["rows"] == 302
+    assert single["invalid"] == 2
+    assert sum(single["histograms"]["polarity"].values()) == 300
+
+
+def test_cli_cohort(tmp_path, capsys):
+    src = tmp_path / "people.csv"
+    _people_csv(src, n=10)
+
+    assert cli.main(["cohort", str(src), "--crosstab", "parkha:polarity"]) == 0
+    data = json.loads(capsys.readouterr().out)
+    assert data["rows"] == 12
+    assert "parkha/polarity" in data["crosstabs"]
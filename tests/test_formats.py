@@ -0,0 +1,85 @@
+import csv
+import io
+import struct
+
+import pytest
+
+from engines.tibetan_year import tibetan_year
+from engines.tibetan_year_batch import tibetan_years
+from orchestration import cli, formats
+
+
+@pytest.mark.parametrize("backend", ["python", "numpy"])
+def test_npy_records_without_numpy_reader(backend):
+    if backend == "numpy":
+        pytest.importorskip("numpy")
+    buf = io.BytesIO()
+    formats.write_npy(tibetan_years(range(1999, 2003), backend=backend), buf)
+
+    buf.seek(0)
+    descr, shape, offset = formats.read_npy_header(buf)
+    assert shape == (4,)
+    assert offset % 64 == 0
+    assert [name for name, _ in descr] == [name for name, _, _ in formats.COLUMNS]
+
+    records = list(struct.iter_unpack("<hBBBB", buf.getvalue()[offset:]))
+    ty = tibetan_year(2001)
+    assert records[2][:4] == (2001, ty.stem_index, ty.branch_index, ty.mewa)
+
+
+def test_npy_loads_with_numpy(tmp_path):
+    np = pytest.importorskip("numpy")
+    path = tmp_path / "years.npy"
+    assert cli.main(["tibetan-year", "1900..2100", "--format", "npy", "--output", str(path)]) == 0
+
+    arr = np.load(path, mmap_mode="r")
+    names = formats.read_parkha_names(path)
+    assert formats.parkha_names_path(path) == tmp_path / "years.parkha.txt"
+    assert names[arr["parkha"][125]] == tibetan_year(2025).parkha
+    assert arr.shape == (201,)
+    assert arr.dtype["gregorian_year"] == np.dtype("<i2")
+    assert int(arr["gregorian_year"][125]) == 2025
+    assert int(arr["mewa"][125]) == tibetan_year(2025).mewa
+
+
+def test_columnar_roundtrip(tmp_path):
+    path = tmp_path / "years.bin"
+    assert cli.main(["tibetan-year", "1900..2100", "--format", "columnar-bin", "-o", str(path)]) == 0
+
+    cols = formats.read_columnar(path)
+    assert len(cols) == 201
+    assert list(cols.rows()) == [tibetan_year(y) for y in range(1900, 2101)]
+
+
+def test_columnar_rejects_years_outside_int16(tmp_path):
+    path = tmp_path / "years.bin"
+    assert cli.main(["tibetan-year", "40000", "--format", "columnar-bin", "-o", str(path)]) == 2
+    assert not path.exists()
+
+
+def test_cli_csv_output(capsys):
+    assert cli.main(["tibetan-year", "2024", "2025", "--format", "csv"]) == 0
+
+    rows = list(csv.DictReader(io.StringIO(capsys.readouterr().out)))
+    assert [r["gregorian_year"] for r in rows] == ["2024", "2025"]
+    assert rows[1]["element"] == "wood"
+    assert rows[1]["parkha"] == "khon"
+
+
+def test_cli_jsonl_single_year_is_one_line(capsys):
+    assert cli.main(["tibetan-year", "2025", "--format", "jsonl"]) == 0
+    assert len(capsys.readouterr().out.splitlines()) == 1
+
+
+def test_cli_json_conflicts_with_binary_format(capsys):
+    assert cli.main(["tibetan-year", "2025", "--json", "--format", "csv"]) == 2
+
+
+def test_cli_compact_conflicts_with_non_json_format(capsys):
+    assert cli.main(["tibetan-year", "2025", "--compact", "--format", "csv"]) == 2
+    assert "--compact conflicts" in capsys.readouterr().err
+
+
+def test_cli_npy_needs_output(capsys):
+    assert cli.main(["tibetan-year", "2025", "--format", "npy"]) == 2
+    assert "--output" in capsys.readouterr().err
@@ -0,0 +1,61 @@
+import os
+
+from governance.ledger import LedgerStore
+
+HEADER = "ObjectID,Nombre,Estrato_7x,Dueño,MetaAgent,Sensibilidad,Evidencia,Ruta\n"
+
+
+def _ledger(tmp_path, rows):
+    path = tmp_path / "object-ledger.csv"
+    path.write_text(HEADER + "".join(r + "\n" for r in rows), encoding="utf-8")
+    return path
+
+
+def test_lookups(tmp_path):
+    csv_path = _ledger(tmp_path, [
+        "TSU-OBJ-0001,Maestro,7x-L7,Zakik,editar,P1,doc,/docs/master.md",
+        "TSU-OBJ-0002,Ledger,7x-L7,Engineer,editar,P1,csv,docs/object-ledger.csv",
+        "TSU-OBJ-0003,Clínico,7x-L1,Zakik,editar,P2,doc,/docs/modes/clinical.md",
+    ])
+    with LedgerStore(csv_path, tmp_path / "ledger.sqlite") as ledger:
+        assert ledger.sync() is True
+        assert ledger.errors() == []
+        assert ledger.get("TSU-OBJ-0002")["Ruta"] == "/docs/object-ledger.csv"
+        assert ledger.get("TSU-OBJ-9999") is None
+        assert [r["ObjectID"] for r in ledger.by_path("docs/master.md")] == ["TSU-OBJ-0001"]
+        assert [r["ObjectID"] for r in ledger.by_owner("Zakik")] == ["TSU-OBJ-0001", "TSU-OBJ-0003"]
+
+
+def test_rebuilds_only_when_the_csv_changes(tmp_path):
+    csv_path = _ledger(tmp_path, ["A,a,b,c,d,e,f,/a"])
+    db = tmp_path / "ledger.sqlite"
+    with LedgerStore(csv_path, db) as ledger:
+        assert ledger.sync() is True
+    with LedgerStore(csv_path, db) as ledger:
+        assert ledger.sync() is False
+        st = csv_path.stat()
+        os.utime(csv_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        assert ledger.sync() is False  # same bytes
+        _ledger(tmp_path, ["A,a,b,c,d,e,f,/a", "A,x,b,c,d,e,f,/x", ",y,b,c,d,e,f,/y"])
+        assert ledger.sync() is True
+        assert ledger.errors() == ["Ledger L3: duplicado A", "Ledger L4: ObjectID vacío"]
+
+
+def test_check_refs(tmp_path):
+    csv_path = _ledger(tmp_path, [
+        "TSU-OBJ-0001,Maestro,7x-L7,Zakik,editar,P1,doc,/docs/master.md",
+        "TSU-OBJ-0021,Audit,7x-L7,Admin,leer,P2,logs,/src/audit/audit-log.jsonl",
+    ])
+    with LedgerStore(csv_path, tmp_path / "ledger.sqlite") as ledger:
+        ledger.sync()
+        errors, warnings = ledger.check_refs([
+            ("C1.json", "TSU-OBJ-0001", "docs/master.md"),
+            ("C1.json", "TSU-OBJ-0021", "/src/audit/other.jsonl"),
+            ("C2.json", "TSU-OBJ-0500", "/docs/master.md"),
+            ("C2.json", "TSU-OBJ-0501", "/src/new.py"),
+        ])
+        assert errors == [
+            "C1.json: TSU-OBJ-0021 tiene ruta /src/audit/other.jsonl, el ledger dice /src/audit/audit-log.jsonl",
+            "C2.json: TSU-OBJ-0500 usa la ruta /docs/master.md, registrada en el ledger como TSU-OBJ-0001",
+        ]
+        assert warnings == ["C2.json: TSU-OBJ-0501 no está en el ledger"]
@@ -0,0 +1,75 @@
+import os
+
+from engines import lookup_cache
+from engines.tibetan_year import tibetan_year
+
+
+def _write_lookup(path, rows):
+    lines = ["year,mewa,parkha,notes"] + [",".join(r) for r in rows]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def test_lookup_overrides_algorithm(tmp_path):
+    lookup_cache.clear_lookup_cache()
+    _write_lookup(tmp_path / lookup_cache.LOOKUP_FILENAME, [("1984", "3", "Zin", "")])
+
+    ty = tibetan_year(1984, lookups_dir=tmp_path)
+    assert ty.mewa == 3
+    assert ty.parkha == "Zin"
+
+    # años fuera de la tabla siguen usando el algoritmo
+    assert tibetan_year(1985, lookups_dir=tmp_path).mewa == 9
+
+
+def test_index_is_reused_until_file_changes(tmp_path):
+    lookup_cache.clear_lookup_cache()
+    csv_path = tmp_path / lookup_cache.LOOKUP_FILENAME
+    _write_lookup(csv_path, [("1984", "3", "Zin", "")])
+
+    first = lookup_cache.get_lookup_index(csv_path)
+    assert lookup_cache.get_lookup_index(csv_path) is first
+
+    _write_lookup(csv_path, [("1984", "3", "Zin", ""), ("1985", "2", "Khon", "")])
+    st = csv_path.stat()
+    os.utime(csv_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    second = lookup_cache.get_lookup_index(csv_path)
+    assert second is not first
+    assert second[1985] == (2, "Khon")
+
+
+def test_warm_and_clear(tmp_path):
+    lookup_cache.clear_lookup_cache()
+    _write_lookup(tmp_path / lookup_cache.LOOKUP_FILENAME, [("2000", "", "Li", ""), ("2001", "", "", "")])
+
+    assert lookup_cache.warm_lookups(tmp_path) == 1
+    lookup_cache.clear_lookup_cache()
+    assert lookup_cache._CACHE == {}
+
+
+def test_missing_lookup_is_empty(tmp_path):
+    assert lookup_cache.get_lookup_index(tmp_path / "missing.csv") == {}
+
+
+def test_first_row_wins_even_when_empty(tmp_path):
+    lookup_cache.clear_lookup_cache()
+    csv_path = tmp_path / lookup_cache.LOOKUP_FILENAME
+    _write_lookup(csv_path, [("1984", "", "", ""), ("1984", "3", "Zin", ""), ("1985", "2", "Khon", "")])
+
+    index = lookup_cache.get_lookup_index(csv_path)
+    assert 1984 not in index
+    assert tibetan_year(1984, lookups_dir=tmp_path).mewa == 1  # algorithm, not the later row
+
+
+def test_bad_rows_are_reported_not_fatal(tmp_path):
+    lookup_cache.clear_lookup_cache()
+    csv_path = tmp_path / lookup_cache.LOOKUP_FILENAME
+    _write_lookup(csv_path, [("1984", "x", "Zin", ""), ("1984", "3", "Zin", ""), ("1985", "12", "", ""), ("1986", "2", "Khon", "")])
+
+    index = lookup_cache.get_lookup_index(csv_path)
+    assert dict(index) == {1986: (2, "Khon")}
+    assert lookup_cache.lookup_errors(csv_path) == [
+        f"{csv_path} L2: mewa inválido: 'x'",
+        f"{csv_path} L4: mewa inválido: '12'",
+    ]
+    assert lookup_cache.lookup_errors(tmp_path / "missing.csv") == []
@@ -0,0 +1,73 @@
+import os
+
+from engines import lookup_cache
+from engines.lookup_compiled import CompiledLookup, compile_lookup, compiled_path_for
+from engines.tibetan_year import tibetan_year
+from orchestration import cli
+
+
+def _write_lookup(path, text):
+    path.write_text("year,mewa,parkha,notes\n" + text, encoding="utf-8")
+
+
+def test_compiled_matches_parsed_csv(tmp_path):
+    csv_path = tmp_path / lookup_cache.LOOKUP_FILENAME
+    _write_lookup(csv_path, "1984,3,Zin,nota ñ\n1990,,Li,\n2001,,,solo nota\n1984,7,Dwa,\n")
+
+    compiled = CompiledLookup(compile_lookup(csv_path))
+
+    assert dict(compiled.items()) == lookup_cache.parse_lookup_csv(csv_path)
+    assert compiled.get(1985) is None
+    assert 1990 in compiled and 2001 not in compiled
+    assert compiled.notes(1984) == "nota ñ"
+    compiled.close()
+
+
+def test_engine_uses_and_refreshes_compiled_file(tmp_path):
+    lookup_cache.clear_lookup_cache()
+    csv_path = tmp_path / lookup_cache.LOOKUP_FILENAME
+    _write_lookup(csv_path, "1984,3,Zin,\n")
+    assert cli.main(["compile-lookups", "--lookups-dir", str(tmp_path)]) == 0
+
+    assert isinstance(lookup_cache.get_lookup_index(csv_path), CompiledLookup)
+    assert tibetan_year(1984, lookups_dir=tmp_path).parkha == "Zin"
+
+    # el CSV cambia: el .bin queda viejo (hash distinto) y se recompila
+    _write_lookup(csv_path, "1984,2,Khon,\n")
+    st = csv_path.stat()
+    os.utime(csv_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    assert tibetan_year(1984, lookups_dir=tmp_path).parkha == "Khon"
+    assert CompiledLookup(compiled_path_for(csv_path)).get(1984) == (2, "Khon")
+
+
+def test_open_hashes_only_when_the_signature_changes(tmp_path, monkeypatch):
+    from engines import lookup_compiled
+
+    lookup_cache.clear_lookup_cache()
+    csv_path = tmp_path / lookup_cache.LOOKUP_FILENAME
+    _write_lookup(csv_path, "1984,3,Zin,\n")
+    compile_lookup(csv_path)
+
+    hashed = []
+    real = lookup_compiled._sha256_file
+    monkeypatch.setattr(lookup_compiled, "_sha256_file", lambda p: hashed.append(p) or real(p))
+    lookup_compiled.open_compiled_lookup(csv_path).close()
+    assert hashed == []
+
+    st = csv_path.stat()
+    os.utime(csv_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))  # touch: same bytes
+    lookup_compiled.open_compiled_lookup(csv_path).close()
+    assert hashed == [csv_path]
+
+
+def test_replaced_compiled_index_is_closed(tmp_path):
+    lookup_cache.clear_lookup_cache()
+    csv_path = tmp_path / lookup_cache.LOOKUP_FILENAME
+    _write_lookup(csv_path, "1984,3,Zin,\n")
+    compile_lookup(csv_path)
+    old = lookup_cache.get_lookup_index(csv_path)
+
+    _write_lookup(csv_path, "1984,2,Khon,\n1985,1,,\n")
+    assert lookup_cache.get_lookup_index(csv_path).get(1984) == (2, "Khon")
+    assert old._mm.closed
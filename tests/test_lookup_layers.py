@@ -0,0 +1,88 @@
+from engines import lookup_cache, lookup_layers
+from engines.lookup_layers import ALGORITHM, LookupLayer, default_layers, merged_lookup_index
+from engines.tibetan_year import resolve_tibetan_year, tibetan_year
+from engines.tibetan_year_batch import tibetan_years
+
+
+def _write(path, text):
+    path.write_text("year,mewa,parkha,notes\n" + text, encoding="utf-8")
+
+
+def test_layers_resolve_per_row_with_provenance(tmp_path):
+    lookup_cache.clear_lookup_cache()
+    _write(tmp_path / "year_mewa_parkha.csv", "1984,3,Zin,\n1990,4,,\n")
+    _write(tmp_path / "year_mewa_parkha.local.csv", "1984,,Li,\n")
+
+    # la fila local entera gana: su parkha no se empareja con el mewa validado
+    ty, prov = resolve_tibetan_year(1984, lookups_dir=tmp_path)
+    assert (ty.mewa, ty.parkha) == (tibetan_year(1984).mewa, "Li")
+    assert prov["mewa"] == ALGORITHM
+    assert prov["parkha"] == "local"
+    assert prov["animal"] == ALGORITHM
+
+    # solo mewa en tabla: parkha derivada por algoritmo
+    ty, prov = resolve_tibetan_year(1990, lookups_dir=tmp_path)
+    assert (ty.mewa, ty.parkha) == (4, "Zon")
+    assert (prov["mewa"], prov["parkha"]) == ("validated", ALGORITHM)
+
+    assert resolve_tibetan_year(1991, lookups_dir=tmp_path)[1]["mewa"] == ALGORITHM
+
+
+def test_explicit_stack_and_batch_agree(tmp_path):
+    lookup_cache.clear_lookup_cache()
+    _write(tmp_path / "a.csv", "2000,2,,\n")
+    _write(tmp_path / "b.csv", "2000,7,Dwa,\n2001,1,,\n")
+    layers = (LookupLayer("tsurphu", tmp_path / "a.csv"), LookupLayer("phugpa", tmp_path / "b.csv"))
+
+    merged = merged_lookup_index(layers)
+    assert merged[2000] == (2, None, "tsurphu", None)
+    assert merged[2001] == (1, None, "phugpa", None)
+    assert merged_lookup_index(layers) is merged
+
+    cols = tibetan_years([1999, 2000, 2001], layers=layers, backend="python")
+    assert [cols.row(i) for i in range(3)] == [tibetan_year(y, layers=layers) for y in (1999, 2000, 2001)]
+
+
+def test_default_layers_order(tmp_path):
+    names = [layer.name for layer in default_layers(tmp_path, "phugpa")]
+    assert names == ["local", "phugpa", "validated"]
+
+
+def test_merged_cache_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(lookup_layers, "MAX_MERGED", 3)
+    lookup_layers.clear_merged_cache()
+    for i in range(5):
+        _write(tmp_path / f"{i}.csv", f"2000,{i + 1},,\n")
+        assert merged_lookup_index((LookupLayer("x", tmp_path / f"{i}.csv"),))[2000][0] == i + 1
+    assert len(lookup_layers._MERGED) == 3
+
+    # un cambio en el archivo reemplaza la entrada de su pila
+    layers = (LookupLayer("x", tmp_path / "4.csv"),)
+    _write(tmp_path / "4.csv", "2000,9,,\n2001,8,,\n")
+    assert merged_lookup_index(layers)[2000][0] == 9
+    assert len(lookup_layers._MERGED) == 3
+
+
+def test_single_layer_is_served_without_copying(tmp_path):
+    from engines.lookup_compiled import CompiledLookup, compile_lookup
+
+    lookup_cache.clear_lookup_cache()
+    lookup_layers.clear_merged_cache()
+    csv_path = tmp_path / "year_mewa_parkha.csv"
+    _write(csv_path, "1984,3,Zin,\n1990,4,,\n")
+    compile_lookup(csv_path)
+
+    merged = merged_lookup_index(default_layers(tmp_path))
+    assert isinstance(merged, lookup_layers.LayerView)
+    assert isinstance(merged.index, CompiledLookup)
+    assert merged[1984] == (3, "Zin", "validated", "validated")
+    assert merged.get(1990) == (4, None, "validated", None)
+    assert 1985 not in merged and merged.get(1985) is None
+    assert sorted(merged) == [1984, 1990] and len(merged) == 2
+    assert tibetan_year(1984, lookups_dir=tmp_path).parkha == "Zin"
+
+    # a reload closes the old map; a view still held by a caller reads the new table
+    _write(csv_path, "1984,2,Khon,\n")
+    lookup_cache.reload_lookup(csv_path)
+    assert merged.index._mm.closed
+    assert merged.get(1984) == (2, "Khon", "validated", "validated")
@@ -0,0 +1,83 @@
+import os
+import threading
+
+from engines import lookup_cache
+from engines.lookup_watch import LookupWatcher
+from engines.tibetan_year import tibetan_year
+
+
+def _write(path, text, bump_ns=0):
+    path.write_text("year,mewa,parkha,notes\n" + text, encoding="utf-8")
+    if bump_ns:
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump_ns))
+
+
+def test_poll_once_swaps_index(tmp_path):
+    lookup_cache.clear_lookup_cache()
+    csv_path = tmp_path / lookup_cache.LOOKUP_FILENAME
+    _write(csv_path, "1984,3,Zin,\n")
+
+    watcher = LookupWatcher(tmp_path, interval=3600)
+    with watcher:
+        assert lookup_cache.is_watched(csv_path)
+        assert tibetan_year(1984, lookups_dir=tmp_path).mewa == 3
+
+        _write(csv_path, "1984,2,Khon,\n", bump_ns=1_000_000)
+        # sin poll, la ruta caliente sigue sirviendo la tabla publicada
+        assert tibetan_year(1984, lookups_dir=tmp_path).mewa == 3
+        assert watcher.poll_once()
+        assert tibetan_year(1984, lookups_dir=tmp_path).mewa == 2
+        assert not watcher.poll_once()
+
+    assert not lookup_cache.is_watched(csv_path)
+
+
+def test_background_thread_reloads(tmp_path):
+    lookup_cache.clear_lookup_cache()
+    csv_path = tmp_path / lookup_cache.LOOKUP_FILENAME
+    _write(csv_path, "1984,3,Zin,\n")
+    reloaded = threading.Event()
+
+    with LookupWatcher(tmp_path, interval=0.01, on_reload=lambda _paths: reloaded.set()):
+        _write(csv_path, "1984,8,Khen,\n", bump_ns=1_000_000)
+        assert reloaded.wait(5)
+        assert tibetan_year(1984, lookups_dir=tmp_path).parkha == "Khen"
+
+
+def test_failing_on_reload_is_logged_and_not_retried(tmp_path, caplog):
+    lookup_cache.clear_lookup_cache()
+    csv_path = tmp_path / lookup_cache.LOOKUP_FILENAME
+    _write(csv_path, "1984,3,Zin,\n")
+    calls = []
+
+    def on_reload(paths):
+        calls.append(paths)
+        raise RuntimeError("boom")
+
+    watcher = LookupWatcher(tmp_path, interval=3600, on_reload=on_reload)
+    with watcher:
+        _write(csv_path, "1984,2,Khon,\n", bump_ns=1_000_000)
+        assert watcher.poll_once()
+        assert tibetan_year(1984, lookups_dir=tmp_path).mewa == 2
+        assert not watcher.poll_once()  # the new stamps were kept
+    assert calls == [[os.fspath(csv_path)]]
+    assert "on_reload" in caplog.text and "boom" in caplog.text
+
+
+def test_reload_lookup_publishes_without_a_watcher(tmp_path):
+    lookup_cache.clear_lookup_cache()
+    csv_path = tmp_path / lookup_cache.LOOKUP_FILENAME
+    _write(csv_path, "1984,3,Zin,\n")
+    assert lookup_cache.get_lookup_index(csv_path)[1984] == (3, "Zin")
+
+    lookup_cache.watch_lookup(csv_path)
+    try:
+        _write(csv_path, "1984,2,Khon,\n", bump_ns=1_000_000)
+        assert lookup_cache.get_lookup_index(csv_path)[1984] == (3, "Zin")  # watched: no stat
+        stamp = lookup_cache.reload_lookup(csv_path)
+        assert stamp == lookup_cache.lookup_stamp(csv_path)
+        assert lookup_cache.get_lookup_index(csv_path)[1984] == (2, "Khon")
+    finally:
+        lookup_cache.unwatch_lookup(csv_path)
+    assert not lookup_cache.is_watched(csv_path)
@@ -0,0 +1,49 @@
+import datetime as dt
+
+import pytest
+
+from engines import losar
+from engines.tibetan_year import tibetan_year_for_date
+
+# Losar publicado (calendario Phugpa)
+KNOWN_LOSAR = {
+    1990: dt.date(1990, 2, 26),
+    1992: dt.date(1992, 3, 5),
+    1995: dt.date(1995, 3, 2),
+    2011: dt.date(2011, 3, 5),
+    2019: dt.date(2019, 2, 5),
+    2022: dt.date(2022, 3, 3),
+    2024: dt.date(2024, 2, 10),
+    2025: dt.date(2025, 2, 28),
+    2026: dt.date(2026, 2, 18),
+}
+
+
+@pytest.mark.parametrize("year,expected", sorted(KNOWN_LOSAR.items()))
+def test_losar_dates(year, expected):
+    assert losar.losar_date(year) == expected
+    assert losar.compute_losar(year) == expected
+
+
+def test_table_is_sorted_and_spans_range():
+    table = losar.losar_table()
+    assert len(table) == losar.LOSAR_LAST_YEAR - losar.LOSAR_FIRST_YEAR + 2
+    assert all(354 <= b - a <= 385 for a, b in zip(table, table[1:]))
+
+
+def test_date_before_losar_belongs_to_previous_year():
+    before = tibetan_year_for_date(dt.date(2024, 2, 9))
+    on = tibetan_year_for_date(dt.date(2024, 2, 10))
+
+    assert (before.gregorian_year, before.element, before.animal) == (2023, "Water", "Rabbit")
+    assert (on.gregorian_year, on.element, on.animal) == (2024, "Wood", "Dragon")
+
+
+def test_out_of_range_date_falls_back_to_compute_losar():
+    for year in (900, 2500):
+        losar_day = losar.compute_losar(year)
+        assert losar.tibetan_year_number(losar_day) == year
+        assert losar.tibetan_year_number(losar_day - dt.timedelta(days=1)) == year - 1
+        assert losar.tibetan_year_number(dt.date(year, 6, 1)) == year
+    assert losar.tibetan_year_number(dt.date(losar.LOSAR_FIRST_YEAR, 1, 1)) == losar.LOSAR_FIRST_YEAR - 1
+    assert tibetan_year_for_date(dt.date(900, 6, 1)).gregorian_year == 900
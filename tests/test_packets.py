@@ -0,0 +1,43 @@
+import random
+
+from governance import packets
+
+
+def test_packet_hash_matches_full_canonical_encoding():
+    rng = random.Random(1)
+    cases = [packets.synthetic_packet(i, rng) for i in range(20)]
+    cases += [
+        {},
+        {"b": 1, "a": "é"},
+        {"integrity": {"packet_hash": "x", "notes": list(range(100))}},
+        {"a": 1, "objects": [{"i": i} for i in range(500)], "z": "q" * (1 << 17), "integrity": {"packet_hash": "y"}},
+    ]
+    for pkt in cases:
+        assert packets.packet_hash(pkt) == packets.legacy_packet_hash(pkt)
+
+
+def test_check_packet_bytes():
+    pkt = packets.synthetic_packet(0, random.Random(0))
+    assert packets.check_packet_bytes("ok.json", packets.canon(pkt)) == []
+
+    pkt["rationale"] = "changed"
+    assert packets.check_packet_bytes("bad.json", packets.canon(pkt)) == ["bad.json: hash no coincide"]
+    assert packets.check_packet_bytes("x.json", b"[1")[0].startswith("x.json: inválido")
+
+
+def test_verify_packet_files_in_pool_keeps_order(tmp_path):
+    paths = packets.write_synthetic_corpus(tmp_path, 40)
+    paths[7].write_bytes(paths[7].read_bytes().replace(b"Engineer", b"Tamperer"))
+
+    results = list(packets.verify_packet_files(paths, workers=2, chunk_size=6))
+    assert [p for p, _ in results] == paths
+    assert [p.name for p, entry in results if entry["errors"]] == [paths[7].name]
+
+
+def test_bench_validate_small_corpus(tmp_path):
+    result = packets.bench_validate(50, workers=2)
+    assert result["packets"] == 50
+    assert set(result["runs"]) == {"legacy", "current", "current x2"}
+    kept = packets.bench_validate(5, directory=tmp_path / "corpus")
+    assert set(kept["runs"]) == {"legacy", "current"}
+    assert len(list((tmp_path / "corpus").glob("*.json"))) == 5
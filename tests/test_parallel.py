@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from orchestration import cli
+from orchestration.parallel import chunked, run_chunks, split_range
+
+
+def _square_sum(chunk):
+    return sum(x * x for x in chunk)
+
+
+_WARMED = []
+
+
+def _mark_warm(tag):
+    _WARMED.append(tag)
+
+
+def _warm_tags(_chunk):
+    return (os.getpid(), tuple(_WARMED))
+
+
+def test_chunked_and_split_range():
+    assert list(chunked(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(split_range(range(10, 0, -1), 4)) == [range(10, 6, -1), range(6, 2, -1), range(2, 0, -1)]
+
+
+
+def test_chunk_sizes_must_be_positive(capsys):
+    with pytest.raises(ValueError, match="at least 1"):
+        list(chunked(range(3), 0))
+    with pytest.raises(ValueError, match="at least 1"):
+        list(split_range(range(3), 0))
+    for flags in (["--chunk-size", "0"], ["--workers", "0"], ["--workers", "-2"]):
+        with pytest.raises(SystemExit) as exc:
+            cli.main(["tibetan-year", "1..5", *flags])
+        assert exc.value.code == 2
+        assert "must be at least 1" in capsys.readouterr().err
+
+def test_run_chunks_ordered_and_unordered():
+    chunks = list(chunked(range(1000), 37))
+    expected = [_square_sum(c) for c in chunks]
+
+    assert list(run_chunks(_square_sum, chunks, workers=1)) == expected
+    assert list(run_chunks(_square_sum, iter(chunks), workers=2, initializer=None, prefetch=1)) == expected
+    assert sorted(run_chunks(_square_sum, chunks, workers=2, ordered=False, initializer=None)) == sorted(expected)
+
+
+def test_run_chunks_initializer_runs_in_workers():
+    results = list(run_chunks(_warm_tags, [[1], [2], [3]], workers=2, initializer=_mark_warm, initargs=("lookups",)))
+    assert all(tags == ("lookups",) for _pid, tags in results)
+    assert os.getpid() not in {pid for pid, _ in results}
+
+
+def test_cli_tibetan_year_workers_match_serial(capsys):
+    argv = ["tibetan-year", "1990", "1..500", "2025", "--json"]
+    assert cli.main(argv) == 0
+    serial = capsys.readouterr().out
+
+    assert cli.main(argv + ["--workers", "2", "--chunk-size", "64"]) == 0
+    assert capsys.readouterr().out == serial
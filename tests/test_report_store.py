@@ -0,0 +1,94 @@
+from orchestration.report_store import _RECORD, ReportStore, report_key
+from orchestration.slice_a import build_slice_a_report
+
+
+def _reports(n, *, timestamp_utc="2026-01-01T00:00:00Z"):
+    return [
+        build_slice_a_report(f"P{i}", f"{1950 + i % 60}-0{1 + i % 9}-1{i % 9}", "10:00", "X", timestamp_utc=timestamp_utc)
+        for i in range(n)
+    ]
+
+
+def test_put_get_and_dedup(tmp_path):
+    reports = _reports(30)
+    with ReportStore(tmp_path / "store") as store:
+        results = store.put_many(reports + reports[:5])
+        assert [created for _, created in results] == [True] * 30 + [False] * 5
+        assert len(store) == 30
+        for report, (key, _) in zip(reports, results):
+            assert key == report_key(report)
+            assert store.get(key) == report
+
+    # A later run of the same request (new timestamp) maps to the stored report
+    again = _reports(1, timestamp_utc="2027-01-01T00:00:00Z")[0]
+    with ReportStore(tmp_path / "store") as store:
+        key, created = store.put(again)
+        assert not created
+        assert store.get(key)["timestamp_utc"] == "2026-01-01T00:00:00Z"
+        assert [row["name"] for row in store.entries(limit=3)] == ["P0", "P1", "P2"]
+        assert [row["key"] for row in store.entries(name="P7")] == [key for key, _ in results[7:8]]
+        assert store.resolve(key[:12]) == key
+        assert store.resolve("zz") is None
+
+
+def test_engine_version_is_part_of_the_key():
+    report = _reports(1)[0]
+    bumped = dict(report, engine=dict(report["engine"], version="sliceA-9.9"))
+    assert report_key(report) != report_key(bumped)
+    assert report_key(report) == report_key(report, "sliceA-0.3")
+
+
+def test_segments_rotate_and_reindex(tmp_path):
+    reports = _reports(40)
+    with ReportStore(tmp_path / "store", segment_bytes=1024) as store:
+        store.put_many(reports)
+        assert len(list((tmp_path / "store" / "segments").glob("seg-*.z"))) > 1
+        keys = [row["key"] for row in store.entries()]
+        store._db.execute("DELETE FROM reports")  # the index is derived data
+        store._db.commit()
+        assert store.reindex() == 40
+        assert sorted(row["key"] for row in store.entries()) == sorted(keys)
+        assert store.get(keys[-1]) == reports[-1]
+
+
+def test_torn_tail_is_dropped_before_appending(tmp_path):
+    reports = _reports(6)
+    with ReportStore(tmp_path / "store") as store:
+        store.put_many(reports[:3])
+    seg = next((tmp_path / "store" / "segments").glob("seg-*.z"))
+    with seg.open("ab") as f:
+        f.write(_RECORD.pack(b"k" * 32, 1000, 1) + b"partial")  # a crash mid-record
+    with ReportStore(tmp_path / "store") as store:
+        store.put_many(reports[3:])
+        assert store.reindex() == 6
+        assert [store.get(report_key(r)) for r in reports] == reports
+
+
+def _put_batches(root, start):
+    reports = _reports(60)
+    with ReportStore(root, segment_bytes=2048) as store:
+        for i in range(start, start + 40, 5):
+            store.put_many(reports[i % 60:i % 60 + 5])
+
+
+def test_concurrent_writers(tmp_path):
+    import multiprocessing
+
+    root = tmp_path / "store"
+    ReportStore(root).close()
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_put_batches, args=(root, start)) for start in (0, 10, 20, 30)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    assert [p.exitcode for p in procs] == [0] * 4
+
+    reports = _reports(60)
+    with ReportStore(root) as store:
+        keys = [row["key"] for row in store.entries()]
+        assert sorted(keys) == sorted({report_key(r) for r in reports})
+        assert [store.get(report_key(r)) for r in reports] == reports
+        # every record in the segments is whole and indexed exactly once
+        assert sorted(key for key, *_ in store.scan()) == sorted(keys)
+        assert store.reindex() == 60
@@ -0,0 +1,53 @@
+import json
+from dataclasses import dataclass
+
+import pytest
+
+from engines.tibetan_year import tibetan_year
+from orchestration import cli, serializers
+
+
+def test_serializer_matches_asdict_normalized():
+    ty = tibetan_year(2025)
+    expected = ty._asdict()
+    expected["element"] = expected["element"].lower()
+    expected["parkha"] = expected["parkha"].lower()
+
+    data = serializers.to_json_dict(ty)
+    assert data == expected
+    assert list(data) == sorted(data)
+    assert serializers.serializer_for(type(ty)) is serializers.serializer_for(type(ty))
+
+
+def test_serializer_for_dataclass_and_plain_object():
+    @dataclass
+    class Row:
+        element: str
+        tags: list
+
+    class Plain:
+        def __init__(self):
+            self.parkha = "Zin"
+
+    assert serializers.to_json_dict(Row("Fire", [1, 2])) == {"element": "fire", "tags": [1, 2]}
+    assert serializers.to_json_dict(Plain()) == {"parkha": "zin"}
+
+
+@pytest.mark.parametrize("name", ["auto", "json", "orjson", "msgspec"])
+def test_compact_encoders_agree(name):
+    try:
+        encode = serializers.get_encoder(name)
+    except RuntimeError:
+        pytest.skip(f"{name} not installed")
+    data = serializers.to_json_dict(tibetan_year(1990))
+    assert encode(data) == json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def test_cli_tibetan_year_compact(capsys):
+    rc = cli.main(["tibetan-year", "2024..2025", "--compact", "--encoder", "json"])
+    assert rc == 0
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2
+    assert " " not in lines[0]
+    assert json.loads(lines[1])["gregorian_year"] == 2025
@@ -0,0 +1,142 @@
+import asyncio
+import json
+
+from engines.tibetan_year import tibetan_year
+from orchestration.serve import TsurphuServer
+
+
+async def _request(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode()
+        + data
+    )
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, payload = raw.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+def _run(scenario, **kwargs):
+    async def main():
+        server = TsurphuServer(batch_window=0.05, **kwargs)
+        await server.start(port=0)
+        try:
+            return await scenario(server, server._server.sockets[0].getsockname()[1])
+        finally:
+            await server.close()
+
+    return asyncio.run(main())
+
+
+def test_serve_tibetan_year_coalesces_concurrent_requests():
+    async def scenario(server, port):
+        years = [1990, 2000, 2025, 1900]
+        responses = await asyncio.gather(
+            *[_request(port, "POST", "/v1/tibetan-year", {"argv": [str(y)]}) for y in years]
+        )
+        return years, responses, dict(server.stats)
+
+    years, responses, stats = _run(scenario)
+    for year, (status, payload) in zip(years, responses):
+        assert status == 200
+        (row,) = payload["results"]
+        ty = tibetan_year(year)
+        assert row["gregorian_year"] == year
+        assert (row["mewa"], row["parkha"]) == (ty.mewa, ty.parkha.lower())
+    assert stats["batched_requests"] == 4
+    assert stats["batches"] < 4
+
+
+def test_serve_parses_with_cli_parser():
+    async def scenario(server, port):
+        ok = await _request(port, "POST", "/v1/tibetan-year", {"argv": ["2024..2026"]})
+        bad = await _request(port, "POST", "/v1/tibetan-year", {"argv": ["abc"]})
+        missing = await _request(port, "POST", "/v1/compile-lookups", {"argv": []})
+        health = await _request(port, "GET", "/health")
+        return ok, bad, missing, health
+
+    ok, bad, missing, health = _run(scenario)
+    assert [r["gregorian_year"] for r in ok[1]["results"]] == [2024, 2025, 2026]
+    assert bad[0] == 400 and "invalid year" in bad[1]["error"]
+    assert missing[0] == 404
+    assert health == (200, health[1]) and health[1]["status"] == "ok"
+
+
+def test_serve_slice_a_report():
+    async def scenario(server, port):
+        return await _request(port, "POST", "/v1/slice-a", {"argv": ["--birth-date", "1990-11-02", "--name", "X"]})
+
+    status, payload = _run(scenario)
+    assert status == 200
+    report = payload["report"]
+    assert report["input"]["name"] == "X"
+    assert report["tibetan"]["year_animal"] == "Horse"
+    assert {ref["field"] for ref in report["sources_ref"]} == {"element", "animal", "mewa", "parkha"}
+
+
+async def _raw(port, data):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(data)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    return int(raw.split()[1])
+
+
+def test_serve_rejects_bad_framing():
+    async def scenario(server, port):
+        return [
+            await _raw(port, b"POST /v1/slice-a HTTP/1.1\r\nContent-Length: abc\r\n\r\n"),
+            await _raw(port, b"POST /v1/slice-a HTTP/1.1\r\nContent-Length: -5\r\n\r\n"),
+            await _raw(port, b"GET /health HTTP/1.1\r\nX-Big: " + b"a" * (1 << 17) + b"\r\n\r\n"),
+        ]
+
+    assert _run(scenario) == [400, 400, 431]
+
+
+def test_serve_cohort_is_confined_to_the_data_dir(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "people.csv").write_text("birth_date\n1990-11-02\n2024-02-10\n", encoding="utf-8")
+    (tmp_path / "secret.csv").write_text("birth_date\n2000-01-01\n", encoding="utf-8")
+
+    async def without_dir(server, port):
+        return await _request(port, "POST", "/v1/cohort", {"argv": ["people.csv"]})
+
+    async def with_dir(server, port):
+        return [
+            await _request(port, "POST", "/v1/cohort", {"argv": ["people.csv"]}),
+            await _request(port, "POST", "/v1/cohort", {"argv": ["../secret.csv"]}),
+            await _request(port, "POST", "/v1/cohort", {"argv": [str(tmp_path / "secret.csv")]}),
+            await _request(port, "POST", "/v1/cohort", {"argv": ["people.csv", "--workers", "4"]}),
+        ]
+
+    assert _run(without_dir)[0] == 403
+    ok, up, absolute, workers = _run(with_dir, data_dir=data)
+    assert ok[0] == 200 and ok[1]["result"]["rows"] == 2
+    assert (up[0], absolute[0], workers[0]) == (403, 403, 400)
+
+
+def test_serve_rejects_flags_it_does_not_honour(tmp_path):
+    async def scenario(server, port):
+        return [
+            await _request(port, "POST", "/v1/tibetan-year", {"argv": ["2025", *extra]})
+            for extra in (
+                ["--lookups-dir", str(tmp_path)],
+                ["--output", str(tmp_path / "out.json")],
+                ["--format", "csv"],
+                ["--workers", "2"],
+                ["--flush-every", "1"],
+                [],
+            )
+        ] + [await _request(port, "POST", "/v1/slice-a", {"argv": ["--lookups-dir", str(tmp_path)]})]
+
+    *rejected, ok, slice_a = _run(scenario)
+    assert [status for status, _ in rejected] == [400] * 5
+    assert rejected[0][1]["error"] == "--lookups-dir is not available over the API"
+    assert ok[0] == 200
+    assert slice_a[0] == 400
+    assert not list(tmp_path.iterdir())
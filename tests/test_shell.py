@@ -0,0 +1,32 @@
+import io
+import json
+
+from orchestration.shell import TsurphuShell
+
+
+def _run(script, capsys, **kwargs):
+    shell = TsurphuShell(stdin=io.StringIO(script), stdout=io.StringIO(), **kwargs)
+    shell.prompt = ""
+    shell.cmdloop(intro="")
+    captured = capsys.readouterr()
+    return shell, captured.out, captured.err
+
+
+def test_shell_runs_cli_grammar_and_reports_latency(capsys):
+    shell, out, err = _run("tibetan-year 2025 --json\ntibetan-year 1990..1991 --compact\nexit\n", capsys)
+
+    lines = out.splitlines()
+    assert json.loads("\n".join(lines[:-2]))["gregorian_year"] == 2025
+    assert [json.loads(line)["gregorian_year"] for line in lines[-2:]] == [1990, 1991]
+    assert err.count("[tibetan-year ") == 2
+    assert len(shell.latencies["tibetan-year"]) == 2
+
+
+def test_shell_survives_errors(capsys):
+    shell, out, err = _run("tibetan-year abc\nbogus\nserve\ntibetan-year 2025\n", capsys, timing=False)
+
+    assert "invalid year" in err
+    assert "not available inside the shell" in err
+    assert "gregorian_year=2025" in out
+    assert shell.last_status == 0
+    assert "[tibetan-year " not in err
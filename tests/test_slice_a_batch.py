@@ -0,0 +1,58 @@
+import json
+
+from orchestration.slice_a import PERSON_ERROR, build_slice_a_report, iter_people, slice_a_batch
+
+
+def _people(n):
+    return [
+        {"name": f"P{i}", "birth_date": f"{1950 + i % 60}-0{1 + i % 9}-1{i % 9}", "birth_time": "10:00", "place": "X"}
+        for i in range(n)
+    ]
+
+
+def test_iter_people_reads_csv_and_jsonl(tmp_path):
+    people = _people(3)
+    csv_path = tmp_path / "people.csv"
+    csv_path.write_text(
+        "name,birth_date,birth_time,place\n" + "".join(
+            f"{p['name']},{p['birth_date']},{p['birth_time']},{p['place']}\n" for p in people
+        ),
+        encoding="utf-8",
+    )
+    jsonl_path = tmp_path / "people.jsonl"
+    jsonl_path.write_text("".join(json.dumps(p) + "\n" for p in people) + "\n", encoding="utf-8")
+    assert list(iter_people(csv_path)) == people
+    assert list(iter_people(jsonl_path)) == people
+
+
+def test_bad_jsonl_rows_are_per_row_errors(tmp_path):
+    people = _people(2)
+    path = tmp_path / "people.jsonl"
+    path.write_text(json.dumps(people[0]) + "\n{not json\n[1, 2]\n" + json.dumps(people[1]) + "\n", encoding="utf-8")
+    rows = list(iter_people(path))
+    assert rows[0] == people[0] and rows[3] == people[1]
+    assert "line 2: invalid JSON" in rows[1][PERSON_ERROR]
+    assert rows[2] == {PERSON_ERROR: "line 3: expected a JSON object, got list"}
+
+    results = list(slice_a_batch(rows))
+    assert [(n, report is None, error is None) for n, report, error in results] == [
+        (1, False, True), (2, True, False), (3, True, False), (4, False, True),
+    ]
+
+
+def _strip_ts(report):
+    return {k: v for k, v in report.items() if k != "timestamp_utc"}
+
+
+def test_batch_matches_single_reports_in_order():
+    people = _people(50)
+    people[7]["birth_date"] = "not-a-date"
+    for workers in (1, 2):
+        results = list(slice_a_batch(people, workers=workers, chunk_size=8))
+        assert [n for n, _, _ in results] == list(range(1, 51))
+        assert results[7][1] is None and "ValueError" in results[7][2]
+        for (n, report, error), person in zip(results, people):
+            if n == 8:
+                continue
+            assert error is None
+            assert _strip_ts(report) == _strip_ts(build_slice_a_report(**person))
@@ -0,0 +1,58 @@
+import pytest
+
+from engines import lookup_cache
+from engines.tibetan_year import tibetan_year
+from engines.tibetan_year_batch import _np, iter_tibetan_year_chunks, iter_tibetan_years, tibetan_years
+
+BACKENDS = ["python"] + (["numpy"] if _np is not None else [])
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_batch_matches_scalar(backend):
+    years = list(range(1800, 2201))
+    cols = tibetan_years(years, backend=backend)
+
+    assert len(cols) == len(years)
+    for i, y in enumerate(years):
+        assert cols.row(i) == tibetan_year(y)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_batch_accepts_any_iterable(backend):
+    from array import array
+
+    expected = [tibetan_year(y) for y in range(1984, 1990)]
+    for years in ((y for y in range(1984, 1990)), iter(range(1984, 1990)), array("i", range(1984, 1990))):
+        assert list(tibetan_years(years, backend=backend).rows()) == expected
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_batch_applies_lookup_overrides(tmp_path, backend):
+    lookup_cache.clear_lookup_cache()
+    (tmp_path / lookup_cache.LOOKUP_FILENAME).write_text(
+        "year,mewa,parkha,notes\n1984,3,,\n1990,,Li,\n", encoding="utf-8"
+    )
+    years = [1983, 1984, 1990, 1984]
+    cols = tibetan_years(years, lookups_dir=tmp_path, backend=backend)
+
+    assert [cols.row(i) for i in range(len(years))] == [
+        tibetan_year(y, lookups_dir=tmp_path) for y in years
+    ]
+    assert cols.parkha_names[cols.parkha[1]] == "Zin"
+    assert cols.element(2) == "Metal"
+    assert cols.animal(2) == "Horse"
+
+
+def test_iter_tibetan_years_matches_scalar():
+    it = iter_tibetan_years(1900, 2100, 7)
+    assert not isinstance(it, list)
+    assert list(it) == [tibetan_year(y) for y in range(1900, 2100, 7)]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_iter_chunks_covers_range(backend):
+    chunks = list(iter_tibetan_year_chunks(-500, 3000, 3, chunk_size=100, backend=backend))
+
+    assert [len(c) for c in chunks[:-1]] == [100] * (len(chunks) - 1)
+    years = [int(y) for c in chunks for y in c.gregorian_year]
+    assert years == list(range(-500, 3000, 3))
+    assert chunks[3].row(5) == tibetan_year(years[305])
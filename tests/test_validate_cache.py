@@ -0,0 +1,141 @@
+import importlib.util
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+TOOL = Path(__file__).resolve().parents[1] / "tools" / "tsurphu.py"
+
+
+@pytest.fixture
+def tool(tmp_path, monkeypatch):
+    spec = importlib.util.spec_from_file_location("tsurphu_tool", TOOL)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    for name in ("master.md", "changesetpacket-1.md"):
+        (docs / name).write_text("x", encoding="utf-8")
+    (docs / "object-ledger.csv").write_text(
+        "ObjectID,Nombre,Estrato_7x,Dueño,MetaAgent,Sensibilidad,Evidencia,Ruta\nO1,a,b,c,d,e,f,g\n",
+        encoding="utf-8",
+    )
+    audit = tmp_path / "audit" / "audit-log.jsonl"
+    audit.parent.mkdir()
+    audit.write_text("", encoding="utf-8")
+
+    monkeypatch.setattr(mod, "ROOT", tmp_path)
+    monkeypatch.setattr(mod, "DOCS", docs)
+    monkeypatch.setattr(mod, "LEDGER", docs / "object-ledger.csv")
+    monkeypatch.setattr(mod, "CHANGESETS", tmp_path / "changesets")
+    monkeypatch.setattr(mod, "AUDIT", audit)
+    monkeypatch.setattr(mod, "CACHE", tmp_path / ".tsurphu-cache" / "validate.json")
+    monkeypatch.setattr(mod, "LEDGER_DB", tmp_path / ".tsurphu-cache" / "ledger.sqlite")
+
+    mod.CHANGESETS.mkdir()
+    for i in range(3):
+        pkt = mod.make_changeset(f"C{i}", "Engineer", "add", ["7x-L7"], ["misc"], [], "r")
+        (mod.CHANGESETS / f"C{i}.json").write_bytes(mod.canon(pkt))
+    return mod
+
+
+def test_validate_serves_unchanged_items_from_cache(tool, capsys):
+    tool.validate()
+    assert "4 revalidados, 0 desde caché" in capsys.readouterr().out
+
+    tool.validate()
+    assert "0 revalidados, 4 desde caché" in capsys.readouterr().out
+
+    tool.validate(full=True)
+    assert "4 revalidados, 0 desde caché" in capsys.readouterr().out
+
+
+def test_validate_revalidates_changed_packets(tool, capsys):
+    tool.validate()
+    capsys.readouterr()
+
+    # Same content, new mtime: still served from the cache (sha256 matches)
+    p = tool.CHANGESETS / "C0.json"
+    st = p.stat()
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    tool.validate()
+    assert "0 revalidados, 4 desde caché" in capsys.readouterr().out
+
+    obj = json.loads(p.read_text(encoding="utf-8"))
+    obj["rationale"] = "tampered"
+    p.write_text(json.dumps(obj), encoding="utf-8")
+    with pytest.raises(SystemExit):
+        tool.validate()
+    out = capsys.readouterr().out
+    assert "1 revalidados, 3 desde caché" in out
+    assert "C0.json: hash no coincide" in out
+
+    # Cached failures are still reported
+    with pytest.raises(SystemExit):
+        tool.validate()
+    assert "C0.json: hash no coincide" in capsys.readouterr().out
+
+
+
+def test_changed_files_are_stat_once_and_read_once(tool, capsys, monkeypatch):
+    tool.validate()
+    capsys.readouterr()
+    p = tool.CHANGESETS / "C1.json"
+    obj = json.loads(p.read_text(encoding="utf-8"))
+    obj["rationale"] = "x" * len(obj["rationale"])  # same size, new bytes
+    p.write_bytes(tool.canon(obj))
+    tool.LEDGER.write_text(tool.LEDGER.read_text(encoding="utf-8") + "O2,a,b,c,d,e,f,h\n", encoding="utf-8")
+
+    calls = []
+    stat, read_bytes = Path.stat, Path.read_bytes
+
+    def counting_stat(self, *a, **kw):
+        calls.append(("stat", self.name))
+        return stat(self, *a, **kw)
+
+    def counting_read(self):
+        calls.append(("read", self.name))
+        return read_bytes(self)
+
+    monkeypatch.setattr(Path, "exists", lambda self: os.path.exists(self))  # existence checks are not signature stats
+    monkeypatch.setattr(Path, "stat", counting_stat)
+    monkeypatch.setattr(Path, "read_bytes", counting_read)
+    with pytest.raises(SystemExit):
+        tool.validate()
+    assert "C1.json: hash no coincide" in capsys.readouterr().out
+    for name in ("C1.json", "object-ledger.csv"):
+        assert [c for c, n in calls if n == name] == ["stat", "read"]
+
+
+def test_validate_cross_checks_changeset_objects(tool, capsys):
+    objects = [
+        {"object_id": "O1", "operation": "update", "path": "g", "sensitivity": "P1"},
+        {"object_id": "O9", "operation": "add", "path": "/new.py", "sensitivity": "P1"},
+    ]
+    pkt = tool.make_changeset("C9", "Engineer", "add", ["7x-L7"], ["misc"], objects, "r")
+    (tool.CHANGESETS / "C9.json").write_bytes(tool.canon(pkt))
+
+    tool.validate()
+    out = capsys.readouterr().out
+    assert "C9.json: O9 no está en el ledger" in out
+
+    with pytest.raises(SystemExit):
+        tool.validate(strict=True)
+    assert "ERRORES" in capsys.readouterr().out
+
+    objects[0]["path"] = "/elsewhere"
+    pkt = tool.make_changeset("C9", "Engineer", "add", ["7x-L7"], ["misc"], objects, "r")
+    (tool.CHANGESETS / "C9.json").write_bytes(tool.canon(pkt))
+    with pytest.raises(SystemExit):
+        tool.validate()
+    assert "C9.json: O1 tiene ruta /elsewhere, el ledger dice /g" in capsys.readouterr().out
+
+
+def test_tool_commands_go_through_the_lazy_registry(tool, capsys):
+    assert list(tool._TOOLS) == ["validate", "slice-a", "bench", "reports", "ledger", "audit", "new-changeset"]
+    tool.main(["ledger", "--id", "O1"])
+    assert json.loads(capsys.readouterr().out)["ObjectID"] == "O1"
+    tool.main(["validate"])
+    assert "[validate] OK" in capsys.readouterr().out
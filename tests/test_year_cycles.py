@@ -1,7 +1,9 @@
-﻿import unittest
+﻿import dataclasses
+import pickle
+import unittest
 
 from engines.year_mewa_parkha import mewa_for_gregorian_year, parkha_for_mewa
-from engines.tibetan_year import tibetan_year
+from engines.tibetan_year import CYCLE_TABLE, CYCLE_YEARS, TibetanYear, cycle_entry, sexagenary_from_gregorian, tibetan_year
 
 class TestYearCycles(unittest.TestCase):
     def test_mewa_examples(self):
@@ -24,5 +26,38 @@ class TestYearCycles(unittest.TestCase):
         self.assertEqual(ty.mewa, 1)
         self.assertTrue(ty.parkha in {"Kham","Khon","Zin","Zon","Khen","Dwa","Gin","Li"})
 
+    def test_cycle_table_matches_reference(self):
+        self.assertEqual(len(CYCLE_TABLE), CYCLE_YEARS)
+        for year in range(1700, 2300):
+            e = cycle_entry(year)
+            self.assertEqual((e.element, e.animal, e.stem_index, e.branch_index), sexagenary_from_gregorian(year))
+            self.assertEqual(e.mewa, mewa_for_gregorian_year(year))
+            self.assertEqual(cycle_entry(year + CYCLE_YEARS), e)
+
+    def test_parkha_instances_are_shared(self):
+        self.assertIs(parkha_for_mewa(1), parkha_for_mewa(1))
+        self.assertIs(parkha_for_mewa(5, polarity="yin"), parkha_for_mewa(2))
+
+    def test_tibetan_year_compact_repr(self):
+        ty = tibetan_year(2025)
+        self.assertFalse(hasattr(ty, "__dict__"))
+        self.assertEqual(ty._asdict(), {
+            "gregorian_year": 2025, "element": "Wood", "animal": "Snake",
+            "stem_index": 1, "branch_index": 5, "mewa": 5, "parkha": "Khon",
+        })
+        self.assertEqual(pickle.loads(pickle.dumps(ty)), ty)
+        with self.assertRaises(AttributeError):
+            ty.mewa = 1
+
+    def test_tibetan_year_keeps_the_dataclass_interface(self):
+        ty = TibetanYear(
+            gregorian_year=2025, element="Wood", animal="Snake",
+            stem_index=1, branch_index=5, mewa=5, parkha="Khon",
+        )
+        self.assertEqual(ty, tibetan_year(2025))
+        self.assertTrue(dataclasses.is_dataclass(ty))
+        self.assertEqual(dataclasses.replace(ty, mewa=4).mewa, 4)
+        self.assertEqual(dataclasses.asdict(ty), ty._asdict())
+
 if __name__ == "__main__":
     unittest.main()
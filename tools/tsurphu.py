@@ -1,74 +1,172 @@
-﻿#!/usr/bin/env python3
+#!/usr/bin/env python3
 from __future__ import annotations
 
-import argparse, csv, datetime as dt, hashlib, json
+import argparse, datetime as dt, hashlib, json, os
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
 import sys
 sys.path.insert(0, str(ROOT / "src"))
+from governance.packets import canon  # mismo canon que verifica validate
+from orchestration.cli import add_commands, positive_int, register_command
 DOCS = ROOT / "docs"
 LEDGER = DOCS / "object-ledger.csv"
 CHANGESETS = ROOT / "changesets"
 AUDIT = ROOT / "src" / "audit" / "audit-log.jsonl"
 REPORTS = ROOT / "reports"
+REPORT_STORE = REPORTS / "store"  # almacén direccionado por contenido (orchestration.report_store)
 
-# Motores
-from engines.tibetan_year import tibetan_year
+# Motores: se importan dentro de cada comando (validate o --help no los cargan)
 
 def now_utc():
     return dt.datetime.now(dt.timezone.utc).replace(microsecond=0).isoformat().replace("+00:00","Z")
 
-def canon(obj) -> bytes:
-    return json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
-
 def sha256(b: bytes) -> str:
     return hashlib.sha256(b).hexdigest()
 
+_ENSURED = set()
+
 def ensure():
+    # Una vez por proceso (y por destino, por si cambian las rutas)
+    key = (CHANGESETS, AUDIT, REPORTS)
+    if key in _ENSURED:
+        return
     CHANGESETS.mkdir(parents=True, exist_ok=True)
     AUDIT.parent.mkdir(parents=True, exist_ok=True)
     REPORTS.mkdir(parents=True, exist_ok=True)
     if not AUDIT.exists():
         AUDIT.write_text("", encoding="utf-8")
+    _ENSURED.add(key)
 
 def write_audit(entry: dict):
+    # Group commit: el escritor compartido agrupa eventos y escribe lo pendiente al salir;
+    # el índice lateral (audit query) se pone al día con cada grupo y cada entrada
+    # se encadena por hash con la anterior (checkpoints firmados cada 1000)
     ensure()
-    with AUDIT.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    _audit().write(entry)
+
+def _audit():
+    from governance.audit import audit_writer
+
+    return audit_writer(AUDIT, index=True, chain=True)
+
+CACHE = ROOT / ".tsurphu-cache" / "validate.json"
+LEDGER_DB = ROOT / ".tsurphu-cache" / "ledger.sqlite"  # índice del ledger (governance.ledger)
+CACHE_VERSION = 2  # subir si cambian las reglas de validación (invalida la caché)
+
+def _load_cache() -> dict:
+    try:
+        cache = json.loads(CACHE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache.get("entries") or {}
+
+def _save_cache(entries: dict):
+    CACHE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = CACHE.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"version": CACHE_VERSION, "entries": entries}, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+    tmp.replace(CACHE)
+
+def _cached(entry, p: Path):
+    """(entrada aún válida para `p` o None, bytes de `p` o None).
+
+    Un solo stat y, si la entrada ya no sirve, una sola lectura después de él: el
+    sha256 y la verificación usan esos mismos bytes. Sin entrada no toca el archivo.
+    """
+    if not entry:
+        return None, None
+    st = p.stat()
+    if entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+        return entry, None
+    data = p.read_bytes()
+    if entry.get("size") == st.st_size and entry.get("sha256") == sha256(data):
+        return dict(entry, mtime_ns=st.st_mtime_ns), None
+    return None, (st, data)
+
+def validate(workers: int = 1, full: bool = False, strict: bool = False):
+    from governance.ledger import LedgerStore
+    from governance.packets import packet_entry, verify_packet_files
 
-def validate():
     errs = []
     for p in [DOCS/"master.md", DOCS/"changesetpacket-1.md", LEDGER, AUDIT]:
         if not p.exists():
             errs.append(f"Falta: {p}")
 
+    # Caché (ruta, tamaño, mtime, sha256) -> errores; --full la ignora y la rehace
+    old = {} if full else _load_cache()
+    entries = {}
+    revalidated = from_cache = 0
+
+    # Ledger: índice SQLite, reconstruido solo si el CSV cambió (--full siempre)
+    ledger = None
     if LEDGER.exists():
-        with LEDGER.open("r", encoding="utf-8-sig", newline="") as f:
-            r = csv.DictReader(f)
-            need = {"ObjectID","Nombre","Estrato_7x","Dueño","MetaAgent","Sensibilidad","Evidencia","Ruta"}
-            if set(r.fieldnames or []) != need:
-                errs.append("Ledger: columnas incorrectas")
-            seen=set()
-            for i,row in enumerate(r, start=2):
-                oid=(row.get("ObjectID") or "").strip()
-                if not oid:
-                    errs.append(f"Ledger L{i}: ObjectID vacío")
-                    continue
-                if oid in seen:
-                    errs.append(f"Ledger L{i}: duplicado {oid}")
-                seen.add(oid)
-
-    for p in sorted(CHANGESETS.glob("*.json")):
-        try:
-            obj=json.loads(p.read_text(encoding="utf-8"))
-            recorded=(obj.get("integrity",{}).get("packet_hash") or "")
-            tmp=dict(obj); tmp["integrity"]=dict(tmp.get("integrity",{})); tmp["integrity"]["packet_hash"]=""
-            computed="sha256:"+sha256(canon(tmp))
-            if recorded!=computed:
-                errs.append(f"{p.name}: hash no coincide")
-        except Exception as e:
-            errs.append(f"{p.name}: inválido ({e})")
+        ledger = LedgerStore(LEDGER, LEDGER_DB)
+        if full:
+            ledger.rebuild()
+            revalidated += 1
+        elif ledger.sync():
+            revalidated += 1
+        else:
+            from_cache += 1
+        errs.extend(ledger.errors())
+
+    # Paquetes cambiados: se verifican con los bytes que ya leyó _cached; los que no
+    # estaban en la caché, en lotes (con --workers en paralelo; mismo orden de errores)
+    paths = sorted(CHANGESETS.glob("*.json"))
+    results = {}
+    pending = []
+    for p in paths:
+        key = p.relative_to(ROOT).as_posix()
+        entry, read = _cached(old.get(key), p)
+        if entry is not None:
+            results[key] = entry
+            from_cache += 1
+        elif read is not None:
+            results[key] = packet_entry(p, *read)
+            revalidated += 1
+        else:
+            pending.append(p)
+    for p, entry in verify_packet_files(pending, workers=workers):
+        results[p.relative_to(ROOT).as_posix()] = entry
+        revalidated += 1
+    for p in paths:
+        key = p.relative_to(ROOT).as_posix()
+        entries[key] = results[key]
+        errs.extend(results[key]["errors"])
+
+    _save_cache(entries)
+    print(f"[validate] {revalidated} revalidados, {from_cache} desde caché")
+
+    # Objetos de los changesets contra el ledger, en una sola consulta
+    warnings = []
+    if ledger is not None:
+        refs = [
+            (p.name, oid, path)
+            for p in paths
+            for oid, path in entries[p.relative_to(ROOT).as_posix()].get("refs", [])
+        ]
+        ref_errs, warnings = ledger.check_refs(refs)
+        ledger.close()
+        errs.extend(ref_errs)
+        if strict:
+            errs.extend(warnings)
+            warnings = []
+
+    # Log de auditoría: solo la cola desde el último checkpoint firmado (--full: todo)
+    if AUDIT.exists():
+        from governance.audit_chain import verify_log
+
+        chain = verify_log(AUDIT, full=full)
+        errs.extend(chain["errors"])
+        since = "el último checkpoint" if chain["checkpoint"] else "el inicio"
+        print(f"[validate] auditoría: {chain['entries']} entradas verificadas desde {since}")
+
+    if warnings:
+        print(f"[validate] AVISOS ({len(warnings)}; --strict los trata como errores):")
+        for w in warnings:
+            print(" -", w)
 
     if errs:
         print("[validate] ERRORES:")
@@ -98,41 +196,150 @@ def make_changeset(change_id: str, actor_role: str, change_type: str, layers: li
     pkt["integrity"]["packet_hash"]="sha256:"+sha256(canon(tmp))
     return pkt
 
-def cmd_validate(_): 
-    validate()
+def cmd_validate(args):
+    validate(workers=args.workers, full=args.full, strict=args.strict)
 
 def cmd_slice_a(args):
+    from orchestration.slice_a import ENGINE_VERSION, report_from_args
+
     ensure()
 
-    # Año para cálculo: por ahora usamos el año gregoriano de birth_date (sin ajustar por Losar)
-    year = int(args.birth_date.split("-")[0])
-    ty = tibetan_year(year, lookups_dir=ROOT / "src" / "engines" / "lookups")
+    if args.input:
+        return cmd_slice_a_batch(args)
 
-    result = {
-        "timestamp_utc": now_utc(),
-        "input": {"name": args.name, "birth_date": args.birth_date, "birth_time": args.birth_time, "place": args.place},
-        "engine": {"version": "sliceA-0.2", "tibetan_year_engine": "tibetan_year.py"},
-        "tibetan": {
-            "year_animal": ty.animal,
-            "element": ty.element,
-            "mewa": ty.mewa if ty.mewa is not None else "TBD",
-            "parkha": ty.parkha if ty.parkha is not None else "TBD"
-        },
-        "interpretation": "Pipeline demo + año (animal/elemento) calculado. Mewa/Parkha aún por tabla validada.",
-        "sources_ref": []
-    }
+    result = report_from_args(args, lookups_dir=ROOT / "src" / "engines" / "lookups")
 
-    fn = REPORTS / f"sliceA-{dt.datetime.now(dt.timezone.utc).strftime('%Y%m%d-%H%M%S')}.json"
-    fn.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    # Misma entrada + misma versión del motor -> misma clave: no se guarda dos veces
+    with _report_store() as store:
+        key, created = store.put(result)
 
     write_audit({
         "timestamp_utc": result["timestamp_utc"],
         "event":"sliceA_report_created",
-        "report_file": "/reports/"+fn.name,
-        "engine_version":"sliceA-0.2"
+        "report_file": _store_path(key),
+        "engine_version":ENGINE_VERSION,
+        "deduplicated": not created,
     })
 
-    print(f"[slice-a] OK: {fn}")
+    print(f"[slice-a] OK: {key}" + ("" if created else " (ya estaba en el almacén)"))
+
+def _report_store():
+    from orchestration.report_store import ReportStore
+
+    return ReportStore(REPORT_STORE)
+
+def _store_path(key: str) -> str:
+    return "/reports/store/" + key
+
+def _repo_path(p: Path) -> str:
+    # Ruta como la registra la auditoría: "/reports/..." dentro del repo
+    p = p.resolve()
+    try:
+        return "/" + p.relative_to(ROOT).as_posix()
+    except ValueError:
+        return p.as_posix()
+
+def cmd_slice_a_batch(args):
+    # Lote: informes en paralelo (en orden de entrada), salida en bloque y un solo
+    # group commit con todas las entradas de auditoría al final. Sin --output van
+    # al almacén de informes (deduplicados); con --output, a un .jsonl o a un directorio.
+    import time
+    from orchestration.slice_a import ENGINE_VERSION, iter_people, slice_a_batch
+
+    stamp = dt.datetime.now(dt.timezone.utc).strftime('%Y%m%d-%H%M%S')
+    out = Path(args.output) if args.output else None
+    segment = out is not None and out.suffix.lower() == ".jsonl"
+    store = f = None
+    if out is None:
+        store = _report_store()
+    elif segment:
+        out.parent.mkdir(parents=True, exist_ok=True)
+        f = out.open("w", encoding="utf-8", buffering=1 << 20)
+    else:
+        out.mkdir(parents=True, exist_ok=True)
+
+    t0 = time.perf_counter()
+    audit, failed, stored = [], 0, 0
+    pending = []
+
+    def flush_store():
+        nonlocal stored
+        for (report, entry), (key, created) in zip(pending, store.put_many(r for r, _ in pending)):
+            entry["report_file"] = _store_path(key)
+            entry["deduplicated"] = not created
+            stored += created
+        pending.clear()
+
+    try:
+        results = slice_a_batch(
+            iter_people(Path(args.input)),
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            lookups_dir=ROOT / "src" / "engines" / "lookups",
+        )
+        for n, report, error in results:
+            if error:
+                failed += 1
+                print(f"[slice-a] fila {n}: {error}")
+                continue
+            entry = {
+                "timestamp_utc": report["timestamp_utc"],
+                "event": "sliceA_report_created",
+                "report_file": None,
+                "engine_version": ENGINE_VERSION,
+            }
+            if store is not None:
+                pending.append((report, entry))
+                if len(pending) >= args.chunk_size:
+                    flush_store()
+            elif segment:
+                f.write(json.dumps(report, ensure_ascii=False) + "\n")
+                entry["report_file"] = _repo_path(out)
+                entry["line"] = len(audit) + 1
+            else:
+                fn = out / f"sliceA-{stamp}-{n:06d}.json"
+                fn.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+                entry["report_file"] = _repo_path(fn)
+            audit.append(entry)
+        if pending:
+            flush_store()
+    finally:
+        if f is not None:
+            f.close()
+        if store is not None:
+            store.close()
+        built = time.perf_counter() - t0
+        # Se audita todo informe que llegó a disco, aunque el lote se haya cortado
+        # (los que quedaron pendientes del almacén no tienen report_file)
+        _audit().write_many([e for e in audit if e["report_file"]])
+    elapsed = time.perf_counter() - t0
+    rate = len(audit) / elapsed if elapsed else 0.0
+    where = f"almacén, {stored} nuevos" if store is not None else str(out)
+    print(
+        f"[slice-a] {len(audit)} informes, {failed} con error, en {elapsed:.2f} s "
+        f"({rate:.0f} informes/s; auditoría {(elapsed - built) * 1000:.0f} ms, {args.workers} workers): {where}"
+    )
+    if failed:
+        raise SystemExit(1)
+
+def cmd_reports_list(args):
+    with _report_store() as store:
+        for row in store.entries(limit=args.limit, name=args.name):
+            print(json.dumps(row, ensure_ascii=False))
+
+def cmd_reports_show(args):
+    with _report_store() as store:
+        key = store.resolve(args.key)
+        report = store.get(key) if key else None
+    if report is None:
+        print(f"[reports] no existe (o el prefijo es ambiguo): {args.key}")
+        sys.exit(1)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+def cmd_reports_reindex(args):
+    with _report_store() as store:
+        n = store.reindex()
+    print(f"[reports] {n} informes indexados: {REPORT_STORE}")
 
 def cmd_new_changeset(args):
     ensure()
@@ -152,21 +359,139 @@ def cmd_new_changeset(args):
     })
     print(f"[new-changeset] OK: {out}")
 
-def main():
-    p=argparse.ArgumentParser(prog="tsurphu")
-    sub=p.add_subparsers(dest="cmd", required=True)
+def cmd_bench_validate(args):
+    from governance.packets import bench_validate
+
+    result = bench_validate(args.packets, workers=args.workers, directory=Path(args.dir) if args.dir else None)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+    print(f"[bench validate] {result['packets']} paquetes sintéticos, {result['bytes'] / 1e6:.1f} MB")
+    for name, r in result["runs"].items():
+        print(f"  {name:<14} {r['seconds']:8.3f} s  {r['packets_per_s']:>10.1f} paquetes/s")
+
+def cmd_bench_audit(args):
+    from governance.audit import bench_audit
+
+    result = bench_audit(args.events, batch_size=args.batch_size, flush_ms=args.flush_ms)
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return
+    print(f"[bench audit] {result['events']} eventos, lotes de {result['batch_size']}, cada {result['flush_ms']:g} ms")
+    for name, r in result["runs"].items():
+        print(f"  {name:<16} {r['seconds']:8.4f} s  {r['events_per_s']:>12.1f} eventos/s")
+
+def cmd_audit_query(args):
+    from governance.audit_index import AuditIndex
+
+    log = Path(args.log) if args.log else AUDIT
+    if not log.exists():
+        print(f"[audit] no existe: {log}")
+        sys.exit(1)
+    filters = dict(event=args.event, change_id=args.change_id, report_file=args.report_file,
+                   day=args.day, since=args.since, until=args.until, limit=args.limit)
+    with AuditIndex(log) as idx:
+        for entry in idx.query(**filters):
+            print(json.dumps(entry, ensure_ascii=False))
+
+def cmd_audit_reindex(args):
+    from governance.audit_index import AuditIndex
 
-    v=sub.add_parser("validate")
-    v.set_defaults(func=cmd_validate)
+    log = Path(args.log) if args.log else AUDIT
+    with AuditIndex(log) as idx:
+        n = idx.rebuild()
+    print(f"[audit] {n} entradas indexadas: {idx.index_path}")
 
-    s=sub.add_parser("slice-a")
-    s.add_argument("--name", default="Demo")
-    s.add_argument("--birth-date", default="1990-11-02")
-    s.add_argument("--birth-time", default="20:30")
-    s.add_argument("--place", default="Medellín")
-    s.set_defaults(func=cmd_slice_a)
+def cmd_ledger(args):
+    from governance.ledger import LedgerStore
 
-    c=sub.add_parser("new-changeset")
+    with LedgerStore(LEDGER, LEDGER_DB) as ledger:
+        ledger.sync()
+        if args.id:
+            rows = [r for r in [ledger.get(args.id)] if r]
+        elif args.path:
+            rows = ledger.by_path(args.path)
+        else:
+            rows = ledger.by_owner(args.owner)
+    for r in rows:
+        print(json.dumps(r, ensure_ascii=False))
+    if not rows:
+        sys.exit(1)
+
+# Comandos: mismo registro perezoso que orchestration.cli (register_command /
+# add_commands), en un diccionario propio. Los manejadores viven aquí e importan
+# sus motores al ejecutarse; los grupos (bench, reports, audit) despachan por subcomando.
+_TOOLS = {}
+
+def _group(dest, handlers):
+    return lambda args: handlers[getattr(args, dest)](args)
+
+@register_command("validate", help="Validar docs, ledger, changesets y auditoría", handler=cmd_validate, registry=_TOOLS)
+def _configure_validate(v):
+    v.add_argument("--workers", type=positive_int, default=1, help="Verificar changesets en N procesos")
+    v.add_argument("--full", action="store_true", help="Ignorar la caché de validación y revalidar todo")
+    v.add_argument("--strict", action="store_true", help="Objetos de changesets ausentes del ledger cuentan como error")
+
+@register_command("slice-a", help="Informe Slice-A (o un lote con --input), guardado y auditado", handler=cmd_slice_a, registry=_TOOLS)
+def _configure_slice_a(s):
+    from orchestration.slice_a import add_slice_a_arguments, add_slice_a_batch_arguments
+
+    add_slice_a_arguments(s)
+    add_slice_a_batch_arguments(s)
+
+@register_command("bench", help="Benchmarks de validate y del log de auditoría",
+                  handler=_group("bench", {"validate": cmd_bench_validate, "audit": cmd_bench_audit}), registry=_TOOLS)
+def _configure_bench(b):
+    bsub=b.add_subparsers(dest="bench", required=True)
+    bv=bsub.add_parser("validate", help="Paquetes/s de la verificación de changesets sobre un corpus sintético")
+    bv.add_argument("--packets", type=int, default=10000)
+    bv.add_argument("--workers", type=positive_int, default=os.cpu_count() or 1)
+    bv.add_argument("--dir", default=None, help="Escribir el corpus aquí (por defecto, un directorio temporal)")
+    bv.add_argument("--json", action="store_true")
+
+    ba=bsub.add_parser("audit", help="Eventos/s del log de auditoría: open/close por evento vs. group commit")
+    ba.add_argument("--events", type=int, default=20000)
+    ba.add_argument("--batch-size", type=int, default=256)
+    ba.add_argument("--flush-ms", type=float, default=50.0)
+    ba.add_argument("--json", action="store_true")
+
+@register_command("reports", help="Almacén de informes (direccionado por contenido)",
+                  handler=_group("reports", {"list": cmd_reports_list, "show": cmd_reports_show, "reindex": cmd_reports_reindex}),
+                  registry=_TOOLS)
+def _configure_reports(r):
+    rsub=r.add_subparsers(dest="reports", required=True)
+    rl=rsub.add_parser("list", help="Informes del almacén (JSONL, del más antiguo al más nuevo)")
+    rl.add_argument("--name")
+    rl.add_argument("--limit", type=int)
+    rs=rsub.add_parser("show", help="Un informe por su clave (o un prefijo único de ella)")
+    rs.add_argument("key")
+    rsub.add_parser("reindex", help="Reconstruir el índice del almacén desde sus segmentos")
+
+@register_command("ledger", help="Buscar objetos en el ledger (índice SQLite)", handler=cmd_ledger, registry=_TOOLS)
+def _configure_ledger(l):
+    lg=l.add_mutually_exclusive_group(required=True)
+    lg.add_argument("--id", help="ObjectID")
+    lg.add_argument("--path", help="Ruta del objeto")
+    lg.add_argument("--owner", help="Dueño")
+
+@register_command("audit", help="Consultar o reindexar el log de auditoría",
+                  handler=_group("audit", {"query": cmd_audit_query, "reindex": cmd_audit_reindex}), registry=_TOOLS)
+def _configure_audit(a):
+    asub=a.add_subparsers(dest="audit", required=True)
+    aq=asub.add_parser("query", help="Entradas del log de auditoría (JSONL) vía el índice lateral")
+    aq.add_argument("--event")
+    aq.add_argument("--change-id")
+    aq.add_argument("--report-file")
+    aq.add_argument("--day", help="Día UTC, AAAA-MM-DD")
+    aq.add_argument("--since", help="Desde este día UTC (incluido)")
+    aq.add_argument("--until", help="Hasta este día UTC (incluido)")
+    aq.add_argument("--limit", type=int)
+    aq.add_argument("--log", default=None, help="Log a consultar (por defecto, el del repo)")
+    ar=asub.add_parser("reindex", help="Reconstruir el índice lateral del log de auditoría")
+    ar.add_argument("--log", default=None)
+
+@register_command("new-changeset", help="Crear un changeset con su hash y auditarlo", handler=cmd_new_changeset, registry=_TOOLS)
+def _configure_new_changeset(c):
     c.add_argument("--change-id", required=True)
     c.add_argument("--actor-role", default="Engineer")
     c.add_argument("--change-type", default="update", choices=["add","update","deprecate","remove"])
@@ -174,9 +499,11 @@ def main():
     c.add_argument("--module", action="append", default=["misc"])
     c.add_argument("--object", action="append", required=True, help="ObjectID:op:path:sens")
     c.add_argument("--rationale", required=True)
-    c.set_defaults(func=cmd_new_changeset)
 
-    args=p.parse_args()
+def main(argv=None):
+    p=argparse.ArgumentParser(prog="tsurphu")
+    add_commands(p.add_subparsers(dest="cmd", required=True), _TOOLS)
+    args=p.parse_args(argv)
     args.func(args)
 
 if __name__=="__main__":